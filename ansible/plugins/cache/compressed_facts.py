@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Compressed Fact Cache for Ansible
+gzip'd JSON per host, with per-host TTLs and invalidation of hosts whose EC2 instance
+Terraform has replaced, so repeat playbook.yml runs skip the setup round trip
+"""
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: compressed_facts
+    short_description: gzip-compressed JSON files with per-host TTL and Terraform invalidation
+    description:
+      - Stores each host's facts as a gzip-compressed JSON file.
+      - Each entry records the EC2 instance id that owned the host's private IP when it was
+        written, taken from the Terraform state. If Terraform later replaces that instance,
+        the entry is dropped on read and the facts are gathered again.
+    options:
+      _uri:
+        required: True
+        description: Directory the cache files are written to.
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_CONNECTION
+        ini:
+          - key: fact_caching_connection
+            section: defaults
+        type: path
+      _prefix:
+        description: Prefix for the cache file names.
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_PREFIX
+        ini:
+          - key: fact_caching_prefix
+            section: defaults
+      _timeout:
+        default: 86400
+        description: Seconds a host's facts stay valid, unless host_timeouts says otherwise (0 never expires).
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_TIMEOUT
+        ini:
+          - key: fact_caching_timeout
+            section: defaults
+        type: integer
+      host_timeouts:
+        description:
+          - Per-host lifetimes as C(pattern=seconds), matched against the inventory host name
+            in order with shell-style wildcards, e.g. C(bastion=604800, redis-node-*=3600).
+        default: []
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_HOST_TIMEOUTS
+        ini:
+          - key: host_timeouts
+            section: compressed_facts
+        type: list
+      tfstate:
+        description:
+          - Terraform state whose aws_instance resources identify the hosts.
+          - Missing or unreadable state disables the invalidation check.
+        default: terraform/terraform.tfstate
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_TFSTATE
+        ini:
+          - key: tfstate
+            section: compressed_facts
+        type: path
+      compression_level:
+        description: gzip level, 1 (fastest) to 9 (smallest).
+        default: 6
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_COMPRESSION_LEVEL
+        ini:
+          - key: compression_level
+            section: compressed_facts
+        type: integer
+"""
+
+import fnmatch
+import gzip
+import json
+import os
+import re
+import time
+
+from ansible.module_utils.common.json import AnsibleJSONEncoder
+from ansible.plugins.cache import BaseFileCacheModule
+from ansible.utils.display import Display
+
+display = Display()
+
+# tfstate path -> ((mtime_ns, size), {private or public IP: instance id})
+_TERRAFORM_INSTANCES = {}
+
+
+def terraform_instances(path):
+    """{IP: instance id} for every aws_instance in a v4 state file; re-read only when it changes"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _TERRAFORM_INSTANCES.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    instances = {}
+    for resource in state.get("resources", []):
+        if resource.get("type") != "aws_instance" or resource.get("mode", "managed") != "managed":
+            continue
+        for instance in resource.get("instances", []):
+            attributes = instance.get("attributes") or {}
+            for field in ("private_ip", "public_ip"):
+                if attributes.get(field):
+                    instances[attributes[field]] = attributes.get("id")
+    _TERRAFORM_INSTANCES[path] = (stamp, instances)
+    return instances
+
+
+# ansible-core 2.19+ prefixes keys with a schema id ("s1_redis-node-1")
+_SCHEMA_PREFIX = re.compile(r"^s\d+_")
+
+
+def host_address(facts):
+    """The host's primary IPv4 address from gathered facts, if there is one"""
+    if not isinstance(facts, dict):
+        return None
+    if isinstance(facts.get("__payload__"), str):
+        # ansible-core 2.19+ hands persistent caches the facts serialized as {"__payload__": "<json>"}
+        try:
+            facts = json.loads(facts["__payload__"])
+        except ValueError:
+            return None
+    for name in ("ansible_default_ipv4", "default_ipv4"):
+        address = (facts.get(name) or {}).get("address")
+        if address:
+            return address
+    return None
+
+
+class CacheModule(BaseFileCacheModule):
+    """Facts in gzip'd JSON files, dropped when their TTL passes or their instance is replaced"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._host_timeouts = []
+        for item in self.get_option("host_timeouts") or []:
+            pattern, _, seconds = item.rpartition("=")
+            self._host_timeouts.append((pattern.strip(), float(seconds)))
+        # key -> (address, instance id) recorded with the facts
+        self._identities = {}
+
+    def _ttl(self, key):
+        host = _SCHEMA_PREFIX.sub("", key)
+        for pattern, seconds in self._host_timeouts:
+            if fnmatch.fnmatchcase(host, pattern):
+                return seconds
+        return self._timeout
+
+    def has_expired(self, key):
+        ttl = self._ttl(key)
+        if ttl == 0:
+            return False
+        try:
+            age = time.time() - os.stat(self._get_cache_file_name(key)).st_mtime
+        except OSError:
+            return False
+        if age <= ttl:
+            return False
+        self._cache.pop(key, None)
+        return True
+
+    def _identity(self, facts):
+        address = host_address(facts)
+        instances = terraform_instances(self.get_option("tfstate"))
+        return address, (instances or {}).get(address)
+
+    def _replaced(self, key):
+        address, instance_id = self._identities.get(key, (None, None))
+        if not address or not instance_id:
+            return False
+        instances = terraform_instances(self.get_option("tfstate"))
+        if instances is None:
+            return False
+        return instances.get(address) != instance_id
+
+    def get(self, key):
+        loaded = key in self._cache
+        value = super().get(key)
+        if not loaded and self._replaced(key):
+            display.vvv(f"compressed_facts: {_SCHEMA_PREFIX.sub('', key)} now runs on a different instance, "
+                        "dropping its cached facts")
+            self.delete(key)
+            raise KeyError(key)
+        return value
+
+    def contains(self, key):
+        if not super().contains(key):
+            return False
+        try:
+            self.get(key)
+        except KeyError:
+            return False
+        return True
+
+    def delete(self, key):
+        self._identities.pop(key, None)
+        super().delete(key)
+
+    def _load(self, filepath):
+        with gzip.open(filepath, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+        key = os.path.basename(filepath)[len(self.get_option("_prefix") or ""):]
+        self._identities[key] = (entry.get("address"), entry.get("instance_id"))
+        return entry["facts"]
+
+    def _dump(self, value, filepath):
+        address, instance_id = self._identity(value)
+        with gzip.open(filepath, "wt", encoding="utf-8", compresslevel=self.get_option("compression_level")) as f:
+            json.dump({"address": address, "instance_id": instance_id, "facts": value}, f,
+                      cls=AnsibleJSONEncoder, sort_keys=True, separators=(",", ":"))
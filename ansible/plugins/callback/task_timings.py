@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Task Timings Callback for Ansible
+Per-task, per-host wall time split into connection overhead and module run time,
+appended as JSON lines so ansible_timing_report.py can compare builds
+"""
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: task_timings
+    type: aggregate
+    short_description: Write per-task, per-host timings to a JSONL file
+    description:
+      - Records how long every task took on every host, from the moment the host starts
+        the task until its result arrives, and appends one JSON object per task and host
+        to I(output) when the playbook finishes.
+      - Ansible does not report SSH connect time to callbacks, so each duration is split
+        into C(connect_seconds) and C(module_seconds). When the module reports its own
+        runtime (command/shell C(delta), wait_for C(elapsed)) the rest of the duration is
+        connection overhead. Otherwise the host's fastest remote task in the run is taken
+        as its per-task overhead (SSH channel, bastion hop, module transfer and Python start).
+      - The first remote task on each host is marked C(first_contact); it also pays the
+        SSH (and ProxyCommand) handshake that ControlPersist reuses afterwards.
+      - Records carry the Jenkins C(JOB_NAME) and C(BUILD_NUMBER) when they are set.
+    requirements:
+      - enable in configuration (callback_whitelist / callbacks_enabled)
+    options:
+      output:
+        description: JSONL file the records are appended to.
+        default: ./ansible_timings.jsonl
+        env:
+          - name: ANSIBLE_TASK_TIMINGS_FILE
+        ini:
+          - section: callback_task_timings
+            key: output
+        type: path
+"""
+
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from ansible.plugins.callback import CallbackBase
+
+# Actions that run on the controller and never touch the host's connection
+CONTROLLER_ACTIONS = frozenset((
+    "add_host", "assert", "debug", "fail", "group_by", "include_role", "include_tasks", "include_vars",
+    "import_role", "import_tasks", "meta", "pause", "set_fact", "set_stats",
+))
+
+# Result fields in which modules report their own runtime
+MODULE_RUNTIME_FIELDS = ("delta", "elapsed")
+
+
+def module_runtime(result):
+    """Seconds the module says it ran for, if it says (command's delta is H:MM:SS.ffffff)"""
+    for field in MODULE_RUNTIME_FIELDS:
+        value = result.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if isinstance(value, str) and value.count(":") == 2:
+            hours, minutes, seconds = value.split(":")
+            try:
+                return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            except ValueError:
+                return None
+    return None
+
+
+class CallbackModule(CallbackBase):
+    """Buffers one record per task and host, splits the timings and appends them at the end"""
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "task_timings"
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._run = {
+            "run": uuid.uuid4().hex[:12],
+            "job": os.environ.get("JOB_NAME"),
+            "build": os.environ.get("BUILD_NUMBER"),
+            "playbook": None,
+        }
+        self._play = None
+        self._task_started = {}
+        # (host, task uuid) -> start time
+        self._started = {}
+        self._contacted = set()
+        self._records = []
+
+    def v2_playbook_on_start(self, playbook):
+        self._run["playbook"] = os.path.basename(playbook._file_name)
+
+    def v2_playbook_on_play_start(self, play):
+        self._play = play.get_name()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._task_started[task._uuid] = time.time()
+
+    v2_playbook_on_handler_task_start = v2_playbook_on_task_start
+
+    def v2_runner_on_start(self, host, task):
+        self._started[(host.get_name(), task._uuid)] = time.time()
+
+    def _record(self, result, status):
+        now = time.time()
+        host, task = result._host.get_name(), result._task
+        start = self._started.pop((host, task._uuid), None) or self._task_started.get(task._uuid, now)
+        local = task.action.rsplit(".", 1)[-1] in CONTROLLER_ACTIONS or task.delegate_to in ("localhost", "127.0.0.1")
+        first_contact = not local and status not in ("skipped", "unreachable") and host not in self._contacted
+        if first_contact:
+            self._contacted.add(host)
+        self._records.append({
+            "play": self._play,
+            "task": task.get_name(),
+            "action": task.action,
+            "host": host,
+            "status": status,
+            "changed": bool(result._result.get("changed")),
+            "attempts": result._result.get("attempts", 1),
+            "start": datetime.fromtimestamp(start, timezone.utc).isoformat(timespec="milliseconds"),
+            "duration": round(now - start, 4),
+            "module_seconds": module_runtime(result._result),
+            "local": local,
+            "first_contact": first_contact,
+        })
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, "changed" if result._result.get("changed") else "ok")
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, "ignored" if ignore_errors else "failed")
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, "skipped")
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, "unreachable")
+
+    def _split(self):
+        """Fill connect_seconds and module_seconds on every buffered record"""
+        floors = {}
+        for record in self._records:
+            if record["local"] or record["first_contact"] or record["status"] in ("skipped", "unreachable"):
+                continue
+            if record["module_seconds"] is None:
+                floors[record["host"]] = min(floors.get(record["host"], record["duration"]), record["duration"])
+
+        for record in self._records:
+            duration = record["duration"]
+            if record["local"] or record["status"] == "skipped":
+                record["connect_seconds"] = 0.0
+                record["module_seconds"] = duration if record["local"] else 0.0
+            elif record["module_seconds"] is not None:
+                record["module_seconds"] = min(duration, round(record["module_seconds"], 4))
+                record["connect_seconds"] = round(duration - record["module_seconds"], 4)
+            else:
+                record["connect_seconds"] = min(duration, floors.get(record["host"], duration))
+                record["module_seconds"] = round(duration - record["connect_seconds"], 4)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self._records:
+            return
+        self._split()
+        path = self.get_option("output")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One write per playbook run, so concurrent runs appending to the same file keep whole lines
+        lines = "".join(json.dumps(dict(self._run, **record), sort_keys=True) + "\n" for record in self._records)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        self._display.v(f"task_timings: {len(self._records)} task timings appended to {path}")
+        self._records = []
@@ -0,0 +1,268 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Redis Cluster Readiness Check
+Ansible module that polls every Redis node over one persistent connection each,
+with exponential backoff, until all answer PING (and, optionally, the cluster is ok)
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: redis_cluster_ready
+short_description: Wait until every Redis node (and optionally the cluster) is ready
+description:
+  - Opens one TCP connection per Redis node from the host the task runs on and keeps it
+    for the whole wait, instead of one SSH round trip and redis-cli process per retry.
+  - Polls all nodes in each pass with exponential backoff between passes.
+  - Run it once (C(run_once: true)) from any node; the nodes talk over the private network.
+options:
+  nodes:
+    description: Redis nodes as C(host) or C(host:port).
+    type: list
+    elements: str
+    required: true
+  port:
+    description: Port for entries in I(nodes) that do not name one.
+    type: int
+    default: 6379
+  cluster_state:
+    description:
+      - C(any) waits for PING only and reports the cluster state.
+      - C(ok) also waits until every node reports C(cluster_state:ok), all 16384 slots are
+        assigned and each node knows every other.
+    type: str
+    choices: [any, ok]
+    default: any
+  timeout:
+    description: Seconds to wait before failing.
+    type: float
+    default: 60
+  connect_timeout:
+    description: Seconds allowed for each connection attempt and reply.
+    type: float
+    default: 2
+  initial_delay:
+    description: Seconds between the first two passes; doubles after every pass.
+    type: float
+    default: 0.05
+  max_delay:
+    description: Upper bound for the delay between passes.
+    type: float
+    default: 2
+'''
+
+EXAMPLES = r'''
+- name: Wait for Redis to be ready
+  redis_cluster_ready:
+    nodes: "{{ ansible_play_hosts | map('extract', hostvars, 'ansible_host') | list }}"
+    port: "{{ redis_port }}"
+  run_once: true
+
+- name: Wait for the cluster to cover every slot
+  redis_cluster_ready:
+    nodes: [10.0.2.192, 10.0.3.111, 10.0.4.132]
+    cluster_state: ok
+    timeout: 120
+  run_once: true
+'''
+
+RETURN = r'''
+elapsed:
+  description: Seconds until every node was ready.
+  returned: always
+  type: float
+passes:
+  description: Number of polling passes over the nodes.
+  returned: always
+  type: int
+cluster_state:
+  description: C(ok) when every node reports cluster_state:ok, C(disabled) without cluster mode, else C(fail).
+  returned: always
+  type: str
+nodes:
+  description: Per node C(ready), C(cluster_state), C(slots_assigned), C(known_nodes) and the last C(error).
+  returned: always
+  type: dict
+'''
+
+import socket
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+CLUSTER_SLOTS = 16384
+
+
+class RedisReplyError(Exception):
+    pass
+
+
+class NodeConnection(object):
+    """A blocking RESP connection that is reopened only after it fails"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+
+    def _connect(self):
+        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        self.sock.settimeout(self.timeout)
+        self.reader = self.sock.makefile("rb")
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.reader.close()
+                self.sock.close()
+            except (OSError, socket.error):
+                pass
+        self.sock = self.reader = None
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise socket.error("connection closed by server")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"-":
+            return RedisReplyError(body.decode("utf-8", "replace"))
+        if prefix in (b"+", b":"):
+            return body.decode("utf-8", "replace")
+        if prefix == b"$":
+            length = int(body)
+            return None if length < 0 else self.reader.read(length + 2)[:-2].decode("utf-8", "replace")
+        raise socket.error("unexpected reply %r" % line)
+
+    def pipeline(self, *commands):
+        """Send all commands in one write; replies (errors as RedisReplyError) in order"""
+        if self.sock is None:
+            self._connect()
+        payload = []
+        for command in commands:
+            payload.append(b"*%d\r\n" % len(command))
+            for arg in command:
+                data = arg.encode("utf-8")
+                payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            self.sock.sendall(b"".join(payload))
+            return [self._read() for _ in commands]
+        except (OSError, socket.error, ValueError):
+            self.close()
+            raise
+
+
+def parse_info(text):
+    info = {}
+    for line in (text or "").splitlines():
+        if line and not line.startswith("#") and ":" in line:
+            key, _, value = line.partition(":")
+            info[key] = value.strip()
+    return info
+
+
+def parse_node(entry, default_port):
+    host, sep, port = entry.rpartition(":")
+    if not sep or not port.isdigit():
+        return entry, default_port
+    return host, int(port)
+
+
+def check_node(connection, status, node_count, cluster_state):
+    """Poll one node; returns True once it satisfies the requested readiness"""
+    try:
+        pong, info = connection.pipeline(("PING",), ("CLUSTER", "INFO"))
+    except (OSError, socket.error, ValueError) as e:
+        status.update(ready=False, error=str(e))
+        return False
+
+    if isinstance(pong, RedisReplyError):
+        # LOADING while the dataset is read from disk, MASTERDOWN on a syncing replica, ...
+        status.update(ready=False, error=str(pong))
+        return False
+    status.update(ready=True, error=None)
+
+    if isinstance(info, RedisReplyError):
+        status.update(cluster_state="disabled", slots_assigned=0, known_nodes=0)
+        return cluster_state == "any"
+    info = parse_info(info)
+    status.update(cluster_state=info.get("cluster_state", "fail"),
+                  slots_assigned=int(info.get("cluster_slots_assigned", 0)),
+                  known_nodes=int(info.get("cluster_known_nodes", 0)))
+    if cluster_state == "any":
+        return True
+    return (status["cluster_state"] == "ok" and status["slots_assigned"] == CLUSTER_SLOTS
+            and status["known_nodes"] >= node_count)
+
+
+def wait_for_nodes(nodes, cluster_state="any", timeout=60.0, connect_timeout=2.0,
+                   initial_delay=0.05, max_delay=2.0):
+    """(addresses still not ready, passes, elapsed, {address: status}) once ready or timed out"""
+    connections = dict(("%s:%d" % node, NodeConnection(node[0], node[1], connect_timeout)) for node in nodes)
+    statuses = dict((address, {"ready": False, "error": "not polled"}) for address in connections)
+    pending = set(connections)
+    start = time.time()
+    delay = initial_delay
+    passes = 0
+    try:
+        while True:
+            passes += 1
+            for address in sorted(pending):
+                if check_node(connections[address], statuses[address], len(nodes), cluster_state):
+                    pending.discard(address)
+            elapsed = time.time() - start
+            if not pending or elapsed >= timeout:
+                return pending, passes, elapsed, statuses
+            time.sleep(min(delay, timeout - elapsed))
+            delay = min(max_delay, delay * 2)
+    finally:
+        for connection in connections.values():
+            connection.close()
+
+
+def overall_state(statuses):
+    states = set(status.get("cluster_state") for status in statuses.values())
+    if states == set(["ok"]):
+        return "ok"
+    if states == set(["disabled"]):
+        return "disabled"
+    return "fail"
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            nodes=dict(type="list", elements="str", required=True),
+            port=dict(type="int", default=6379),
+            cluster_state=dict(type="str", default="any", choices=["any", "ok"]),
+            timeout=dict(type="float", default=60),
+            connect_timeout=dict(type="float", default=2),
+            initial_delay=dict(type="float", default=0.05),
+            max_delay=dict(type="float", default=2),
+        ),
+        supports_check_mode=True,
+    )
+    params = module.params
+    nodes = [parse_node(entry, params["port"]) for entry in params["nodes"]]
+    if not nodes:
+        module.fail_json(msg="nodes must name at least one Redis node")
+
+    pending, passes, elapsed, statuses = wait_for_nodes(
+        nodes, params["cluster_state"], params["timeout"], params["connect_timeout"],
+        params["initial_delay"], params["max_delay"])
+    result = dict(changed=False, elapsed=round(elapsed, 3), passes=passes,
+                  cluster_state=overall_state(statuses), nodes=statuses)
+    if pending:
+        reasons = ["%s (%s)" % (address, statuses[address]["error"] or
+                                "cluster_state:%s" % statuses[address].get("cluster_state"))
+                   for address in sorted(pending)]
+        module.fail_json(msg="Redis not ready after %.0fs: %s" % (elapsed, ", ".join(reasons)), **result)
+    module.exit_json(**result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Ansible Task Timing Report
+Aggregates the task_timings callback's JSONL across builds, flags the slowest tasks
+and the hosts that are consistently slower than their peers
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+# Statuses whose duration says nothing about the task's real cost
+NOT_RUN = ("skipped", "unreachable")
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values, dtype=float), q)) if values else 0.0
+
+
+class TaskStats:
+    """Wall time of one task across runs, and how much of its host time went to the connection"""
+
+    __slots__ = ("play", "name", "action", "walls", "connect", "duration", "failures")
+
+    def __init__(self, play, name, action):
+        self.play = play
+        self.name = name
+        self.action = action
+        self.walls = []
+        self.connect = 0.0
+        self.duration = 0.0
+        self.failures = 0
+
+    @property
+    def runs(self):
+        return len(self.walls)
+
+    @property
+    def p50(self):
+        return percentile(self.walls, 50)
+
+    @property
+    def p95(self):
+        return percentile(self.walls, 95)
+
+    @property
+    def connect_share(self):
+        return self.connect / self.duration if self.duration else 0.0
+
+
+class HostStats:
+    """One host's per-run remote time, connection overhead and slowness against its peers"""
+
+    __slots__ = ("name", "totals", "connects", "first_contacts", "ratios", "slow_runs")
+
+    def __init__(self, name):
+        self.name = name
+        self.totals = []
+        self.connects = []
+        self.first_contacts = []
+        # Per run: median of (host duration / median duration of all hosts) over shared tasks
+        self.ratios = []
+        self.slow_runs = 0
+
+    @property
+    def runs(self):
+        return len(self.totals)
+
+    @property
+    def ratio(self):
+        return percentile(self.ratios, 50) if self.ratios else 1.0
+
+
+def _timing_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*.jsonl")))
+        else:
+            yield path
+
+
+def load_runs(paths, playbook=None, last=None):
+    """{run id: [records]} in the order the runs started, optionally only the last N"""
+    runs = {}
+    for path in _timing_files(paths):
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    raise ValueError(f"{path}:{number}: not a task_timings record")
+                if playbook and record.get("playbook") != playbook:
+                    continue
+                runs.setdefault(record["run"], []).append(record)
+    ordered = sorted(runs.items(), key=lambda item: min(record["start"] for record in item[1]))
+    return dict(ordered[-last:] if last else ordered)
+
+
+def run_label(records):
+    """Jenkins build number when the run came from Jenkins, else the run id"""
+    record = records[0]
+    return f"#{record['build']}" if record.get("build") else record["run"]
+
+
+def run_walls(records):
+    """{(play, task): wall time} for one run; a task takes as long as its slowest host"""
+    walls = {}
+    for record in records:
+        if record["status"] not in NOT_RUN:
+            key = (record["play"], record["task"])
+            walls[key] = max(walls.get(key, 0.0), record["duration"])
+    return walls
+
+
+def aggregate_tasks(runs):
+    """One TaskStats per (play, task), in the order the tasks first ran"""
+    stats = {}
+    for records in runs.values():
+        for record in records:
+            key = (record["play"], record["task"])
+            if key not in stats:
+                stats[key] = TaskStats(record["play"], record["task"], record["action"])
+            task = stats[key]
+            if record["status"] == "failed":
+                task.failures += 1
+            if record["status"] not in NOT_RUN:
+                task.connect += record.get("connect_seconds") or 0.0
+                task.duration += record["duration"]
+        for key, wall in run_walls(records).items():
+            stats[key].walls.append(wall)
+    return [task for task in stats.values() if task.walls]
+
+
+def aggregate_hosts(runs, slow_factor=1.25):
+    """One HostStats per host; a run counts as slow when the host's typical task took slow_factor x its peers'"""
+    stats = {}
+    for records in runs.values():
+        remote = [record for record in records if not record["local"] and record["status"] not in NOT_RUN]
+        by_task = {}
+        for record in remote:
+            by_task.setdefault((record["play"], record["task"]), {})[record["host"]] = record["duration"]
+
+        ratios = {}
+        for durations in by_task.values():
+            if len(durations) < 2:
+                continue
+            median = percentile(list(durations.values()), 50)
+            if median <= 0:
+                continue
+            for host, duration in durations.items():
+                ratios.setdefault(host, []).append(duration / median)
+
+        for host in sorted({record["host"] for record in remote}):
+            host_records = [record for record in remote if record["host"] == host]
+            host_stats = stats.setdefault(host, HostStats(host))
+            host_stats.totals.append(sum(record["duration"] for record in host_records))
+            host_stats.connects.extend(record.get("connect_seconds") or 0.0 for record in host_records
+                                       if not record["first_contact"])
+            host_stats.first_contacts.extend(record["duration"] for record in host_records if record["first_contact"])
+            if host in ratios:
+                ratio = percentile(ratios[host], 50)
+                host_stats.ratios.append(ratio)
+                host_stats.slow_runs += ratio >= slow_factor
+    return sorted(stats.values(), key=lambda host: host.name)
+
+
+def slow_hosts(hosts, consistency=0.75, min_runs=2):
+    """Hosts slower than their peers in at least `consistency` of the runs they were in"""
+    return [host for host in hosts
+            if host.ratios and host.slow_runs >= min(min_runs, len(host.ratios))
+            and host.slow_runs >= consistency * len(host.ratios)]
+
+
+def format_seconds(seconds):
+    """Short duration, e.g. 0.84s, 12.3s, 2m 05s"""
+    if seconds < 10:
+        return f"{seconds:.2f}s"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s"
+
+
+def build_report(runs, top=3, slow_factor=1.25, consistency=0.75):
+    tasks = aggregate_tasks(runs)
+    hosts = aggregate_hosts(runs, slow_factor)
+    totals = [sum(run_walls(records).values()) for records in runs.values()]
+    slowest = sorted(tasks, key=lambda task: -task.p95)[:top]
+    return {
+        "runs": [run_label(records) for records in runs.values()],
+        "run_p50": percentile(totals, 50),
+        "run_p95": percentile(totals, 95),
+        "tasks": [{"play": task.play, "task": task.name, "action": task.action, "runs": task.runs,
+                   "p50": task.p50, "p95": task.p95, "connect_share": task.connect_share,
+                   "failures": task.failures, "slow": task in slowest} for task in tasks],
+        "hosts": [{"host": host.name, "runs": host.runs, "total_p50": percentile(host.totals, 50),
+                   "connect_p50": percentile(host.connects, 50),
+                   "first_contact_p50": percentile(host.first_contacts, 50),
+                   "peer_ratio": host.ratio, "slow_runs": host.slow_runs}
+                  for host in hosts],
+        "slow_tasks": [task.name for task in slowest],
+        "slow_hosts": [host.name for host in slow_hosts(hosts, consistency)],
+    }
+
+
+def print_report(report):
+    tasks = sorted(report["tasks"], key=lambda task: -task["p95"])
+    total_p50 = sum(task["p50"] for task in tasks) or 1.0
+    runs = report["runs"]
+    print("=" * 50)
+    print(f"📊 {len(runs)} runs ({', '.join(runs[-5:])}{', ...' if len(runs) > 5 else ''}), "
+          f"playbook p50 {format_seconds(report['run_p50'])}, p95 {format_seconds(report['run_p95'])}")
+    print("=" * 50)
+
+    width = max((len(task["task"]) for task in tasks), default=4)
+    print(f"  {'task':<{width}}  {'runs':>4}  {'p50':>8}  {'p95':>8}  {'share':>5}  {'conn':>4}  fail")
+    for task in tasks:
+        marker = " 🐢" if task["slow"] else ""
+        print(f"  {task['task']:<{width}}  {task['runs']:>4}  {format_seconds(task['p50']):>8}  "
+              f"{format_seconds(task['p95']):>8}  {task['p50'] / total_p50:>5.0%}  "
+              f"{task['connect_share']:>4.0%}  {task['failures']}{marker}")
+
+    print()
+    width = max((len(host["host"]) for host in report["hosts"]), default=4)
+    print(f"  {'host':<{width}}  {'runs':>4}  {'total':>8}  {'conn/task':>9}  {'first':>8}  {'vs peers':>8}  slow")
+    for host in report["hosts"]:
+        marker = " ⚠️" if host["host"] in report["slow_hosts"] else ""
+        print(f"  {host['host']:<{width}}  {host['runs']:>4}  {format_seconds(host['total_p50']):>8}  "
+              f"{format_seconds(host['connect_p50']):>9}  {format_seconds(host['first_contact_p50']):>8}  "
+              f"{host['peer_ratio']:>7.2f}x  {host['slow_runs']}/{host['runs']}{marker}")
+
+    print()
+    print(f"🐢 Slowest tasks: {', '.join(report['slow_tasks']) or 'none'}")
+    if report["slow_hosts"]:
+        print(f"⚠️  Consistently slow hosts: {', '.join(report['slow_hosts'])} "
+              f"(check the bastion hop and the instances' network)")
+    else:
+        print("✅ No host is consistently slower than its peers")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Per-task and per-host timings across Ansible runs")
+    parser.add_argument("paths", nargs="+", metavar="FILE",
+                        help="task_timings JSONL files, or directories of *.jsonl")
+    parser.add_argument("--playbook", help="only runs of this playbook, e.g. playbook.yml")
+    parser.add_argument("--last", type=int, metavar="N", help="only the N most recent runs")
+    parser.add_argument("--top", type=int, default=3, help="how many of the slowest tasks to flag (default: 3)")
+    parser.add_argument("--slow-factor", type=float, default=1.25,
+                        help="a host is slow in a run when its typical task takes this many times its peers' "
+                             "(default: 1.25)")
+    parser.add_argument("--consistency", type=float, default=0.75,
+                        help="fraction of runs a host must be slow in to be flagged (default: 0.75)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ File not found: {', '.join(missing)}")
+        return 1
+    try:
+        runs = load_runs(args.paths, args.playbook, args.last)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if not runs:
+        print("❌ No task timings recorded yet")
+        return 1
+
+    report = build_report(runs, args.top, args.slow_factor, args.consistency)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
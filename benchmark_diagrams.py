@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Diagram Generator Benchmark Suite
+Times every create_* function across the diagram scripts, splits Python and Graphviz time,
+records peak RSS and compares against a stored JSON baseline
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_NODE_COUNTS = (3, 30, 300)
+
+# Scripts built on the diagrams library expose a DIAGRAMS list of DiagramSpec
+DIAGRAM_SCRIPTS = (
+    "create_architecture_diagrams",
+    "create_architecture_diagrams_fixed",
+    "create_simple_diagrams",
+    "create_working_diagrams",
+)
+
+# matplotlib scripts: module -> [(function, drawn from the topology)]
+FIGURE_SCRIPTS = {
+    "create_infrastructure_diagram": [
+        ("create_infrastructure_diagram", True),
+        ("create_jenkins_pipeline_diagram", False),
+    ],
+    "create_blue_ocean_flow": [
+        ("create_blue_ocean_flow", False),
+        ("create_pipeline_architecture", False),
+    ],
+}
+
+
+class BenchmarkCase:
+    """One create_* function run against a topology with a given number of Redis nodes"""
+
+    __slots__ = ("module", "function", "nodes")
+
+    def __init__(self, module, function, nodes=None):
+        self.module = module
+        self.function = function
+        self.nodes = nodes
+
+    @property
+    def key(self):
+        suffix = f"@{self.nodes}" if self.nodes else ""
+        return f"{self.module}:{self.function}{suffix}"
+
+
+def _uses_topology(spec):
+    from diagram_watch import TOPOLOGY_INPUTS
+    return any(item in spec.inputs for item in TOPOLOGY_INPUTS)
+
+
+def discover_cases(node_counts=DEFAULT_NODE_COUNTS, scripts=None):
+    """Every create_* function; topology-driven ones once per synthetic node count"""
+    cases = []
+    for module_name in DIAGRAM_SCRIPTS:
+        if scripts and module_name not in scripts:
+            continue
+        module = importlib.import_module(module_name)
+        for spec in module.DIAGRAMS:
+            counts = node_counts if _uses_topology(spec) else (None,)
+            cases.extend(BenchmarkCase(module_name, spec.builder.__name__, nodes) for nodes in counts)
+
+    for module_name, functions in FIGURE_SCRIPTS.items():
+        if scripts and module_name not in scripts:
+            continue
+        for function, scales in functions:
+            counts = node_counts if scales else (None,)
+            cases.extend(BenchmarkCase(module_name, function, nodes) for nodes in counts)
+    return cases
+
+
+def _graphviz_seconds():
+    cache = sys.modules.get("diagram_cache")
+    return cache.RENDER_STATS["graphviz_seconds"] if cache else 0.0
+
+
+def _run_once(builder):
+    """(python seconds, graphviz seconds, matplotlib render seconds) for one call"""
+    graphviz_before = _graphviz_seconds()
+    start = time.perf_counter()
+    figure = builder()
+    built = time.perf_counter()
+    graphviz = _graphviz_seconds() - graphviz_before
+
+    render = 0.0
+    if figure is not None:
+        # matplotlib builders return the figure; rasterise it the way the scripts save it
+        import matplotlib.pyplot as plt
+        figure.savefig(io.BytesIO(), format="png", dpi=100, bbox_inches="tight", facecolor="white")
+        render = time.perf_counter() - built
+        plt.close(figure)
+    return built - start - graphviz, graphviz, render
+
+
+def run_case(module_name, function, repeat):
+    """Run inside a fresh process so peak RSS belongs to this case alone"""
+    os.environ["DIAGRAM_CACHE"] = "0"
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    builder = getattr(importlib.import_module(module_name), function)
+
+    # First call pays imports and icon loading; it is reported separately
+    start = time.perf_counter()
+    _run_once(builder)
+    cold = time.perf_counter() - start
+
+    samples = [_run_once(builder) for _ in range(repeat)]
+    python, graphviz, render = (statistics.median(column) for column in zip(*samples))
+    return {
+        "seconds": python + graphviz + render,
+        "python_seconds": python,
+        "graphviz_seconds": graphviz,
+        "render_seconds": render,
+        "cold_seconds": cold,
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        "peak_rss_kb": _rss_kb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+        "graphviz_peak_rss_kb": _rss_kb(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss),
+    }
+
+
+def _rss_kb(value):
+    return value // 1024 if sys.platform == "darwin" else value
+
+
+def measure(case, repeat, workdir):
+    """Run one case in a child process with its own synthetic topology"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    env.pop("DIAGRAM_TFSTATE", None)
+    if case.nodes:
+        from topology import synthetic_topology_data
+        path = os.path.join(workdir, f"topology-{case.nodes}.json")
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                json.dump(synthetic_topology_data(case.nodes), f)
+        env["DIAGRAM_TOPOLOGY"] = path
+
+    command = [sys.executable, os.path.join(ROOT, "benchmark_diagrams.py"),
+               "--run-case", f"{case.module}:{case.function}", "--repeat", str(repeat)]
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = (completed.stderr or completed.stdout).strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit status {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Regressions as (key, metric, baseline, current, percent) beyond threshold percent"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or "error" in current or "error" in previous:
+            continue
+        # Tiny timings are mostly noise; only flag slowdowns larger than min_seconds too
+        slower = current["seconds"] - previous["seconds"]
+        if previous["seconds"] > 0 and slower > min_seconds:
+            percent = 100.0 * slower / previous["seconds"]
+            if percent > threshold:
+                regressions.append((key, "seconds", previous["seconds"], current["seconds"], percent))
+        grown = current["peak_rss_kb"] - previous["peak_rss_kb"]
+        if previous["peak_rss_kb"] > 0 and 100.0 * grown / previous["peak_rss_kb"] > threshold:
+            regressions.append((key, "peak_rss_kb", previous["peak_rss_kb"], current["peak_rss_kb"],
+                                100.0 * grown / previous["peak_rss_kb"]))
+    return regressions
+
+
+def _environment():
+    try:
+        from diagram_cache import graphviz_version
+        graphviz = graphviz_version()
+    except ImportError:
+        graphviz = "unavailable"
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count(), "graphviz": graphviz}
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": _environment(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_results(results):
+    width = max((len(key) for key in results), default=0)
+    print(f"   {'case':<{width}}  {'total':>8}  {'python':>8}  {'graphviz':>8}  {'render':>8}  {'peak RSS':>9}")
+    for key, result in results.items():
+        if "error" in result:
+            print(f"   ❌ {key:<{width - 2}}  {result['error']}")
+            continue
+        print(f"   {key:<{width}}  {result['seconds']:7.3f}s  {result['python_seconds']:7.3f}s  "
+              f"{result['graphviz_seconds']:7.3f}s  {result['render_seconds']:7.3f}s  "
+              f"{result['peak_rss_kb'] / 1024:7.1f}MB")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the create_* diagram generators")
+    parser.add_argument("--nodes", type=int, nargs="+", default=list(DEFAULT_NODE_COUNTS),
+                        help="synthetic Redis node counts for topology-driven diagrams (default: 3 30 300)")
+    parser.add_argument("--script", action="append", dest="scripts", metavar="MODULE",
+                        help="only benchmark this script, e.g. create_working_diagrams (repeatable)")
+    parser.add_argument("-k", dest="pattern", metavar="TEXT",
+                        help="only run cases whose key contains TEXT, e.g. network_topology@300")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per case after one warm-up run; the median is kept (default: 3)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, metavar="FILE",
+                        help="baseline JSON to compare against or write (default: benchmarks/baseline.json)")
+    parser.add_argument("--save", action="store_true",
+                        help="write the results as the new baseline instead of comparing")
+    parser.add_argument("--output", metavar="FILE", help="also write this run's results to FILE")
+    parser.add_argument("--threshold", type=float, default=20.0, metavar="PERCENT",
+                        help="fail when time or peak RSS grows by more than this (default: 20)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many seconds (default: 0.05)")
+    parser.add_argument("--list", action="store_true", help="list benchmark cases and exit")
+    parser.add_argument("--run-case", metavar="MODULE:FUNCTION", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.run_case:
+        module_name, function = args.run_case.split(":")
+        print(json.dumps(run_case(module_name, function, args.repeat)))
+        return 0
+
+    cases = discover_cases(tuple(args.nodes), args.scripts)
+    if args.pattern:
+        cases = [case for case in cases if args.pattern in case.key]
+    if args.list:
+        for case in cases:
+            print(case.key)
+        return 0
+
+    print(f"⏱️  Benchmarking {len(cases)} diagram cases ({args.repeat} timed runs each)...")
+    print("=" * 50)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="diagram-bench-") as workdir:
+        for case in cases:
+            results[case.key] = measure(case, args.repeat, workdir)
+            result = results[case.key]
+            status = "❌" if "error" in result else "✅"
+            seconds = "" if "error" in result else f" {result['seconds']:.3f}s"
+            print(f"   {status} {case.key}{seconds}", flush=True)
+
+    print()
+    print_results(results)
+    if args.output:
+        save_results(args.output, results)
+
+    errors = [key for key, result in results.items() if "error" in result]
+    if args.save:
+        save_results(args.baseline, results)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 1 if errors else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one")
+        return 1 if errors else 0
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline["results"], args.threshold, args.min_seconds)
+    for key, metric, before, after, percent in regressions:
+        print(f"❌ {key} {metric}: {before:.3f} → {after:.3f} (+{percent:.0f}%)")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0f}% "
+              f"(baseline from {baseline.get('created', 'unknown')})")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.threshold:.0f}% against {args.baseline}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    exit(main())
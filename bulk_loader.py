@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Redis Bulk Loader
+Streams JSONL or CSV records into the cluster as slot-grouped MSET / SET pipelines per node,
+with a bounded number of batches in flight so reading never outruns the nodes
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import time
+
+from redis_cluster import ClusterClient
+from redis_inventory import add_target_arguments, target_addresses
+from redis_protocol import RedisError, key_slot
+
+# Error replies worth retrying after a pause: the node is busy, loading or mid-failover
+RETRYABLE = frozenset(("LOADING", "BUSY", "TRYAGAIN", "CLUSTERDOWN", "MASTERDOWN"))
+
+
+def encode_value(value, value_format):
+    """Value bytes as app.js stores them (JSON.stringify) or, for raw, strings as they are"""
+    if value_format == "raw" and isinstance(value, str):
+        return value.encode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def parse_ttl(value):
+    """TTL in seconds (int, float or numeric string) -> milliseconds, None when empty"""
+    if value is None or value == "":
+        return None
+    milliseconds = int(round(float(value) * 1000))
+    if milliseconds <= 0:
+        raise ValueError(f"TTL must be positive, got {value!r}")
+    return milliseconds
+
+
+def read_jsonl(f, key_field="key", value_field="value", ttl_field="ttl"):
+    """Yield (line number, key, value, ttl) from JSON lines"""
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield number, record[key_field], record.get(value_field), record.get(ttl_field)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"line {number}: {e}")
+
+
+def read_csv(f, key_field="key", value_field="value", ttl_field="ttl"):
+    """Yield (line number, key, value, ttl) from CSV with a header row"""
+    reader = csv.DictReader(f)
+    if reader.fieldnames is None:
+        return
+    missing = {key_field, value_field} - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f"CSV header is missing {', '.join(sorted(missing))}")
+    for row in reader:
+        yield reader.line_num, row[key_field], row[value_field], row.get(ttl_field)
+
+
+def read_records(path, input_format=None, key_field="key", value_field="value", ttl_field="ttl"):
+    """(key bytes, value, ttl ms) from a JSONL/CSV file or '-' for stdin; the format follows the extension"""
+    input_format = input_format or ("csv" if path.endswith(".csv") else "jsonl")
+    reader = read_csv if input_format == "csv" else read_jsonl
+    if path == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        f = open(path, encoding="utf-8", newline="")
+    with f:
+        for number, key, value, ttl in reader(f, key_field, value_field, ttl_field):
+            if not isinstance(key, str) or not key:
+                raise ValueError(f"{path}:{number}: key must be a non-empty string")
+            try:
+                yield key.encode("utf-8"), value, parse_ttl(ttl)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}")
+
+
+def batch_commands(groups, mset_size=100):
+    """Commands for {slot: [(key, value, ttl ms)]}: MSET per slot for keys without TTL, SET PX for the rest"""
+    commands = []
+    for records in groups.values():
+        plain = []
+        for key, value, ttl in records:
+            if ttl is None:
+                plain.extend((key, value))
+            else:
+                commands.append((b"SET", key, value, b"PX", ttl))
+        for start in range(0, len(plain), 2 * mset_size):
+            chunk = plain[start:start + 2 * mset_size]
+            commands.append((b"SET", *chunk) if len(chunk) == 2 else (b"MSET", *chunk))
+    return commands
+
+
+def command_count(command):
+    """Keys written by a SET / MSET command"""
+    return 1 if command[0] == b"SET" else (len(command) - 1) // 2
+
+
+class LoadStats:
+    """Progress of a load"""
+
+    __slots__ = ("read", "written", "failed", "retried", "bytes", "batches", "started", "errors")
+
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.bytes = 0
+        self.batches = 0
+        self.started = time.monotonic()
+        self.errors = {}
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+    def error(self, message):
+        kind = message.split(" ", 1)[0]
+        if kind not in self.errors:
+            self.errors[kind] = [0, message]
+        self.errors[kind][0] += 1
+
+
+class BulkLoader:
+    """Buffers records per node and slot, flushing a node's buffer as one pipeline when it is full
+
+    At most `inflight` pipelines per node are outstanding; when a node is that far behind,
+    add() waits, which stops the reader, so memory stays bounded by nodes x inflight x batch.
+    """
+
+    def __init__(self, client, stats, batch=5000, mset_size=100, inflight=2, retries=5):
+        self.client = client
+        self.stats = stats
+        self.batch = batch
+        self.mset_size = mset_size
+        self.inflight = inflight
+        self.retries = retries
+        self.buffers = {}
+        self.sizes = {}
+        self.slots = {}
+        self.tasks = set()
+
+    def _slots(self, address):
+        semaphore = self.slots.get(address)
+        if semaphore is None:
+            semaphore = self.slots[address] = asyncio.Semaphore(self.inflight)
+        return semaphore
+
+    async def connect(self):
+        """Open every master's connections up front, so a flushed batch never waits for a connect"""
+        async def open_all(address):
+            pool = self.client.pool(address)
+            connections = [await pool.acquire() for _ in range(self.inflight)]
+            for connection in connections:
+                pool.release(connection)
+
+        await asyncio.gather(*(open_all(address) for address in self.client.masters))
+
+    async def add(self, key, value, ttl=None):
+        slot = key_slot(key)
+        address = self.client.owners[slot]
+        self.buffers.setdefault(address, {}).setdefault(slot, []).append((key, value, ttl))
+        self.sizes[address] = self.sizes.get(address, 0) + 1
+        self.stats.read += 1
+        self.stats.bytes += len(key) + len(value)
+        if self.sizes[address] >= self.batch:
+            await self._flush(address)
+
+    async def _flush(self, address):
+        groups = self.buffers.pop(address, None)
+        self.sizes.pop(address, None)
+        if not groups:
+            return
+        await self._slots(address).acquire()
+        task = asyncio.ensure_future(self._send(address, batch_commands(groups, self.mset_size)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        # Let the pipeline start writing now; otherwise the reader runs on until a semaphore blocks
+        await asyncio.sleep(0)
+
+    def _failed(self, commands, error):
+        for command in commands:
+            self.stats.failed += command_count(command)
+        self.stats.error(f"{type(error).__name__} {error}")
+
+    async def _send(self, address, commands):
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    replies = await self.client.pipeline(commands)
+                except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                    # The node may have failed over; reload the slot map and resend everything
+                    if attempt == self.retries:
+                        self._failed(commands, e)
+                        return
+                    self.stats.retried += len(commands)
+                    await asyncio.sleep(min(2.0, 0.1 * 2 ** attempt))
+                    try:
+                        await self.client.refresh()
+                    except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                        # No node answered CLUSTER SLOTS either: the cluster is unreachable
+                        self._failed(commands, e)
+                        return
+                    continue
+
+                retry = []
+                for command, reply in zip(commands, replies):
+                    if not isinstance(reply, RedisError):
+                        self.stats.written += command_count(command)
+                    elif reply.kind in RETRYABLE and attempt < self.retries:
+                        retry.append(command)
+                    else:
+                        self.stats.failed += command_count(command)
+                        self.stats.error(str(reply))
+                if not retry:
+                    break
+                self.stats.retried += len(retry)
+                commands = retry
+                await asyncio.sleep(min(2.0, 0.1 * 2 ** attempt))
+            self.stats.batches += 1
+        finally:
+            self._slots(address).release()
+
+    async def drain(self):
+        """Flush every buffer and wait for all pipelines"""
+        for address in list(self.buffers):
+            await self._flush(address)
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks))
+
+
+async def load(client, paths, args, stats):
+    loader = BulkLoader(client, stats, args.batch, args.mset_size, args.inflight, args.retries)
+    default_ttl = parse_ttl(args.ttl) if args.ttl else None
+    next_report = time.monotonic() + args.progress
+    await client.refresh()
+    await loader.connect()
+    print(f"📡 {len(client.masters)} masters, batches of {args.batch} keys, "
+          f"{args.inflight} in flight per node")
+    for path in paths:
+        for key, value, ttl in read_records(path, args.format, args.key_field, args.value_field, args.ttl_field):
+            await loader.add(key, encode_value(value, args.value_format), ttl or default_ttl)
+            if time.monotonic() >= next_report:
+                next_report += args.progress
+                print(f"  ⏱️  {stats.elapsed:>6.0f}s  {stats.written:>10} keys  {stats.rate:>9.0f} keys/s"
+                      + (f"  {stats.failed} failed" if stats.failed else ""))
+    await loader.drain()
+
+
+def print_summary(stats):
+    print("=" * 50)
+    print(f"📦 {stats.written} keys written ({stats.bytes / 2**20:.1f} MiB read) in {stats.elapsed:.1f}s: "
+          f"{stats.rate:.0f} keys/s over {stats.batches} pipelines")
+    if stats.retried:
+        print(f"🔁 {stats.retried} commands retried")
+    if stats.failed:
+        print(f"❌ {stats.failed} keys failed")
+        for kind, (count, message) in sorted(stats.errors.items(), key=lambda item: -item[1][0]):
+            print(f"  {count:>8}  {message}")
+    print("=" * 50)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load keys from JSONL or CSV into Redis with slot-grouped pipelines")
+    parser.add_argument("paths", nargs="+", metavar="FILE", help="JSONL or CSV files, '-' for stdin")
+    add_target_arguments(parser, "load into the cluster this node belongs to instead of the inventory")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="input format (default: from the extension)")
+    parser.add_argument("--key-field", default="key", help="field / column holding the key (default: key)")
+    parser.add_argument("--value-field", default="value", help="field / column holding the value (default: value)")
+    parser.add_argument("--ttl-field", default="ttl", help="field / column holding a TTL in seconds (default: ttl)")
+    parser.add_argument("--value-format", choices=("json", "raw"), default="json",
+                        help="json stores values JSON-encoded like POST /set/:key; raw stores strings as they are "
+                             "(default: json)")
+    parser.add_argument("--ttl", type=float, help="TTL in seconds for records without one")
+    parser.add_argument("--batch", type=int, default=5000, help="keys per pipeline per node (default: 5000)")
+    parser.add_argument("--mset-size", type=int, default=100, help="most keys per MSET (default: 100)")
+    parser.add_argument("--inflight", type=int, default=2, help="pipelines in flight per node (default: 2)")
+    parser.add_argument("--retries", type=int, default=5,
+                        help="retries for LOADING/BUSY/TRYAGAIN/CLUSTERDOWN replies and lost connections (default: 5)")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines (default: 5)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    print("📦 Redis bulk loader")
+    print("=" * 50)
+    try:
+        addresses = target_addresses(args)
+    except (OSError, KeyError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    # One connection per pipeline in flight
+    client = ClusterClient(addresses, max_connections=args.inflight)
+    stats = LoadStats()
+
+    async def run():
+        try:
+            await load(client, args.paths, args, stats)
+        finally:
+            await client.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; keys already acknowledged stay written")
+        print_summary(stats)
+        return 1
+    except (OSError, ValueError, ConnectionError, RedisError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        print_summary(stats)
+        return 1
+    print_summary(stats)
+    return 0 if not stats.failed else 1
+
+
+if __name__ == "__main__":
+    exit(main())
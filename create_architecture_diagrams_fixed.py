@@ -4,26 +4,34 @@ Redis Project Architecture Diagrams Generator
 Creates comprehensive architecture diagrams using Python diagrams library
 """
 
-from diagrams import Diagram, Cluster, Edge
-from diagrams.aws.compute import EC2
-from diagrams.aws.network import VPC, PublicSubnet, PrivateSubnet, InternetGateway, NATGateway
-from diagrams.aws.security import IAM
-from diagrams.aws.storage import EBS
-from diagrams.aws.general import Users, Internet
-from diagrams.onprem.vcs import Git, Github
-from diagrams.onprem.ci import Jenkins
-from diagrams.onprem.iac import Terraform, Ansible
-from diagrams.onprem.database import Redis
-from diagrams.onprem.client import Users as ClientUsers
-from diagrams.programming.language import Python, Nodejs
-from diagrams.onprem.monitoring import Grafana
-from diagrams.generic.blank import Blank
-from diagrams.generic.network import Firewall
-from diagrams.generic.storage import Storage
+from diagrams import Cluster, Edge
+# Provider icon classes are resolved lazily, on first use (see diagram_nodes.py)
+from diagram_nodes import (
+    EC2,
+    VPC, PublicSubnet, PrivateSubnet, InternetGateway, NATGateway, VPCPeering,
+    IAM,
+    EBS,
+    Users, Internet,
+    Git, Github,
+    Jenkins,
+    Terraform, Ansible,
+    Redis,
+    ClientUsers,
+    Python, Nodejs,
+    Grafana,
+    Blank,
+    Firewall,
+    Storage,
+)
 import os
+from diagram_cache import CachedDiagram as Diagram
+from diagram_renderer import DiagramSpec, run_cli
+from diagram_watch import ANSIBLE_INPUTS, PIPELINE_INPUTS, TOPOLOGY_INPUTS
+from topology import load_topology
 
 def create_infrastructure_architecture():
     """Create AWS Infrastructure Architecture Diagram"""
+    topology = load_topology()
     
     with Diagram("Redis Infrastructure Architecture", 
                  filename="redis_infrastructure_architecture", 
@@ -40,52 +48,54 @@ def create_infrastructure_architecture():
         users = Users("End Users")
         internet = Internet("Internet")
         
-        with Cluster("AWS Cloud (ap-south-1)"):
+        with Cluster(f"AWS Cloud ({topology.region})"):
             
-            with Cluster("Custom VPC (10.0.0.0/16)"):
+            with Cluster(f"Custom VPC ({topology.vpc_cidr})"):
                 igw = InternetGateway("Internet Gateway")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)"):
-                    bastion = EC2("Bastion Host\n(t3.micro)")
+                with Cluster(f"Public Subnet ({topology.public_subnet.cidr})"):
+                    bastion = EC2(f"{topology.bastion.title}\n({topology.bastion.instance_type})")
                     nat_gw = NATGateway("NAT Gateway")
-                    public_sg = Firewall("Public SG\nSSH:22, HTTP:80")
+                    public_sg = Firewall("Public SG\n" + topology.public_sg.ports_label())
                 
                 with Cluster("Private Subnets"):
-                    with Cluster("AZ-1a (10.0.2.0/24)"):
-                        redis1 = EC2("Redis Node 1\n(t3.micro)")
-                        redis1_db = Redis("Redis Instance\nPort: 6379")
-                        
-                    with Cluster("AZ-1b (10.0.3.0/24)"):
-                        redis2 = EC2("Redis Node 2\n(t3.micro)")
-                        redis2_db = Redis("Redis Instance\nPort: 6379")
-                        
-                    with Cluster("AZ-1c (10.0.4.0/24)"):
-                        redis3 = EC2("Redis Node 3\n(t3.micro)")
-                        redis3_db = Redis("Redis Instance\nPort: 6379")
+                    redis_hosts = []
+                    redis_dbs = []
+                    for subnet in topology.private_subnets:
+                        with Cluster(f"{subnet.az_label} ({subnet.cidr})"):
+                            for node in topology.nodes_in(subnet):
+                                redis_hosts.append(EC2(f"{node.title}\n({node.instance_type})"))
+                                redis_dbs.append(Redis(f"Redis Instance\nPort: {topology.redis_port}"))
                     
-                    private_sg = Firewall("Private SG\nRedis:6379\nCluster:16379-16384")
+                    private_sg = Firewall(f"Private SG\nRedis:{topology.redis_port}\nCluster:{topology.cluster_bus_label}")
                 
                 # Storage
                 ebs_volumes = EBS("EBS Volumes\nFor Data Persistence")
+            
+            # VPC Peering
+            peerings = [VPCPeering(f"VPC Peering\n{peering.peer}") for peering in topology.vpc_peerings]
         
         # Network Flow
         users >> Edge(label="HTTPS/SSH") >> internet
         internet >> Edge(label="Public Access") >> igw
         igw >> Edge(label="Route Traffic") >> bastion
-        bastion >> Edge(label="SSH Jump", style="dashed") >> [redis1, redis2, redis3]
-        nat_gw >> Edge(label="Internet Access") >> [redis1, redis2, redis3]
+        bastion >> Edge(label="SSH Jump", style="dashed") >> redis_hosts
+        nat_gw >> Edge(label="Internet Access") >> redis_hosts
         
         # Redis Cluster
-        redis1_db >> Edge(label="Cluster\nCommunication", style="dotted") >> redis2_db
-        redis2_db >> Edge(label="Cluster\nCommunication", style="dotted") >> redis3_db
-        redis3_db >> Edge(label="Cluster\nCommunication", style="dotted") >> redis1_db
+        for db, next_db in topology.cluster_ring(redis_dbs):
+            db >> Edge(label="Cluster\nCommunication", style="dotted") >> next_db
         
         # Security Groups
         public_sg >> Edge(label="Controls") >> bastion
-        private_sg >> Edge(label="Controls") >> [redis1, redis2, redis3]
+        private_sg >> Edge(label="Controls") >> redis_hosts
         
         # Storage
-        [redis1, redis2, redis3] >> Edge(label="Data Storage") >> ebs_volumes
+        redis_hosts >> Edge(label="Data Storage") >> ebs_volumes
+        
+        # Cross-VPC Access
+        for peering in peerings:
+            peering >> Edge(label="Cross-VPC Access", style="dashed") >> redis_hosts
 
 def create_cicd_pipeline_architecture():
     """Create CI/CD Pipeline Architecture Diagram"""
@@ -162,6 +172,7 @@ def create_cicd_pipeline_architecture():
 
 def create_detailed_pipeline_flow():
     """Create Detailed Pipeline Flow Diagram"""
+    topology = load_topology()
     
     with Diagram("Detailed Jenkins Pipeline Flow", 
                  filename="detailed_pipeline_flow", 
@@ -217,7 +228,7 @@ def create_detailed_pipeline_flow():
         # AWS Resources Created
         with Cluster("AWS Resources Created"):
             vpc_created = VPC("VPC & Subnets")
-            ec2_created = EC2("4 EC2 Instances")
+            ec2_created = EC2(f"{topology.instance_count} EC2 Instances")
             sg_created = Firewall("Security Groups")
             redis_deployed = Redis("Redis Cluster")
         
@@ -254,6 +265,7 @@ def create_detailed_pipeline_flow():
 
 def create_network_topology():
     """Create Network Topology Diagram"""
+    topology = load_topology()
     
     with Diagram("Network Topology & Security", 
                  filename="network_topology", 
@@ -269,36 +281,31 @@ def create_network_topology():
         # External Network
         internet = Internet("Internet")
         
-        with Cluster("AWS VPC (10.0.0.0/16)"):
+        with Cluster(f"AWS VPC ({topology.vpc_cidr})"):
             igw = InternetGateway("Internet Gateway")
             
             # Public Network
-            with Cluster("Public Network (10.0.1.0/24)"):
+            with Cluster(f"Public Network ({topology.public_subnet.cidr})"):
                 public_rt = Blank("Public Route Table")
-                bastion_host = EC2("Bastion Host\n10.0.1.x")
-                nat_gateway = NATGateway("NAT Gateway\n10.0.1.y")
+                bastion_host = EC2(f"{topology.bastion.title}\n{topology.bastion.address}")
+                nat_gateway = NATGateway(f"NAT Gateway\n{topology.public_subnet.host_pattern}")
                 
                 with Cluster("Public Security Group"):
-                    pub_sg_rules = Firewall("Rules:\nSSH (22) - 0.0.0.0/0\nHTTP (80) - 0.0.0.0/0\nICMP - All")
+                    pub_sg_rules = Firewall("Rules:\n" + topology.public_sg.rules_label())
             
             # Private Networks
             with Cluster("Private Networks"):
                 private_rt = Blank("Private Route Table")
                 
-                with Cluster("Redis Node 1 (AZ-1a)"):
-                    redis_node1 = EC2("Redis Node 1\n10.0.2.x")
-                    redis_svc1 = Redis("Redis:6379\nCluster:16379-16384")
-                
-                with Cluster("Redis Node 2 (AZ-1b)"):
-                    redis_node2 = EC2("Redis Node 2\n10.0.3.x")
-                    redis_svc2 = Redis("Redis:6379\nCluster:16379-16384")
-                
-                with Cluster("Redis Node 3 (AZ-1c)"):
-                    redis_node3 = EC2("Redis Node 3\n10.0.4.x")
-                    redis_svc3 = Redis("Redis:6379\nCluster:16379-16384")
+                redis_nodes = []
+                redis_svcs = []
+                for node in topology.redis_nodes:
+                    with Cluster(f"{node.title} ({node.subnet.az_label})"):
+                        redis_nodes.append(EC2(f"{node.title}\n{node.address}"))
+                        redis_svcs.append(Redis(f"Redis:{topology.redis_port}\nCluster:{topology.cluster_bus_label}"))
                 
                 with Cluster("Private Security Group"):
-                    priv_sg_rules = Firewall("Rules:\nRedis (6379) - 0.0.0.0/0\nCluster (16379-16384) - 0.0.0.0/0\nSSH (22) - VPC CIDR\nICMP - VPC CIDR")
+                    priv_sg_rules = Firewall("Rules:\n" + topology.private_sg.rules_label())
         
         # Network Flow
         internet >> Edge(label="Public Traffic") >> igw
@@ -306,19 +313,18 @@ def create_network_topology():
         public_rt >> Edge(label="Direct") >> bastion_host
         public_rt >> Edge(label="Direct") >> nat_gateway
         
-        bastion_host >> Edge(label="SSH Jump\n(Port 22)", style="dashed", color="red") >> [redis_node1, redis_node2, redis_node3]
+        bastion_host >> Edge(label="SSH Jump\n(Port 22)", style="dashed", color="red") >> redis_nodes
         
         nat_gateway >> Edge(label="Internet Access") >> private_rt
-        private_rt >> Edge(label="Route") >> [redis_node1, redis_node2, redis_node3]
+        private_rt >> Edge(label="Route") >> redis_nodes
         
         # Redis Cluster Communication
-        redis_svc1 >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis_svc2
-        redis_svc2 >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis_svc3
-        redis_svc3 >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis_svc1
+        for svc, next_svc in topology.cluster_ring(redis_svcs):
+            svc >> Edge(label="Cluster Sync", style="dotted", color="blue") >> next_svc
         
         # Security Group Application
         pub_sg_rules >> Edge(label="Applied to") >> bastion_host
-        priv_sg_rules >> Edge(label="Applied to") >> [redis_node1, redis_node2, redis_node3]
+        priv_sg_rules >> Edge(label="Applied to") >> redis_nodes
 
 def create_deployment_workflow():
     """Create Deployment Workflow Diagram"""
@@ -391,6 +397,7 @@ def create_deployment_workflow():
 
 def create_project_overview():
     """Create Project Overview Diagram"""
+    topology = load_topology()
     
     with Diagram("Redis Project Overview", 
                  filename="redis_project_overview", 
@@ -437,13 +444,9 @@ def create_project_overview():
         
         # Target Infrastructure
         with Cluster("Deployed Infrastructure"):
-            aws_vpc = VPC("AWS VPC\n(ap-south-1)")
-            bastion_server = EC2("Bastion Host\n(Public)")
-            redis_cluster_nodes = [
-                Redis("Redis Node 1\n(Private)"),
-                Redis("Redis Node 2\n(Private)"),
-                Redis("Redis Node 3\n(Private)")
-            ]
+            aws_vpc = VPC(f"AWS VPC\n({topology.region})")
+            bastion_server = EC2(f"{topology.bastion.title}\n(Public)")
+            redis_cluster_nodes = [Redis(f"{node.title}\n(Private)") for node in topology.redis_nodes]
         
         # Relationships
         github_repo >> Edge(label="Contains") >> [terraform_code, ansible_code, jenkins_pipeline, python_tools]
@@ -460,64 +463,32 @@ def create_project_overview():
         
         ansible_code >> Edge(label="Configures") >> redis_cluster_nodes
 
-def main():
+DIAGRAMS = [
+    DiagramSpec("infrastructure", create_infrastructure_architecture, "redis_infrastructure_architecture.png",
+                "AWS resources and network topology",
+                inputs=TOPOLOGY_INPUTS),
+    DiagramSpec("cicd", create_cicd_pipeline_architecture, "cicd_pipeline_architecture.png",
+                "Jenkins pipeline and tool integration",
+                inputs=PIPELINE_INPUTS),
+    DiagramSpec("pipeline-flow", create_detailed_pipeline_flow, "detailed_pipeline_flow.png",
+                "Step-by-step pipeline execution",
+                inputs=PIPELINE_INPUTS + TOPOLOGY_INPUTS),
+    DiagramSpec("network", create_network_topology, "network_topology.png",
+                "Security groups and network flow",
+                inputs=TOPOLOGY_INPUTS),
+    DiagramSpec("deployment", create_deployment_workflow, "deployment_workflow.png",
+                "End-to-end deployment process",
+                inputs=PIPELINE_INPUTS + ANSIBLE_INPUTS),
+    DiagramSpec("overview", create_project_overview, "redis_project_overview.png",
+                "Complete project structure and components",
+                inputs=TOPOLOGY_INPUTS + PIPELINE_INPUTS + ANSIBLE_INPUTS),
+]
+
+def main(argv=None):
     """Generate all architecture diagrams"""
     
-    print("🎨 Creating Redis Project Architecture Diagrams...")
-    print("=" * 50)
-    
-    try:
-        print("1. Creating Infrastructure Architecture Diagram...")
-        create_infrastructure_architecture()
-        print("   ✅ redis_infrastructure_architecture.png created")
-        
-        print("2. Creating CI/CD Pipeline Architecture Diagram...")
-        create_cicd_pipeline_architecture()
-        print("   ✅ cicd_pipeline_architecture.png created")
-        
-        print("3. Creating Detailed Pipeline Flow Diagram...")
-        create_detailed_pipeline_flow()
-        print("   ✅ detailed_pipeline_flow.png created")
-        
-        print("4. Creating Network Topology Diagram...")
-        create_network_topology()
-        print("   ✅ network_topology.png created")
-        
-        print("5. Creating Deployment Workflow Diagram...")
-        create_deployment_workflow()
-        print("   ✅ deployment_workflow.png created")
-        
-        print("6. Creating Project Overview Diagram...")
-        create_project_overview()
-        print("   ✅ redis_project_overview.png created")
-        
-        print("\n🎉 All architecture diagrams created successfully!")
-        print("\nGenerated Files:")
-        print("- redis_infrastructure_architecture.png")
-        print("- cicd_pipeline_architecture.png") 
-        print("- detailed_pipeline_flow.png")
-        print("- network_topology.png")
-        print("- deployment_workflow.png")
-        print("- redis_project_overview.png")
-        
-        print("\n📋 Diagram Descriptions:")
-        print("1. Infrastructure Architecture: AWS resources and network topology")
-        print("2. CI/CD Pipeline Architecture: Jenkins pipeline and tool integration")
-        print("3. Detailed Pipeline Flow: Step-by-step pipeline execution")
-        print("4. Network Topology: Security groups and network flow")
-        print("5. Deployment Workflow: End-to-end deployment process")
-        print("6. Project Overview: Complete project structure and components")
-        
-    except Exception as e:
-        print(f"❌ Error creating diagrams: {str(e)}")
-        print("Make sure you have the 'diagrams' library installed:")
-        print("pip install diagrams")
-        print("And Graphviz system dependency:")
-        print("brew install graphviz  # macOS")
-        print("sudo apt-get install graphviz  # Ubuntu/Debian")
-        return 1
-    
-    return 0
+    # The topology is parsed once in the parent so forked render workers inherit it
+    return run_cli("Creating Redis Project Architecture Diagrams", DIAGRAMS, argv, setup=load_topology)
 
 if __name__ == "__main__":
     exit(main())
@@ -5,11 +5,27 @@ Creates a detailed Blue Ocean pipeline visualization
 """
 
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import FancyBboxPatch, Circle, Rectangle
+from matplotlib.patches import FancyBboxPatch, Rectangle
 import numpy as np
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from jenkins_stage_stats import aggregate_stages, build_summary, flow_stages, format_duration, load_builds
+from pipeline_render import draw_arrows, draw_boxes, draw_pipeline, heat_colors
+from topology import load_topology
 
-def create_blue_ocean_flow():
+DEFAULT_STAGES = [
+    {'name': 'SCM', 'status': 'success', 'time': '15s'},
+    {'name': 'Validate', 'status': 'success', 'time': '30s'},
+    {'name': 'Plan', 'status': 'success', 'time': '45s'},
+    {'name': 'Deploy', 'status': 'running', 'time': '2m 30s'},
+    {'name': 'Configure', 'status': 'pending', 'time': '--'},
+    {'name': 'Test', 'status': 'pending', 'time': '--'}
+]
+
+def create_blue_ocean_flow(stages=None, summary=None):
+    """Blue Ocean pipeline view; stages from jenkins_stage_stats.flow_stages() are drawn as a p95 heatmap"""
+    topology = load_topology()
+    
     # Create figure
     fig, ax = plt.subplots(1, 1, figsize=(18, 12))
     ax.set_xlim(0, 18)
@@ -45,51 +61,13 @@ def create_blue_ocean_flow():
     ax.text(1, 10, 'Jenkins Blue Ocean', fontsize=14, fontweight='bold', color='white')
     ax.text(16, 10, 'Redis-Infrastructure-Pipeline', fontsize=12, ha='right', color='white')
     
-    # Pipeline stages with Blue Ocean styling
-    stages_data = [
-        {'name': 'SCM', 'status': 'success', 'time': '15s', 'x': 2},
-        {'name': 'Validate', 'status': 'success', 'time': '30s', 'x': 4.5},
-        {'name': 'Plan', 'status': 'success', 'time': '45s', 'x': 7},
-        {'name': 'Deploy', 'status': 'running', 'time': '2m 30s', 'x': 9.5},
-        {'name': 'Configure', 'status': 'pending', 'time': '--', 'x': 12},
-        {'name': 'Test', 'status': 'pending', 'time': '--', 'x': 14.5}
-    ]
-    
-    status_colors = {
-        'success': success_green,
-        'running': warning_orange,
-        'pending': '#E0E0E0',
-        'failed': error_red
-    }
-    
-    # Draw pipeline flow
-    for i, stage in enumerate(stages_data):
-        x = stage['x']
-        color = status_colors[stage['status']]
-        
-        # Stage circle
-        circle = Circle((x, 7.5), 0.4, facecolor=color, edgecolor='white', linewidth=3)
-        ax.add_patch(circle)
-        
-        # Stage status icon
-        if stage['status'] == 'success':
-            ax.text(x, 7.5, '✓', fontsize=16, ha='center', va='center', color='white', fontweight='bold')
-        elif stage['status'] == 'running':
-            ax.text(x, 7.5, '⟳', fontsize=16, ha='center', va='center', color='white', fontweight='bold')
-        elif stage['status'] == 'failed':
-            ax.text(x, 7.5, '✗', fontsize=16, ha='center', va='center', color='white', fontweight='bold')
-        
-        # Stage name
-        ax.text(x, 6.8, stage['name'], fontsize=11, fontweight='bold', ha='center', color='black')
-        
-        # Stage time
-        ax.text(x, 6.4, stage['time'], fontsize=9, ha='center', color='gray')
-        
-        # Connection line to next stage
-        if i < len(stages_data) - 1:
-            next_x = stages_data[i+1]['x']
-            line_color = color if stage['status'] == 'success' else '#E0E0E0'
-            ax.plot([x + 0.4, next_x - 0.4], [7.5, 7.5], color=line_color, linewidth=4)
+    # Stage markers, status icons and connectors are drawn as batched collections,
+    # so long pipelines cost about the same as the six-stage default
+    stages = stages or DEFAULT_STAGES
+    heatmap = all('p95' in stage for stage in stages)
+    p95 = np.array([stage.get('p95', 0.0) for stage in stages], dtype=float)
+    stage_x = draw_pipeline(ax, stages, 7.5, left=2, right=14.5,
+                            colors=heat_colors(p95) if heatmap else None)
     
     # Parallel execution visualization
     ax.text(9, 5.8, 'Parallel Execution Details', fontsize=14, fontweight='bold', ha='center', color=jenkins_blue)
@@ -123,7 +101,7 @@ def create_blue_ocean_flow():
     ax.add_patch(current_box)
     ax.text(1.5, 3.9, 'Currently Executing: Deploy Stage', fontsize=12, fontweight='bold', color=warning_orange)
     ax.text(1.5, 3.6, '• Creating VPC and subnets across multiple AZs', fontsize=10, color='black')
-    ax.text(1.5, 3.3, '• Provisioning EC2 instances (1 bastion + 3 Redis nodes)', fontsize=10, color='black')
+    ax.text(1.5, 3.3, f'• Provisioning EC2 instances (1 bastion + {len(topology.redis_nodes)} Redis nodes)', fontsize=10, color='black')
     ax.text(1.5, 3.0, '• Configuring security groups and network ACLs', fontsize=10, color='black')
     
     # Pipeline metrics
@@ -134,9 +112,15 @@ def create_blue_ocean_flow():
                                  linewidth=2)
     ax.add_patch(metrics_box)
     ax.text(1.5, 2.4, 'Pipeline Metrics', fontsize=12, fontweight='bold', color='#9C27B0')
-    ax.text(1.5, 2.1, '• Build #47 | Duration: 4m 23s', fontsize=10, color='black')
-    ax.text(1.5, 1.8, '• Success Rate: 94% (47/50)', fontsize=10, color='black')
-    ax.text(1.5, 1.5, '• Avg Duration: 3m 45s', fontsize=10, color='black')
+    if summary:
+        rate = summary['succeeded'] / summary['builds'] if summary['builds'] else 0.0
+        ax.text(1.5, 2.1, f"• Builds analysed: {summary['builds']}", fontsize=10, color='black')
+        ax.text(1.5, 1.8, f"• Success Rate: {rate:.0%} ({summary['succeeded']}/{summary['builds']})", fontsize=10, color='black')
+        ax.text(1.5, 1.5, f"• Duration p50: {format_duration(summary['p50'])} | p95: {format_duration(summary['p95'])}", fontsize=10, color='black')
+    else:
+        ax.text(1.5, 2.1, '• Build #47 | Duration: 4m 23s', fontsize=10, color='black')
+        ax.text(1.5, 1.8, '• Success Rate: 94% (47/50)', fontsize=10, color='black')
+        ax.text(1.5, 1.5, '• Avg Duration: 3m 45s', fontsize=10, color='black')
     
     # Environment info
     env_box = FancyBboxPatch((10, 1.5), 7, 1.2, 
@@ -146,16 +130,30 @@ def create_blue_ocean_flow():
                              linewidth=2)
     ax.add_patch(env_box)
     ax.text(10.5, 2.4, 'Environment Details', fontsize=12, fontweight='bold', color='#0277BD')
-    ax.text(10.5, 2.1, '• Region: ap-south-1 (Mumbai)', fontsize=10, color='black')
-    ax.text(10.5, 1.8, '• Instance Type: t3.micro', fontsize=10, color='black')
+    ax.text(10.5, 2.1, f'• Region: {topology.region}', fontsize=10, color='black')
+    ax.text(10.5, 1.8, f'• Instance Type: {topology.bastion.instance_type}', fontsize=10, color='black')
     ax.text(10.5, 1.5, '• Key Pair: redis-infra-key', fontsize=10, color='black')
     
-    # Progress bar for current stage
-    progress_bg = Rectangle((8.5, 8.2), 2, 0.2, facecolor='#E0E0E0', edgecolor='none')
-    ax.add_patch(progress_bg)
-    progress_fill = Rectangle((8.5, 8.2), 1.4, 0.2, facecolor=warning_orange, edgecolor='none')
-    ax.add_patch(progress_fill)
-    ax.text(9.5, 8.6, '70% Complete', fontsize=9, ha='center', color=warning_orange, fontweight='bold')
+    # Heatmap legend and the stage that dominates pipeline latency
+    running = [i for i, stage in enumerate(stages) if stage['status'] == 'running']
+    if heatmap:
+        slowest = int(np.argmax(p95))
+        share = stages[slowest]['p50'] / (sum(stage['p50'] for stage in stages) or 1.0)
+        ax.text(2, 8.6, f"Slowest stage: {stages[slowest]['name']} "
+                        f"(p95 {format_duration(p95[slowest])}, {share:.0%} of median stage time)",
+                fontsize=11, fontweight='bold', color=error_red)
+        legend = ax.inset_axes([0.62, 0.71, 0.2, 0.012])
+        fig.colorbar(ScalarMappable(Normalize(0, p95.max() / 60000.0 or 1.0), cmap='YlOrRd'),
+                     cax=legend, orientation='horizontal')
+        legend.set_title('stage p95 (minutes)', fontsize=8, color='gray')
+        legend.tick_params(labelsize=7, colors='gray')
+    elif running:
+        run_x = stage_x[running[0]]
+        progress_bg = Rectangle((run_x - 1, 8.2), 2, 0.2, facecolor='#E0E0E0', edgecolor='none')
+        ax.add_patch(progress_bg)
+        progress_fill = Rectangle((run_x - 1, 8.2), 1.4, 0.2, facecolor=warning_orange, edgecolor='none')
+        ax.add_patch(progress_fill)
+        ax.text(run_x, 8.6, '70% Complete', fontsize=9, ha='center', color=warning_orange, fontweight='bold')
     
     plt.tight_layout()
     return fig
@@ -180,13 +178,12 @@ def create_pipeline_architecture():
         {'name': 'AWS\nInfrastructure', 'x': 14, 'y': 7, 'color': '#FF9900'}
     ]
     
+    comp_x = np.array([comp['x'] for comp in components], dtype=float)
+    comp_y = np.array([comp['y'] for comp in components], dtype=float)
+    draw_boxes(ax, comp_x - 0.8, comp_y - 0.6, 1.6, 1.2,
+               facecolors=[comp['color'] for comp in components],
+               edgecolors='white', linewidth=2, pad=0.1)
     for comp in components:
-        box = FancyBboxPatch((comp['x']-0.8, comp['y']-0.6), 1.6, 1.2, 
-                             boxstyle="round,pad=0.1", 
-                             facecolor=comp['color'], 
-                             edgecolor='white',
-                             linewidth=2)
-        ax.add_patch(box)
         ax.text(comp['x'], comp['y'], comp['name'], fontsize=11, fontweight='bold', 
                 ha='center', va='center', color='white')
     
@@ -199,9 +196,9 @@ def create_pipeline_architecture():
         {'from': (10.8, 6.5), 'to': (13.2, 6.8), 'label': 'Server\nConfiguration'}
     ]
     
+    draw_arrows(ax, [arrow['from'] for arrow in arrows], [arrow['to'] for arrow in arrows],
+                color='#333', linewidth=2)
     for arrow in arrows:
-        ax.annotate('', xy=arrow['to'], xytext=arrow['from'], 
-                    arrowprops=dict(arrowstyle='->', color='#333', lw=2))
         mid_x = (arrow['from'][0] + arrow['to'][0]) / 2
         mid_y = (arrow['from'][1] + arrow['to'][1]) / 2 + 0.3
         ax.text(mid_x, mid_y, arrow['label'], fontsize=9, ha='center', 
@@ -233,9 +230,23 @@ def create_pipeline_architecture():
     return fig
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Jenkins Blue Ocean flow and pipeline architecture diagrams")
+    parser.add_argument("--wfapi", nargs="+", metavar="PATH",
+                        help="Jenkins wfapi/describe or wfapi/runs JSON exports (files or directories); "
+                             "draws per-stage p50/p95/p99 durations across the builds as a heatmap")
+    args = parser.parse_args()
+
+    stages = summary = None
+    if args.wfapi:
+        builds = load_builds(args.wfapi)
+        stages = flow_stages(aggregate_stages(builds))
+        summary = build_summary(builds)
+        print(f"Loaded {len(builds)} builds, {len(stages)} stages")
+
     # Create Blue Ocean flow diagram
     print("Creating Blue Ocean flow diagram...")
-    flow_fig = create_blue_ocean_flow()
+    flow_fig = create_blue_ocean_flow(stages, summary)
     flow_fig.savefig('/Users/shivam1355/Desktop/New_Redis/jenkins_blue_ocean_flow.png', 
                      dpi=300, bbox_inches='tight', facecolor='white')
     print("Blue Ocean flow diagram saved as 'jenkins_blue_ocean_flow.png'")
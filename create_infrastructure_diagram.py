@@ -8,8 +8,11 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.patches import FancyBboxPatch, ConnectionPatch
 import numpy as np
+from topology import load_topology
 
 def create_infrastructure_diagram():
+    topology = load_topology()
+    
     # Create figure and axis
     fig, ax = plt.subplots(1, 1, figsize=(16, 12))
     ax.set_xlim(0, 16)
@@ -37,7 +40,7 @@ def create_infrastructure_diagram():
                                edgecolor=aws_orange, 
                                linewidth=3)
     ax.add_patch(aws_cloud)
-    ax.text(1, 10.2, 'AWS Cloud (ap-south-1)', fontsize=12, fontweight='bold', color=aws_orange)
+    ax.text(1, 10.2, f'AWS Cloud ({topology.region})', fontsize=12, fontweight='bold', color=aws_orange)
     
     # VPC
     vpc_box = FancyBboxPatch((1, 1.5), 14, 8.5, 
@@ -46,7 +49,7 @@ def create_infrastructure_diagram():
                              edgecolor=vpc_blue, 
                              linewidth=2)
     ax.add_patch(vpc_box)
-    ax.text(1.5, 9.7, 'Custom VPC (10.0.0.0/16)', fontsize=12, fontweight='bold', color=vpc_blue)
+    ax.text(1.5, 9.7, f'Custom VPC ({topology.vpc_cidr})', fontsize=12, fontweight='bold', color=vpc_blue)
     
     # Internet Gateway
     igw_box = FancyBboxPatch((7.5, 9), 1.5, 0.8, 
@@ -63,7 +66,7 @@ def create_infrastructure_diagram():
                                    edgecolor=public_green, 
                                    linewidth=2)
     ax.add_patch(public_subnet)
-    ax.text(2.5, 8.5, 'Public Subnet (10.0.1.0/24)', fontsize=11, fontweight='bold', color=public_green)
+    ax.text(2.5, 8.5, f'Public Subnet ({topology.public_subnet.cidr})', fontsize=11, fontweight='bold', color=public_green)
     
     # Bastion Host
     bastion_box = FancyBboxPatch((3, 7.3), 2, 1.2, 
@@ -71,8 +74,8 @@ def create_infrastructure_diagram():
                                  facecolor='white', 
                                  edgecolor='black')
     ax.add_patch(bastion_box)
-    ax.text(4, 8.1, 'Bastion Host', fontsize=10, fontweight='bold', ha='center')
-    ax.text(4, 7.8, 'EC2 t3.micro', fontsize=9, ha='center', color='gray')
+    ax.text(4, 8.1, topology.bastion.title, fontsize=10, fontweight='bold', ha='center')
+    ax.text(4, 7.8, f'EC2 {topology.bastion.instance_type}', fontsize=9, ha='center', color='gray')
     ax.text(4, 7.5, 'Public IP', fontsize=9, ha='center', color=public_green)
     
     # NAT Gateway
@@ -84,32 +87,38 @@ def create_infrastructure_diagram():
     ax.text(12, 8.1, 'NAT Gateway', fontsize=10, fontweight='bold', ha='center', color='white')
     ax.text(12, 7.8, 'Elastic IP', fontsize=9, ha='center', color='white')
     
-    # Private Subnets
-    subnet_positions = [(2, 4.5), (6, 4.5), (10, 4.5)]
-    subnet_azs = ['ap-south-1a', 'ap-south-1b', 'ap-south-1c']
-    subnet_cidrs = ['10.0.2.0/24', '10.0.3.0/24', '10.0.4.0/24']
+    # Private Subnets, spread evenly across the VPC width
+    private_subnets = topology.private_subnets
+    slot_width = 12 / len(private_subnets)
+    subnet_width = slot_width - 0.5
+    subnet_positions = [(2 + i * slot_width, 4.5) for i in range(len(private_subnets))]
     
-    for i, (x, y) in enumerate(subnet_positions):
+    for subnet, (x, y) in zip(private_subnets, subnet_positions):
         # Private subnet box
-        private_subnet = FancyBboxPatch((x, y), 3.5, 2.5, 
+        private_subnet = FancyBboxPatch((x, y), subnet_width, 2.5, 
                                         boxstyle="round,pad=0.1", 
                                         facecolor='#FFE8E8', 
                                         edgecolor=private_red, 
                                         linewidth=2)
         ax.add_patch(private_subnet)
         ax.text(x + 0.2, y + 2.2, f'Private Subnet', fontsize=10, fontweight='bold', color=private_red)
-        ax.text(x + 0.2, y + 1.9, f'{subnet_cidrs[i]}', fontsize=9, color=private_red)
-        ax.text(x + 0.2, y + 1.6, f'{subnet_azs[i]}', fontsize=9, color='gray')
+        ax.text(x + 0.2, y + 1.9, f'{subnet.cidr}', fontsize=9, color=private_red)
+        ax.text(x + 0.2, y + 1.6, f'{subnet.az}', fontsize=9, color='gray')
         
-        # Redis Node
-        redis_box = FancyBboxPatch((x + 0.5, y + 0.3), 2.5, 1.2, 
+        # Redis Node(s)
+        nodes = topology.nodes_in(subnet)
+        if not nodes:
+            continue
+        node_label = nodes[0].title if len(nodes) == 1 else f'{len(nodes)} Redis Nodes'
+        redis_box = FancyBboxPatch((x + 0.5, y + 0.3), subnet_width - 1, 1.2, 
                                    boxstyle="round,pad=0.05", 
                                    facecolor='#FF6B6B', 
                                    edgecolor='black')
         ax.add_patch(redis_box)
-        ax.text(x + 1.75, y + 1.1, f'Redis Node {i+1}', fontsize=10, fontweight='bold', ha='center', color='white')
-        ax.text(x + 1.75, y + 0.8, 'EC2 t3.micro', fontsize=9, ha='center', color='white')
-        ax.text(x + 1.75, y + 0.5, 'Port: 6379', fontsize=9, ha='center', color='white')
+        center = x + subnet_width / 2
+        ax.text(center, y + 1.1, node_label, fontsize=10, fontweight='bold', ha='center', color='white')
+        ax.text(center, y + 0.8, f'EC2 {nodes[0].instance_type}', fontsize=9, ha='center', color='white')
+        ax.text(center, y + 0.5, f'Port: {topology.redis_port}', fontsize=9, ha='center', color='white')
     
     # Security Groups
     sg_box = FancyBboxPatch((1.5, 2), 4, 1.8, 
@@ -120,8 +129,8 @@ def create_infrastructure_diagram():
     ax.add_patch(sg_box)
     ax.text(2, 3.5, 'Security Groups', fontsize=11, fontweight='bold', color=security_purple)
     ax.text(2, 3.1, '• Public SG: SSH(22), HTTP(80)', fontsize=9, color='black')
-    ax.text(2, 2.8, '• Private SG: Redis(6379)', fontsize=9, color='black')
-    ax.text(2, 2.5, '• Cluster: 16379-16384', fontsize=9, color='black')
+    ax.text(2, 2.8, f'• Private SG: Redis({topology.redis_port})', fontsize=9, color='black')
+    ax.text(2, 2.5, f'• Cluster: {topology.cluster_bus_label}', fontsize=9, color='black')
     ax.text(2, 2.2, '• SSH access via Bastion', fontsize=9, color='black')
     
     # VPC Peering
@@ -148,12 +157,12 @@ def create_infrastructure_diagram():
     
     # Bastion to Redis Nodes
     for i, (x, y) in enumerate(subnet_positions):
-        ax.annotate('', xy=(x + 1.75, y + 1.5), xytext=(4.5, 7.3), 
+        ax.annotate('', xy=(x + subnet_width / 2, y + 1.5), xytext=(4.5, 7.3), 
                     arrowprops=dict(arrowstyle='->', color='red', lw=1.5, linestyle='--'))
     
     # NAT Gateway to Private Subnets
     for i, (x, y) in enumerate(subnet_positions):
-        ax.annotate('', xy=(x + 3, y + 2), xytext=(11.5, 7.3), 
+        ax.annotate('', xy=(x + subnet_width - 0.5, y + 2), xytext=(11.5, 7.3), 
                     arrowprops=dict(arrowstyle='->', color='orange', lw=1.5))
     
     # Legend
@@ -4,24 +4,32 @@ Redis Project Architecture Diagrams Generator (Simplified)
 Creates comprehensive architecture diagrams using Python diagrams library
 """
 
-from diagrams import Diagram, Cluster, Edge
-from diagrams.aws.compute import EC2
-from diagrams.aws.network import VPC, InternetGateway, NATGateway
-from diagrams.aws.storage import EBS
-from diagrams.aws.general import Users, InternetAlt1
-from diagrams.onprem.vcs import Git, Github
-from diagrams.onprem.ci import Jenkins
-from diagrams.onprem.iac import Terraform, Ansible
-from diagrams.onprem.database import Redis
-from diagrams.onprem.client import Users as ClientUsers
-from diagrams.programming.language import Python
-from diagrams.onprem.monitoring import Grafana
-from diagrams.generic.blank import Blank
-from diagrams.generic.network import Firewall
-from diagrams.generic.storage import Storage
+from diagrams import Cluster, Edge
+# Provider icon classes are resolved lazily, on first use (see diagram_nodes.py)
+from diagram_nodes import (
+    EC2,
+    VPC, InternetGateway, NATGateway,
+    EBS,
+    Users, InternetAlt1,
+    Git, Github,
+    Jenkins,
+    Terraform, Ansible,
+    Redis,
+    ClientUsers,
+    Python,
+    Grafana,
+    Blank,
+    Firewall,
+    Storage,
+)
+from diagram_cache import CachedDiagram as Diagram
+from diagram_renderer import DiagramSpec, run_cli
+from diagram_watch import ANSIBLE_INPUTS, PIPELINE_INPUTS, TOPOLOGY_INPUTS
+from topology import load_topology
 
 def create_infrastructure_architecture():
     """Create AWS Infrastructure Architecture Diagram"""
+    topology = load_topology()
     
     with Diagram("Redis Infrastructure Architecture", 
                  filename="redis_infrastructure_architecture", 
@@ -32,30 +40,26 @@ def create_infrastructure_architecture():
         users = Users("End Users")
         internet = InternetAlt1("Internet")
         
-        with Cluster("AWS Cloud (ap-south-1)"):
+        with Cluster(f"AWS Cloud ({topology.region})"):
             
-            with Cluster("Custom VPC (10.0.0.0/16)"):
+            with Cluster(f"Custom VPC ({topology.vpc_cidr})"):
                 igw = InternetGateway("Internet Gateway")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)"):
-                    bastion = EC2("Bastion Host\n(t3.micro)")
+                with Cluster(f"Public Subnet ({topology.public_subnet.cidr})"):
+                    bastion = EC2(f"{topology.bastion.title}\n({topology.bastion.instance_type})")
                     nat_gw = NATGateway("NAT Gateway")
-                    public_sg = Firewall("Public Security Group\nSSH:22, HTTP:80")
+                    public_sg = Firewall("Public Security Group\n" + topology.public_sg.ports_label())
                 
                 with Cluster("Private Subnets"):
-                    with Cluster("AZ-1a (10.0.2.0/24)"):
-                        redis1 = EC2("Redis Node 1\n(t3.micro)")
-                        redis1_db = Redis("Redis:6379")
-                        
-                    with Cluster("AZ-1b (10.0.3.0/24)"):
-                        redis2 = EC2("Redis Node 2\n(t3.micro)")
-                        redis2_db = Redis("Redis:6379")
-                        
-                    with Cluster("AZ-1c (10.0.4.0/24)"):
-                        redis3 = EC2("Redis Node 3\n(t3.micro)")
-                        redis3_db = Redis("Redis:6379")
+                    redis_hosts = []
+                    redis_dbs = []
+                    for subnet in topology.private_subnets:
+                        with Cluster(f"{subnet.az_label} ({subnet.cidr})"):
+                            for node in topology.nodes_in(subnet):
+                                redis_hosts.append(EC2(f"{node.title}\n({node.instance_type})"))
+                                redis_dbs.append(Redis(f"Redis:{topology.redis_port}"))
                     
-                    private_sg = Firewall("Private Security Group\nRedis:6379, Cluster:16379-16384")
+                    private_sg = Firewall(f"Private Security Group\nRedis:{topology.redis_port}, Cluster:{topology.cluster_bus_label}")
                 
                 # Storage
                 ebs_volumes = EBS("EBS Volumes")
@@ -64,20 +68,19 @@ def create_infrastructure_architecture():
         users >> Edge(label="Access") >> internet
         internet >> Edge(label="Route") >> igw
         igw >> Edge(label="Public") >> bastion
-        bastion >> Edge(label="SSH Jump", style="dashed") >> [redis1, redis2, redis3]
-        nat_gw >> Edge(label="Internet") >> [redis1, redis2, redis3]
+        bastion >> Edge(label="SSH Jump", style="dashed") >> redis_hosts
+        nat_gw >> Edge(label="Internet") >> redis_hosts
         
         # Redis Cluster
-        redis1_db >> Edge(label="Cluster", style="dotted") >> redis2_db
-        redis2_db >> Edge(label="Cluster", style="dotted") >> redis3_db
-        redis3_db >> Edge(label="Cluster", style="dotted") >> redis1_db
+        for db, next_db in topology.cluster_ring(redis_dbs):
+            db >> Edge(label="Cluster", style="dotted") >> next_db
         
         # Security
         public_sg >> bastion
-        private_sg >> [redis1, redis2, redis3]
+        private_sg >> redis_hosts
         
         # Storage
-        [redis1, redis2, redis3] >> ebs_volumes
+        redis_hosts >> ebs_volumes
 
 def create_cicd_pipeline_architecture():
     """Create CI/CD Pipeline Architecture Diagram"""
@@ -135,6 +138,7 @@ def create_cicd_pipeline_architecture():
 
 def create_detailed_pipeline_flow():
     """Create Detailed Pipeline Flow Diagram"""
+    topology = load_topology()
     
     with Diagram("Detailed Jenkins Pipeline Flow", 
                  filename="detailed_pipeline_flow", 
@@ -178,7 +182,7 @@ def create_detailed_pipeline_flow():
         # AWS Resources
         with Cluster("AWS Resources Created"):
             vpc_created = VPC("VPC & Subnets")
-            instances_created = EC2("4 EC2 Instances")
+            instances_created = EC2(f"{topology.instance_count} EC2 Instances")
             redis_deployed = Redis("Redis Cluster")
         
         # Outputs
@@ -201,6 +205,7 @@ def create_detailed_pipeline_flow():
 
 def create_network_topology():
     """Create Network Topology Diagram"""
+    topology = load_topology()
     
     with Diagram("Network Topology & Security", 
                  filename="network_topology", 
@@ -209,49 +214,43 @@ def create_network_topology():
         
         internet = InternetAlt1("Internet")
         
-        with Cluster("AWS VPC (10.0.0.0/16)"):
+        with Cluster(f"AWS VPC ({topology.vpc_cidr})"):
             igw = InternetGateway("Internet Gateway")
             
-            with Cluster("Public Subnet (10.0.1.0/24)"):
+            with Cluster(f"Public Subnet ({topology.public_subnet.cidr})"):
                 public_rt = Blank("Public Route Table")
-                bastion = EC2("Bastion Host")
+                bastion = EC2(topology.bastion.title)
                 nat_gw = NATGateway("NAT Gateway")
-                public_sg = Firewall("Public SG\nSSH:22, HTTP:80")
+                public_sg = Firewall("Public SG\n" + topology.public_sg.ports_label())
             
             with Cluster("Private Subnets"):
                 private_rt = Blank("Private Route Table")
                 
-                redis_node1 = EC2("Redis Node 1\n(10.0.2.x)")
-                redis_node2 = EC2("Redis Node 2\n(10.0.3.x)")
-                redis_node3 = EC2("Redis Node 3\n(10.0.4.x)")
+                redis_nodes = [EC2(f"{node.title}\n({node.address})") for node in topology.redis_nodes]
+                redis_svcs = [Redis(f"Redis:{topology.redis_port}") for _ in topology.redis_nodes]
                 
-                redis_svc1 = Redis("Redis:6379")
-                redis_svc2 = Redis("Redis:6379")
-                redis_svc3 = Redis("Redis:6379")
-                
-                private_sg = Firewall("Private SG\nRedis:6379\nCluster:16379-16384")
+                private_sg = Firewall(f"Private SG\nRedis:{topology.redis_port}\nCluster:{topology.cluster_bus_label}")
         
         # Network Flow
         internet >> igw >> public_rt >> [bastion, nat_gw]
-        bastion >> Edge(label="SSH Jump", style="dashed") >> [redis_node1, redis_node2, redis_node3]
-        nat_gw >> private_rt >> [redis_node1, redis_node2, redis_node3]
+        bastion >> Edge(label="SSH Jump", style="dashed") >> redis_nodes
+        nat_gw >> private_rt >> redis_nodes
         
         # Redis Services
-        redis_node1 >> redis_svc1
-        redis_node2 >> redis_svc2
-        redis_node3 >> redis_svc3
+        for redis_node, redis_svc in zip(redis_nodes, redis_svcs):
+            redis_node >> redis_svc
         
         # Cluster Communication
-        redis_svc1 >> Edge(style="dotted") >> redis_svc2
-        redis_svc2 >> Edge(style="dotted") >> redis_svc3
-        redis_svc3 >> Edge(style="dotted") >> redis_svc1
+        for svc, next_svc in topology.cluster_ring(redis_svcs):
+            svc >> Edge(style="dotted") >> next_svc
         
         # Security Groups
         public_sg >> bastion
-        private_sg >> [redis_node1, redis_node2, redis_node3]
+        private_sg >> redis_nodes
 
 def create_project_overview():
     """Create Project Overview Diagram"""
+    topology = load_topology()
     
     with Diagram("Redis Project Overview", 
                  filename="redis_project_overview", 
@@ -275,7 +274,7 @@ def create_project_overview():
             with Cluster("Infrastructure Components"):
                 aws_vpc = VPC("AWS VPC")
                 bastion_host = EC2("Bastion Host")
-                redis_nodes = Redis("Redis Cluster\n(3 Nodes)")
+                redis_nodes = Redis(f"Redis Cluster\n({len(topology.redis_nodes)} Nodes)")
                 security = Firewall("Security Groups")
             
             with Cluster("Outputs & Artifacts"):
@@ -291,53 +290,29 @@ def create_project_overview():
         pipeline >> ansible_code >> redis_nodes
         pipeline >> [ssh_keys, build_reports, connection_guides, diagrams]
 
-def main():
+DIAGRAMS = [
+    DiagramSpec("infrastructure", create_infrastructure_architecture, "redis_infrastructure_architecture.png",
+                "AWS resources and network layout",
+                inputs=TOPOLOGY_INPUTS),
+    DiagramSpec("cicd", create_cicd_pipeline_architecture, "cicd_pipeline_architecture.png",
+                "Jenkins automation workflow",
+                inputs=PIPELINE_INPUTS),
+    DiagramSpec("pipeline-flow", create_detailed_pipeline_flow, "detailed_pipeline_flow.png",
+                "Detailed step-by-step execution",
+                inputs=PIPELINE_INPUTS + TOPOLOGY_INPUTS),
+    DiagramSpec("network", create_network_topology, "network_topology.png",
+                "Security and network configuration",
+                inputs=TOPOLOGY_INPUTS),
+    DiagramSpec("overview", create_project_overview, "redis_project_overview.png",
+                "Complete project structure",
+                inputs=TOPOLOGY_INPUTS + PIPELINE_INPUTS + ANSIBLE_INPUTS),
+]
+
+def main(argv=None):
     """Generate all architecture diagrams"""
     
-    print("🎨 Creating Redis Project Architecture Diagrams...")
-    print("=" * 50)
-    
-    try:
-        print("1. Creating Infrastructure Architecture...")
-        create_infrastructure_architecture()
-        print("   ✅ redis_infrastructure_architecture.png")
-        
-        print("2. Creating CI/CD Pipeline Architecture...")
-        create_cicd_pipeline_architecture()
-        print("   ✅ cicd_pipeline_architecture.png")
-        
-        print("3. Creating Detailed Pipeline Flow...")
-        create_detailed_pipeline_flow()
-        print("   ✅ detailed_pipeline_flow.png")
-        
-        print("4. Creating Network Topology...")
-        create_network_topology()
-        print("   ✅ network_topology.png")
-        
-        print("5. Creating Project Overview...")
-        create_project_overview()
-        print("   ✅ redis_project_overview.png")
-        
-        print("\n🎉 All diagrams created successfully!")
-        print("\n📁 Generated Files:")
-        print("- redis_infrastructure_architecture.png")
-        print("- cicd_pipeline_architecture.png") 
-        print("- detailed_pipeline_flow.png")
-        print("- network_topology.png")
-        print("- redis_project_overview.png")
-        
-        print("\n📋 Diagram Descriptions:")
-        print("1. Infrastructure: AWS resources and network layout")
-        print("2. CI/CD Pipeline: Jenkins automation workflow")
-        print("3. Pipeline Flow: Detailed step-by-step execution")
-        print("4. Network Topology: Security and network configuration")
-        print("5. Project Overview: Complete project structure")
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        return 1
-    
-    return 0
+    # The topology is parsed once in the parent so forked render workers inherit it
+    return run_cli("Creating Redis Project Architecture Diagrams", DIAGRAMS, argv, setup=load_topology)
 
 if __name__ == "__main__":
     exit(main())
@@ -4,24 +4,32 @@ Redis Project Architecture Diagrams Generator (Working Version)
 Creates comprehensive architecture diagrams using Python diagrams library
 """
 
-from diagrams import Diagram, Cluster, Edge
-from diagrams.aws.compute import EC2
-from diagrams.aws.network import VPC, InternetGateway, NATGateway
-from diagrams.aws.storage import EBS
-from diagrams.aws.general import Users, InternetAlt1
-from diagrams.onprem.vcs import Git, Github
-from diagrams.onprem.ci import Jenkins
-from diagrams.onprem.iac import Terraform, Ansible
-from diagrams.onprem.database import MongoDB  # Using MongoDB as Redis substitute
-from diagrams.onprem.client import Users as ClientUsers
-from diagrams.programming.language import Python
-from diagrams.onprem.monitoring import Grafana
-from diagrams.generic.blank import Blank
-from diagrams.generic.network import Firewall
-from diagrams.generic.storage import Storage
+from diagrams import Cluster, Edge
+# Provider icon classes are resolved lazily, on first use (see diagram_nodes.py)
+from diagram_nodes import (
+    EC2,
+    VPC, InternetGateway, NATGateway,
+    EBS,
+    Users, InternetAlt1,
+    Git, Github,
+    Jenkins,
+    Terraform, Ansible,
+    MongoDB,  # Using MongoDB as Redis substitute
+    ClientUsers,
+    Python,
+    Grafana,
+    Blank,
+    Firewall,
+    Storage,
+)
+from diagram_cache import CachedDiagram as Diagram
+from diagram_renderer import DiagramSpec, run_cli
+from diagram_watch import ANSIBLE_INPUTS, PIPELINE_INPUTS, TOPOLOGY_INPUTS
+from topology import load_topology
 
 def create_infrastructure_architecture():
     """Create AWS Infrastructure Architecture Diagram"""
+    topology = load_topology()
     
     with Diagram("Redis Infrastructure Architecture", 
                  filename="redis_infrastructure_architecture", 
@@ -33,30 +41,27 @@ def create_infrastructure_architecture():
         users = Users("End Users")
         internet = InternetAlt1("Internet")
         
-        with Cluster("AWS Cloud Region: ap-south-1"):
+        with Cluster(f"AWS Cloud Region: {topology.region}"):
             
-            with Cluster("Custom VPC (10.0.0.0/16)"):
+            with Cluster(f"Custom VPC ({topology.vpc_cidr})"):
                 igw = InternetGateway("Internet\nGateway")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)"):
-                    bastion = EC2("Bastion Host\nt3.micro\nPublic IP")
+                with Cluster(f"Public Subnet ({topology.public_subnet.cidr})"):
+                    bastion = EC2(f"{topology.bastion.title}\n{topology.bastion.instance_type}\nPublic IP")
                     nat_gw = NATGateway("NAT Gateway\nElastic IP")
                     public_sg = Firewall("Public Security Group\n• SSH (22): 0.0.0.0/0\n• HTTP (80): 0.0.0.0/0")
                 
                 with Cluster("Private Subnets - Multi-AZ"):
-                    with Cluster("Availability Zone 1a\n(10.0.2.0/24)"):
-                        redis1 = EC2("Redis Node 1\nt3.micro")
-                        redis1_db = MongoDB("Redis Service\nPort: 6379")
-                        
-                    with Cluster("Availability Zone 1b\n(10.0.3.0/24)"):
-                        redis2 = EC2("Redis Node 2\nt3.micro")
-                        redis2_db = MongoDB("Redis Service\nPort: 6379")
-                        
-                    with Cluster("Availability Zone 1c\n(10.0.4.0/24)"):
-                        redis3 = EC2("Redis Node 3\nt3.micro")
-                        redis3_db = MongoDB("Redis Service\nPort: 6379")
+                    redis_hosts = []
+                    redis_dbs = []
+                    for subnet in topology.private_subnets:
+                        zone = subnet.az_label.replace("AZ-", "Availability Zone ")
+                        with Cluster(f"{zone}\n({subnet.cidr})"):
+                            for node in topology.nodes_in(subnet):
+                                redis_hosts.append(EC2(f"{node.title}\n{node.instance_type}"))
+                                redis_dbs.append(MongoDB(f"Redis Service\nPort: {topology.redis_port}"))
                     
-                    private_sg = Firewall("Private Security Group\n• Redis (6379): 0.0.0.0/0\n• Cluster (16379-16384)\n• SSH (22): VPC CIDR")
+                    private_sg = Firewall("Private Security Group\n" + topology.private_sg.rules_label("• ", ": "))
                 
                 # Persistent Storage
                 ebs_storage = EBS("EBS Volumes\nData Persistence")
@@ -68,25 +73,25 @@ def create_infrastructure_architecture():
         igw >> Edge(label="Route to NAT") >> nat_gw
         
         # SSH Jump Host Access
-        bastion >> Edge(label="SSH Jump Host\n(Secure Access)", style="dashed", color="red") >> [redis1, redis2, redis3]
+        bastion >> Edge(label="SSH Jump Host\n(Secure Access)", style="dashed", color="red") >> redis_hosts
         
         # Internet Access for Private Instances
-        nat_gw >> Edge(label="Internet Access\n(Updates/Packages)") >> [redis1, redis2, redis3]
+        nat_gw >> Edge(label="Internet Access\n(Updates/Packages)") >> redis_hosts
         
         # Redis Cluster Communication
-        redis1_db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis2_db
-        redis2_db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis3_db
-        redis3_db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis1_db
+        for db, next_db in topology.cluster_ring(redis_dbs):
+            db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> next_db
         
         # Security Group Controls
         public_sg >> Edge(label="Controls Access") >> bastion
-        private_sg >> Edge(label="Controls Access") >> [redis1, redis2, redis3]
+        private_sg >> Edge(label="Controls Access") >> redis_hosts
         
         # Data Storage
-        [redis1, redis2, redis3] >> Edge(label="Data Storage") >> ebs_storage
+        redis_hosts >> Edge(label="Data Storage") >> ebs_storage
 
 def create_cicd_pipeline_architecture():
     """Create CI/CD Pipeline Architecture Diagram"""
+    topology = load_topology()
     
     with Diagram("CI/CD Pipeline Architecture", 
                  filename="cicd_pipeline_architecture", 
@@ -126,7 +131,7 @@ def create_cicd_pipeline_architecture():
         # Target AWS Infrastructure
         with Cluster("AWS Target Infrastructure"):
             vpc_networking = VPC("VPC & Networking\nSubnets, Routes, Gateways")
-            compute_instances = EC2("EC2 Instances\n1 Bastion + 3 Redis Nodes")
+            compute_instances = EC2(f"EC2 Instances\n1 Bastion + {len(topology.redis_nodes)} Redis Nodes")
             redis_cluster = MongoDB("Redis Cluster\nDistributed Database")
             security_groups = Firewall("Security Groups\nNetwork Access Control")
         
@@ -171,6 +176,7 @@ def create_cicd_pipeline_architecture():
 
 def create_detailed_pipeline_flow():
     """Create Detailed Pipeline Flow Diagram"""
+    topology = load_topology()
     
     with Diagram("Detailed Jenkins Pipeline Flow", 
                  filename="detailed_pipeline_flow", 
@@ -225,7 +231,7 @@ def create_detailed_pipeline_flow():
         # AWS Resources Created/Managed
         with Cluster("AWS Resources Created"):
             vpc_resources = VPC("VPC Resources\nVPC, Subnets, Route Tables")
-            compute_resources = EC2("Compute Resources\n4 EC2 Instances")
+            compute_resources = EC2(f"Compute Resources\n{topology.instance_count} EC2 Instances")
             network_resources = Blank("Network Resources\nIGW, NAT Gateway, EIPs")
             security_resources = Firewall("Security Resources\nSecurity Groups, NACLs")
             redis_services = MongoDB("Redis Services\nCluster Configuration")
@@ -269,6 +275,7 @@ def create_detailed_pipeline_flow():
 
 def create_network_topology():
     """Create Network Topology Diagram"""
+    topology = load_topology()
     
     with Diagram("Network Topology & Security Architecture", 
                  filename="network_topology", 
@@ -279,39 +286,35 @@ def create_network_topology():
         # External Network
         internet = InternetAlt1("Internet\nPublic Network")
         
-        with Cluster("AWS VPC (10.0.0.0/16) - Custom Network"):
+        with Cluster(f"AWS VPC ({topology.vpc_cidr}) - Custom Network"):
             igw = InternetGateway("Internet Gateway\nPublic Internet Access")
             
             # Public Network Tier
             with Cluster("Public Network Tier"):
                 public_route_table = Blank("Public Route Table\n0.0.0.0/0 → IGW")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)"):
-                    bastion_host = EC2("Bastion Host\nJump Server\n10.0.1.x")
-                    nat_gateway = NATGateway("NAT Gateway\nOutbound Internet\n10.0.1.y")
+                with Cluster(f"Public Subnet ({topology.public_subnet.cidr})"):
+                    bastion_host = EC2(f"{topology.bastion.title}\nJump Server\n{topology.bastion.address}")
+                    nat_gateway = NATGateway(f"NAT Gateway\nOutbound Internet\n{topology.public_subnet.host_pattern}")
                     
                     with Cluster("Public Security Group"):
-                        public_sg_rules = Firewall("Security Rules:\n• SSH (22): 0.0.0.0/0\n• HTTP (80): 0.0.0.0/0\n• ICMP: All Sources")
+                        public_sg_rules = Firewall("Security Rules:\n" + topology.public_sg.rules_label("• ", ": "))
             
             # Private Network Tier
             with Cluster("Private Network Tier"):
                 private_route_table = Blank("Private Route Table\n0.0.0.0/0 → NAT Gateway")
                 
                 with Cluster("Multi-AZ Private Subnets"):
-                    with Cluster("AZ-1a Subnet (10.0.2.0/24)"):
-                        redis_node1 = EC2("Redis Node 1\nDatabase Server\n10.0.2.x")
-                        redis_service1 = MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384")
-                    
-                    with Cluster("AZ-1b Subnet (10.0.3.0/24)"):
-                        redis_node2 = EC2("Redis Node 2\nDatabase Server\n10.0.3.x")
-                        redis_service2 = MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384")
-                    
-                    with Cluster("AZ-1c Subnet (10.0.4.0/24)"):
-                        redis_node3 = EC2("Redis Node 3\nDatabase Server\n10.0.4.x")
-                        redis_service3 = MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384")
+                    redis_nodes = []
+                    redis_services = []
+                    for subnet in topology.private_subnets:
+                        with Cluster(f"{subnet.az_label} Subnet ({subnet.cidr})"):
+                            for node in topology.nodes_in(subnet):
+                                redis_nodes.append(EC2(f"{node.title}\nDatabase Server\n{node.address}"))
+                                redis_services.append(MongoDB(f"Redis Service\nPort: {topology.redis_port}\nCluster: {topology.cluster_bus_label}"))
                     
                     with Cluster("Private Security Group"):
-                        private_sg_rules = Firewall("Security Rules:\n• Redis (6379): 0.0.0.0/0\n• Cluster (16379-16384): 0.0.0.0/0\n• SSH (22): VPC CIDR Only\n• ICMP: VPC CIDR Only")
+                        private_sg_rules = Firewall("Security Rules:\n" + topology.private_sg.rules_label("• ", ": "))
         
         # Network Traffic Flow
         internet >> Edge(label="Public Internet Traffic") >> igw
@@ -320,28 +323,27 @@ def create_network_topology():
         public_route_table >> Edge(label="NAT Traffic") >> nat_gateway
         
         # Secure SSH Access Pattern
-        bastion_host >> Edge(label="SSH Jump Connection\n(Port 22 - Secure)", style="dashed", color="red") >> [redis_node1, redis_node2, redis_node3]
+        bastion_host >> Edge(label="SSH Jump Connection\n(Port 22 - Secure)", style="dashed", color="red") >> redis_nodes
         
         # Outbound Internet Access
         nat_gateway >> Edge(label="Outbound Internet Access\n(Updates, Packages)") >> private_route_table
-        private_route_table >> Edge(label="Route to Private Instances") >> [redis_node1, redis_node2, redis_node3]
+        private_route_table >> Edge(label="Route to Private Instances") >> redis_nodes
         
         # Redis Service Hosting
-        redis_node1 >> Edge(label="Hosts") >> redis_service1
-        redis_node2 >> Edge(label="Hosts") >> redis_service2
-        redis_node3 >> Edge(label="Hosts") >> redis_service3
+        for redis_node, redis_service in zip(redis_nodes, redis_services):
+            redis_node >> Edge(label="Hosts") >> redis_service
         
         # Redis Cluster Inter-node Communication
-        redis_service1 >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> redis_service2
-        redis_service2 >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> redis_service3
-        redis_service3 >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> redis_service1
+        for service, next_service in topology.cluster_ring(redis_services):
+            service >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> next_service
         
         # Security Group Application
         public_sg_rules >> Edge(label="Applied to") >> bastion_host
-        private_sg_rules >> Edge(label="Applied to") >> [redis_node1, redis_node2, redis_node3]
+        private_sg_rules >> Edge(label="Applied to") >> redis_nodes
 
 def create_project_overview():
     """Create Project Overview Diagram"""
+    topology = load_topology()
     
     with Diagram("Redis Infrastructure Project - Complete Overview", 
                  filename="redis_project_overview", 
@@ -369,11 +371,11 @@ def create_project_overview():
             
             # Infrastructure Components Layer
             with Cluster("AWS Infrastructure Components"):
-                network_infrastructure = VPC("Network Infrastructure\nCustom VPC (10.0.0.0/16)\nMulti-AZ Subnets")
-                compute_infrastructure = EC2("Compute Infrastructure\nBastion Host (Public)\n3x Redis Nodes (Private)")
+                network_infrastructure = VPC(f"Network Infrastructure\nCustom VPC ({topology.vpc_cidr})\nMulti-AZ Subnets")
+                compute_infrastructure = EC2(f"Compute Infrastructure\nBastion Host (Public)\n{len(topology.redis_nodes)}x Redis Nodes (Private)")
                 security_infrastructure = Firewall("Security Infrastructure\nSecurity Groups & NACLs\nNetwork Access Control")
                 storage_infrastructure = EBS("Storage Infrastructure\nEBS Volumes\nData Persistence")
-                redis_cluster_service = MongoDB("Redis Cluster Service\n3-Node Cluster\nHigh Availability Setup")
+                redis_cluster_service = MongoDB(f"Redis Cluster Service\n{len(topology.redis_nodes)}-Node Cluster\nHigh Availability Setup")
             
             # Monitoring & Operations Layer
             with Cluster("Monitoring & Operations"):
@@ -406,65 +408,29 @@ def create_project_overview():
         # Output Generation
         pipeline_orchestration >> artifact_management >> [access_credentials, connection_guides, architecture_diagrams, deployment_reports]
 
-def main():
+DIAGRAMS = [
+    DiagramSpec("infrastructure", create_infrastructure_architecture, "redis_infrastructure_architecture.png",
+                "AWS resources, VPC, and network layout",
+                inputs=TOPOLOGY_INPUTS),
+    DiagramSpec("cicd", create_cicd_pipeline_architecture, "cicd_pipeline_architecture.png",
+                "Jenkins automation and tool integration",
+                inputs=PIPELINE_INPUTS + TOPOLOGY_INPUTS),
+    DiagramSpec("pipeline-flow", create_detailed_pipeline_flow, "detailed_pipeline_flow.png",
+                "Step-by-step pipeline execution stages",
+                inputs=PIPELINE_INPUTS + TOPOLOGY_INPUTS),
+    DiagramSpec("network", create_network_topology, "network_topology.png",
+                "Security groups and network traffic flow",
+                inputs=TOPOLOGY_INPUTS),
+    DiagramSpec("overview", create_project_overview, "redis_project_overview.png",
+                "Complete project structure and components",
+                inputs=TOPOLOGY_INPUTS + PIPELINE_INPUTS + ANSIBLE_INPUTS),
+]
+
+def main(argv=None):
     """Generate all architecture diagrams"""
     
-    print("🎨 Creating Redis Project Architecture Diagrams with Python Diagrams...")
-    print("=" * 70)
-    
-    try:
-        print("1. Creating Infrastructure Architecture Diagram...")
-        create_infrastructure_architecture()
-        print("   ✅ redis_infrastructure_architecture.png created")
-        
-        print("2. Creating CI/CD Pipeline Architecture Diagram...")
-        create_cicd_pipeline_architecture()
-        print("   ✅ cicd_pipeline_architecture.png created")
-        
-        print("3. Creating Detailed Pipeline Flow Diagram...")
-        create_detailed_pipeline_flow()
-        print("   ✅ detailed_pipeline_flow.png created")
-        
-        print("4. Creating Network Topology Diagram...")
-        create_network_topology()
-        print("   ✅ network_topology.png created")
-        
-        print("5. Creating Project Overview Diagram...")
-        create_project_overview()
-        print("   ✅ redis_project_overview.png created")
-        
-        print("\n🎉 All architecture diagrams created successfully!")
-        print("\n📁 Generated Diagram Files:")
-        print("├── redis_infrastructure_architecture.png")
-        print("├── cicd_pipeline_architecture.png") 
-        print("├── detailed_pipeline_flow.png")
-        print("├── network_topology.png")
-        print("└── redis_project_overview.png")
-        
-        print("\n📋 Diagram Descriptions:")
-        print("1. 🏗️  Infrastructure Architecture: AWS resources, VPC, and network layout")
-        print("2. 🔄 CI/CD Pipeline Architecture: Jenkins automation and tool integration")
-        print("3. 📊 Detailed Pipeline Flow: Step-by-step pipeline execution stages")
-        print("4. 🌐 Network Topology: Security groups and network traffic flow")
-        print("5. 📋 Project Overview: Complete project structure and components")
-        
-        print("\n🎯 Usage:")
-        print("- Use these diagrams in presentations and documentation")
-        print("- Include in technical reviews and architecture discussions")
-        print("- Reference for team onboarding and training")
-        print("- Add to project README and wiki pages")
-        
-    except Exception as e:
-        print(f"❌ Error creating diagrams: {str(e)}")
-        print("\n🔧 Troubleshooting:")
-        print("1. Ensure 'diagrams' library is installed: pip install diagrams")
-        print("2. Install Graphviz system dependency:")
-        print("   - macOS: brew install graphviz")
-        print("   - Ubuntu/Debian: sudo apt-get install graphviz")
-        print("   - CentOS/RHEL: sudo yum install graphviz")
-        return 1
-    
-    return 0
+    # The topology is parsed once in the parent so forked render workers inherit it
+    return run_cli("Creating Redis Project Architecture Diagrams with Python Diagrams", DIAGRAMS, argv, setup=load_topology)
 
 if __name__ == "__main__":
     exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Render Cache for Python Diagrams
+Skips the Graphviz dot invocation when the generated DOT source has not changed
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+
+import graphviz
+from diagrams import Diagram
+
+CACHE_DIR = os.environ.get("DIAGRAM_CACHE_DIR", ".diagram_cache")
+
+# Per-process counters, read by diagram_renderer to report cache hits
+# and by benchmark_diagrams to split Graphviz time from graph construction
+RENDER_STATS = {"hits": 0, "misses": 0, "graphviz_seconds": 0.0}
+
+
+def cache_enabled():
+    return os.environ.get("DIAGRAM_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def requested_formats():
+    """Output formats from $DIAGRAM_FORMATS (e.g. "png,svg,pdf"), or None to keep each diagram's own"""
+    value = os.environ.get("DIAGRAM_FORMATS", "")
+    formats = [fmt.strip().lower() for fmt in value.split(",") if fmt.strip()]
+    return formats or None
+
+
+# diagrams gives every node a random uuid4 hex id, so the raw source differs on each run.
+# Graphviz quotes the ids that start with a digit, so the quotes are part of the match.
+_NODE_ID = re.compile(r'"?\b([0-9a-f]{32})\b"?')
+
+
+def canonical_source(source):
+    """DOT source with random node ids replaced by their order of first appearance"""
+    ids = {}
+    return _NODE_ID.sub(lambda m: "n%d" % ids.setdefault(m.group(1), len(ids)), source)
+
+
+@functools.lru_cache(maxsize=None)
+def graphviz_version():
+    """Installed Graphviz version, resolved once per process"""
+    pinned = os.environ.get("DIAGRAM_GRAPHVIZ_VERSION")
+    if pinned:
+        return pinned
+    try:
+        return ".".join(str(part) for part in graphviz.version())
+    except Exception:
+        return "unknown"
+
+
+def render_key(source, outformat, graph_attr):
+    """Hash of everything that influences the rendered image"""
+    digest = hashlib.sha256()
+    digest.update(canonical_source(source).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(graphviz_version().encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(str(outformat).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(graph_attr or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _stamp_path(output):
+    return os.path.join(CACHE_DIR, os.path.basename(output) + ".sha256")
+
+
+def _layout_path(filename):
+    return os.path.join(CACHE_DIR, os.path.basename(filename) + ".layout.gv")
+
+
+def _graphviz(command, outputs, source):
+    """Run one Graphviz command writing several -T<format> -o<file> outputs"""
+    args = list(command)
+    for fmt, output in outputs:
+        args += [f"-T{fmt}", f"-o{output}"]
+    args.append(source)
+    start = time.perf_counter()
+    completed = subprocess.run(args, capture_output=True, text=True)
+    RENDER_STATS["graphviz_seconds"] += time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {completed.stderr.strip()}")
+
+
+def is_fresh(output, key):
+    """True when output exists and was rendered from the same key"""
+    if not os.path.exists(output):
+        return False
+    try:
+        with open(_stamp_path(output)) as f:
+            return f.read().strip() == key
+    except OSError:
+        return False
+
+
+def record(output, key):
+    """Store the key for output; written atomically so parallel renders don't collide"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    stamp = _stamp_path(output)
+    tmp = f"{stamp}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(key + "\n")
+    os.replace(tmp, stamp)
+
+
+class CachedDiagram(Diagram):
+    """Drop-in Diagram that only calls Graphviz when the DOT source changed
+
+    Layout runs at most once per DOT source: the positioned graph is kept in
+    CACHE_DIR and any further formats are drawn from it with `neato -n2`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        formats = requested_formats()
+        if formats:
+            kwargs["outformat"] = formats
+        super().__init__(*args, **kwargs)
+        self.cache_graph_attr = kwargs.get("graph_attr")
+
+    def render(self):
+        formats = self.outformat if isinstance(self.outformat, list) else [self.outformat]
+        stale = []
+        for fmt in formats:
+            output = f"{self.filename}.{fmt}"
+            key = render_key(self.dot.source, fmt, self.cache_graph_attr)
+            if cache_enabled() and is_fresh(output, key):
+                RENDER_STATS["hits"] += 1
+            else:
+                stale.append((fmt, output, key))
+
+        # Diagram.__exit__ removes the DOT file, so it must exist even on a hit
+        self.dot.save()
+        if not stale:
+            return
+
+        layout = _layout_path(self.filename)
+        layout_key = render_key(self.dot.source, "layout", self.cache_graph_attr)
+        outputs = [(fmt, output) for fmt, output, key in stale]
+        if cache_enabled() and is_fresh(layout, layout_key):
+            # Positions, splines and labels are already computed; only draw
+            _graphviz(["neato", "-n2"], outputs, layout)
+        else:
+            # One dot run lays the graph out once and writes every format plus the positioned graph
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _graphviz(["dot"], outputs + [("dot", layout)], self.filename)
+            record(layout, layout_key)
+
+        for fmt, output, key in stale:
+            RENDER_STATS["misses"] += 1
+            record(output, key)
+        if self.show:
+            graphviz.view(stale[0][1], quiet=True)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Lazy Node Class Registry for Python Diagrams
+Resolves provider icon classes (diagrams.aws.*, diagrams.onprem.*, ...) only when a diagram first uses them
+"""
+
+import importlib
+import time
+
+# Name exported by this module -> (provider module, class name)
+NODE_CLASSES = {
+    # AWS
+    "EC2": ("diagrams.aws.compute", "EC2"),
+    "VPC": ("diagrams.aws.network", "VPC"),
+    "PublicSubnet": ("diagrams.aws.network", "PublicSubnet"),
+    "PrivateSubnet": ("diagrams.aws.network", "PrivateSubnet"),
+    "InternetGateway": ("diagrams.aws.network", "InternetGateway"),
+    "NATGateway": ("diagrams.aws.network", "NATGateway"),
+    "ElasticLoadBalancing": ("diagrams.aws.network", "ElasticLoadBalancing"),
+    "VPCPeering": ("diagrams.aws.network", "VPCPeering"),
+    "SecurityGroup": ("diagrams.aws.security", "SecurityGroup"),
+    "IAM": ("diagrams.aws.security", "IAM"),
+    "EBS": ("diagrams.aws.storage", "EBS"),
+    "Users": ("diagrams.aws.general", "Users"),
+    "Internet": ("diagrams.aws.general", "Internet"),
+    "InternetAlt1": ("diagrams.aws.general", "InternetAlt1"),
+    "Codebuild": ("diagrams.aws.devtools", "Codebuild"),
+    "Codedeploy": ("diagrams.aws.devtools", "Codedeploy"),
+    "Codepipeline": ("diagrams.aws.devtools", "Codepipeline"),
+    # On-premises / tooling
+    "Git": ("diagrams.onprem.vcs", "Git"),
+    "Github": ("diagrams.onprem.vcs", "Github"),
+    "Jenkins": ("diagrams.onprem.ci", "Jenkins"),
+    "Terraform": ("diagrams.onprem.iac", "Terraform"),
+    "Ansible": ("diagrams.onprem.iac", "Ansible"),
+    "Redis": ("diagrams.onprem.database", "Redis"),
+    "MongoDB": ("diagrams.onprem.database", "MongoDB"),
+    "ClientUsers": ("diagrams.onprem.client", "Users"),
+    "Grafana": ("diagrams.onprem.monitoring", "Grafana"),
+    "Prometheus": ("diagrams.onprem.monitoring", "Prometheus"),
+    "Python": ("diagrams.programming.language", "Python"),
+    "Nodejs": ("diagrams.programming.language", "Nodejs"),
+    # Generic
+    "Blank": ("diagrams.generic.blank", "Blank"),
+    "Firewall": ("diagrams.generic.network", "Firewall"),
+    "Rack": ("diagrams.generic.compute", "Rack"),
+    "Storage": ("diagrams.generic.storage", "Storage"),
+}
+
+# Provider module -> seconds spent importing it, filled in as nodes are first used
+IMPORT_TIMES = {}
+
+
+class LazyNode:
+    """Stand-in for a diagrams node class; imports the real class on first call"""
+
+    __slots__ = ("module", "name", "_cls")
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self._cls = None
+
+    def resolve(self):
+        if self._cls is None:
+            if self.module not in IMPORT_TIMES:
+                start = time.perf_counter()
+                importlib.import_module(self.module)
+                IMPORT_TIMES[self.module] = time.perf_counter() - start
+            self._cls = getattr(importlib.import_module(self.module), self.name)
+        return self._cls
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        state = "resolved" if self._cls is not None else "lazy"
+        return f"<LazyNode {self.module}.{self.name} ({state})>"
+
+
+_nodes = {}
+
+
+def __getattr__(name):
+    """`from diagram_nodes import EC2` hands out a LazyNode without importing anything"""
+    if name not in NODE_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no node class {name!r}")
+    if name not in _nodes:
+        _nodes[name] = LazyNode(*NODE_CLASSES[name])
+    return _nodes[name]
+
+
+def __dir__():
+    return sorted(list(globals()) + list(NODE_CLASSES))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Shared Diagram Rendering Driver
+Runs the create_* diagram builders in a process pool and reports per-diagram timings
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+class DiagramSpec:
+    """A named diagram builder, the file it produces and the files it is drawn from"""
+
+    __slots__ = ("name", "builder", "output", "description", "inputs")
+
+    def __init__(self, name, builder, output, description="", inputs=()):
+        self.name = name
+        self.builder = builder
+        self.output = output
+        self.description = description
+        # Globs relative to the repository root, or callables returning paths (see diagram_watch)
+        self.inputs = tuple(inputs)
+
+
+class DiagramResult:
+    """Outcome of rendering a single diagram"""
+
+    __slots__ = ("name", "output", "seconds", "error", "cached", "imports")
+
+    def __init__(self, name, output, seconds, error=None, cached=False, imports=None):
+        self.name = name
+        self.output = output
+        self.seconds = seconds
+        self.error = error
+        self.cached = cached
+        # Provider module -> seconds, for modules this builder imported first
+        self.imports = imports or {}
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _cache_stats():
+    # Only meaningful once a builder has imported diagram_cache
+    cache = sys.modules.get("diagram_cache")
+    return dict(cache.RENDER_STATS) if cache else {"hits": 0, "misses": 0}
+
+
+def _import_times():
+    # Filled in by diagram_nodes as provider classes are first used
+    nodes = sys.modules.get("diagram_nodes")
+    return dict(nodes.IMPORT_TIMES) if nodes else {}
+
+
+def _render_one(spec):
+    """Run one builder, capturing its wall time and any error"""
+    before = _cache_stats()
+    imported = _import_times()
+    start = time.perf_counter()
+    try:
+        spec.builder()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+        return DiagramResult(spec.name, spec.output, time.perf_counter() - start, error)
+    seconds = time.perf_counter() - start
+
+    after = _cache_stats()
+    cached = after["hits"] > before["hits"] and after["misses"] == before["misses"]
+    imports = {module: took for module, took in _import_times().items()
+               if module not in imported}
+    return DiagramResult(spec.name, spec.output, seconds, cached=cached, imports=imports)
+
+
+def select_diagrams(diagrams, only=None):
+    """Return the specs to render, optionally restricted to the given names"""
+    if not only:
+        return list(diagrams)
+
+    by_name = {spec.name: spec for spec in diagrams}
+    unknown = [name for name in only if name not in by_name]
+    if unknown:
+        raise KeyError(f"Unknown diagram(s): {', '.join(unknown)}. "
+                       f"Available: {', '.join(by_name)}")
+    return [by_name[name] for name in only]
+
+
+def render_diagrams(diagrams, workers=None, only=None, fresh=False):
+    """Render diagrams in parallel and return one DiagramResult per diagram
+
+    Errors are collected per diagram instead of aborting the whole run.
+    With workers=1 everything runs in the current process. fresh=True always
+    uses newly spawned workers, which re-import the builders' (edited) modules.
+    """
+    selected = select_diagrams(diagrams, only)
+    if not selected:
+        return []
+
+    workers = workers or min(len(selected), os.cpu_count() or 1)
+    if not fresh and (workers <= 1 or len(selected) == 1):
+        return [_render_one(spec) for spec in selected]
+
+    results = {}
+    context = multiprocessing.get_context("spawn") if fresh else None
+    with ProcessPoolExecutor(max_workers=max(workers, 1), mp_context=context) as pool:
+        futures = {pool.submit(_render_one, spec): spec for spec in selected}
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                results[spec.name] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. BrokenProcessPool)
+                results[spec.name] = DiagramResult(spec.name, spec.output, 0.0,
+                                                   f"{type(e).__name__}: {e}")
+
+    return [results[spec.name] for spec in selected]
+
+
+def _display_output(output):
+    # With --format the same stem is written once per format, e.g. network_topology.{png,svg}
+    formats = [fmt for fmt in os.environ.get("DIAGRAM_FORMATS", "").split(",") if fmt]
+    if not formats:
+        return output
+    stem = os.path.splitext(output)[0]
+    return f"{stem}.{formats[0]}" if len(formats) == 1 else f"{stem}.{{{','.join(formats)}}}"
+
+
+def print_report(results, total_seconds):
+    """Print per-diagram status and wall time"""
+    width = max((len(result.name) for result in results), default=0)
+    for result in results:
+        status = "✅" if result.ok else "❌"
+        note = "  (cached)" if result.cached else ""
+        print(f"   {status} {result.name:<{width}}  {result.seconds:6.2f}s  "
+              f"{_display_output(result.output)}{note}")
+
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        print(f"\n❌ Error creating {result.name}:")
+        print(result.error.rstrip())
+
+    print(f"\n⏱️  {len(results) - len(failed)}/{len(results)} diagrams rendered "
+          f"in {total_seconds:.2f}s wall time "
+          f"({sum(result.seconds for result in results):.2f}s summed)")
+
+
+def print_startup_profile(results, eager_modules):
+    """Print which provider modules were imported, when, and how long each took"""
+    print("\n📦 Startup import profile:")
+    if eager_modules:
+        print(f"   {len(eager_modules)} provider module(s) imported before any diagram was built:")
+        for module in eager_modules:
+            print(f"      {module}")
+    else:
+        print("   no provider modules imported at startup")
+
+    for result in results:
+        if not result.imports:
+            continue
+        total = sum(result.imports.values())
+        print(f"   {result.name}: {len(result.imports)} module(s) imported on demand in {total:.3f}s")
+        for module, seconds in sorted(result.imports.items(), key=lambda item: -item[1]):
+            print(f"      {seconds:6.3f}s  {module}")
+
+
+def _provider_modules():
+    # diagrams.<provider>.<category> modules; the diagrams core package itself is always needed
+    return sorted(name for name in sys.modules if name.startswith("diagrams.") and name.count(".") >= 2)
+
+
+def build_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-j", "--workers", type=int,
+                        default=int(os.environ.get("DIAGRAM_WORKERS", "0")) or None,
+                        help="number of parallel render processes "
+                             "(default: one per diagram, capped at CPU count)")
+    parser.add_argument("-d", "--diagram", action="append", dest="only", metavar="NAME",
+                        help="render only the named diagram (repeatable)")
+    parser.add_argument("-f", "--format", action="append", dest="formats", metavar="FORMAT",
+                        choices=("png", "jpg", "svg", "pdf", "dot"),
+                        help="output format, repeatable (e.g. -f png -f svg); Graphviz lays each "
+                             "diagram out once and draws every format from the same layout")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the render cache and re-run Graphviz for every diagram")
+    parser.add_argument("--tfstate", metavar="FILE",
+                        help="draw instances, subnets, security groups and peerings from a "
+                             "terraform.tfstate or `terraform show -json` file")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print which diagrams provider modules were imported and how long each took")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and re-render only the diagrams whose inputs "
+                             "(topology, Terraform, Jenkinsfile, ...) change")
+    parser.add_argument("--interval", type=float, default=0.2, metavar="SECONDS",
+                        help="how often --watch polls for changes (default: 0.2)")
+    parser.add_argument("--list", action="store_true",
+                        help="list available diagram names and exit")
+    return parser
+
+
+def run_cli(title, diagrams, argv=None, setup=None):
+    """Common main() for the create_* diagram scripts
+
+    setup, if given, runs after the command line has been applied and before
+    the render pool starts, so shared state it loads is inherited by the workers.
+    """
+    args = build_parser(title).parse_args(argv)
+    # Taken before any builder runs: with lazy node classes this should be empty
+    eager_modules = _provider_modules()
+
+    if args.list:
+        for spec in diagrams:
+            print(f"{spec.name:<16} {spec.output:<40} {spec.description}")
+        return 0
+
+    if args.tfstate:
+        if not os.path.exists(args.tfstate):
+            print(f"❌ Terraform state not found: {args.tfstate}")
+            return 2
+        # Read by topology.load_topology() here and in the pool workers
+        os.environ["DIAGRAM_TFSTATE"] = os.path.abspath(args.tfstate)
+
+    if args.force:
+        # Read by diagram_cache in this process and inherited by the pool workers
+        os.environ["DIAGRAM_CACHE"] = "0"
+
+    if args.formats:
+        os.environ["DIAGRAM_FORMATS"] = ",".join(dict.fromkeys(args.formats))
+
+    print(f"🎨 {title}...")
+    print("=" * 50)
+
+    try:
+        selected = select_diagrams(diagrams, args.only)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 2
+
+    start = time.perf_counter()
+    if setup:
+        try:
+            setup()
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            return 1
+    results = render_diagrams(selected, workers=args.workers)
+    print_report(results, time.perf_counter() - start)
+    if args.profile_startup:
+        print_startup_profile(results, eager_modules)
+
+    if args.watch:
+        # Imported here: diagram_watch itself builds on this module
+        from diagram_watch import watch_diagrams
+        return watch_diagrams(selected, workers=args.workers, interval=args.interval)
+
+    if any(not result.ok for result in results):
+        print("\nMake sure you have the 'diagrams' library installed:")
+        print("pip install diagrams")
+        print("And Graphviz system dependency:")
+        print("brew install graphviz  # macOS")
+        print("sudo apt-get install graphviz  # Ubuntu/Debian")
+        return 1
+
+    print("\n🎉 All diagrams created successfully!")
+    print("\n📋 Diagram Descriptions:")
+    for spec in selected:
+        if spec.description:
+            print(f"- {spec.name}: {spec.description}")
+    return 0
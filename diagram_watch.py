@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Incremental Watch Mode for the Diagram Scripts
+Polls each diagram's input files and re-renders only the diagrams whose inputs changed
+"""
+
+import glob
+import os
+import sys
+import time
+
+from diagram_renderer import print_report, render_diagrams
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _topology_files():
+    # topology.json (or $DIAGRAM_TOPOLOGY) plus the --tfstate file, when one is in use
+    from topology import DEFAULT_TOPOLOGY_FILE
+    files = [os.environ.get("DIAGRAM_TOPOLOGY", DEFAULT_TOPOLOGY_FILE)]
+    if os.environ.get("DIAGRAM_TFSTATE"):
+        files.append(os.environ["DIAGRAM_TFSTATE"])
+    return files
+
+
+# Inputs shared by the create_* scripts: globs relative to the repository root,
+# or callables returning paths (evaluated on every poll)
+TOPOLOGY_INPUTS = (_topology_files, "terraform/**/*.tf")
+PIPELINE_INPUTS = ("Jenkinsfile",)
+ANSIBLE_INPUTS = ("playbook.yml", "ansible/roles/redis/**/*")
+
+
+def resolve_inputs(inputs, root=ROOT):
+    """Absolute paths currently matched by a spec's inputs"""
+    paths = set()
+    for item in inputs:
+        if callable(item):
+            paths.update(os.path.abspath(path) for path in item())
+        else:
+            pattern = os.path.join(root, item)
+            matches = glob.glob(pattern, recursive=True)
+            # Keep a literal path even while it is missing, so its creation is noticed
+            paths.update(matches or ([] if glob.has_magic(item) else [pattern]))
+    return {path for path in paths if not os.path.isdir(path)}
+
+
+def source_files(root=ROOT):
+    """Python modules loaded from the repository; editing one affects every diagram"""
+    files = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and path.endswith(".py") and os.path.abspath(path).startswith(root + os.sep):
+            files.add(os.path.abspath(path))
+    return files
+
+
+def snapshot(paths):
+    """path -> (mtime_ns, size), or None for a missing file"""
+    state = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            state[path] = None
+    return state
+
+
+def _changed(before, after, ignore_new=()):
+    # ignore_new: modules that were merely imported since the last poll have not changed
+    return {path for path in before.keys() | after.keys()
+            if before.get(path) != after.get(path) and (path in before or path not in ignore_new)}
+
+
+def _display(path, root):
+    return os.path.relpath(path, root) if path.startswith(root + os.sep) else path
+
+
+def _clear_loaded_state():
+    # load_topology() caches per process; drop it so data edits are re-read in this process
+    topology = sys.modules.get("topology")
+    if topology:
+        topology._load_topology.cache_clear()
+
+
+class DiagramWatcher:
+    """Maps changed files to the diagrams that depend on them"""
+
+    def __init__(self, diagrams, root=ROOT):
+        self.diagrams = list(diagrams)
+        self.root = root
+        # Once a module is edited, the copy loaded in this process is out of date for good
+        self.code_changed = False
+
+    def watched(self):
+        inputs = {spec.name: resolve_inputs(spec.inputs, self.root) for spec in self.diagrams}
+        return inputs, source_files(self.root)
+
+    def poll(self):
+        inputs, sources = self.watched()
+        return inputs, sources, snapshot(set().union(sources, *inputs.values()))
+
+    def affected(self, changed, inputs, sources):
+        """Specs to re-render for the changed paths"""
+        if changed & sources:
+            self.code_changed = True
+            return list(self.diagrams)
+        return [spec for spec in self.diagrams if changed & inputs[spec.name]]
+
+
+def watch_diagrams(diagrams, workers=None, interval=0.2, settle=0.05):
+    """Poll until interrupted, re-rendering the diagrams whose inputs changed
+
+    Data changes (topology, Terraform, Jenkinsfile, ...) render in this process,
+    which already has Python, diagrams and Graphviz bindings warm. After a .py
+    module is edited, renders move to freshly spawned workers so the edited code
+    is used; new or removed diagrams still need a restart.
+    """
+    watcher = DiagramWatcher(diagrams)
+    inputs, sources, state = watcher.poll()
+    print(f"\n👀 Watching {len(state)} files for {len(watcher.diagrams)} diagram(s); Ctrl+C to stop")
+
+    try:
+        while True:
+            time.sleep(interval)
+            inputs, sources, current = watcher.poll()
+            changed = _changed(state, current, sources)
+            if not changed:
+                continue
+
+            # Editors often write in several steps; wait until the files stop moving
+            while True:
+                time.sleep(settle)
+                inputs, sources, settled = watcher.poll()
+                if settled == current:
+                    break
+                changed |= _changed(current, settled, sources)
+                current = settled
+            state = current
+
+            specs = watcher.affected(changed, inputs, sources)
+            names = ", ".join(sorted(_display(path, watcher.root) for path in changed))
+            if not specs:
+                print(f"\n🔎 {names} changed; no diagram depends on it")
+                continue
+
+            print(f"\n🔁 {names} changed → {', '.join(spec.name for spec in specs)}")
+            start = time.perf_counter()
+            _clear_loaded_state()
+            if watcher.code_changed:
+                results = render_diagrams(specs, workers=workers, fresh=True)
+            else:
+                results = render_diagrams(specs, workers=1)
+            print_report(results, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    return 0
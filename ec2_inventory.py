@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+EC2 Dynamic Inventory for Ansible
+One describe-instances call for the bastion and Redis nodes, cached on disk with a TTL,
+with bastion_host and the ProxyCommand filled in from the discovered public IP
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("EC2_INVENTORY_CACHE_DIR", os.path.join(ROOT, ".inventory_cache"))
+DEFAULT_REGION = "ap-south-1"
+DEFAULT_TTL = 300
+BASTION_NAME = "redis-public"
+NODE_PREFIX = "redis-private"
+SSH_USER = "ubuntu"
+
+# Instance fields kept in the cache; the rest of the describe-instances reply is dropped
+FIELDS = ("InstanceId", "PrivateIpAddress", "PublicIpAddress")
+
+
+def instance_filters(bastion=BASTION_NAME, prefix=NODE_PREFIX):
+    return [
+        {"Name": "tag:Name", "Values": [bastion, f"{prefix}*"]},
+        {"Name": "instance-state-name", "Values": ["running"]},
+    ]
+
+
+def cache_path(region, filters, cache_dir=CACHE_DIR):
+    key = json.dumps({"region": region, "filters": filters}, sort_keys=True)
+    return os.path.join(cache_dir, f"ec2-{hashlib.sha1(key.encode()).hexdigest()[:16]}.json")
+
+
+def read_cache(path, ttl):
+    """Cached instances if the entry is younger than ttl seconds, else None"""
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("created", 0) > ttl:
+        return None
+    return entry["instances"]
+
+
+def write_cache(path, instances):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write-then-rename: concurrent ansible runs never read a half-written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"created": time.time(), "instances": instances}, f)
+    os.replace(tmp, path)
+
+
+def describe_instances(region, filters):
+    """describe-instances reply via boto3, or the AWS CLI when boto3 is not installed"""
+    try:
+        import boto3
+    except ImportError:
+        command = ["aws", "ec2", "describe-instances", "--region", region, "--output", "json", "--filters"]
+        command += [f"Name={item['Name']},Values={','.join(item['Values'])}" for item in filters]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"aws ec2 describe-instances failed: {completed.stderr.strip()}")
+        return json.loads(completed.stdout)
+
+    paginator = boto3.client("ec2", region_name=region).get_paginator("describe_instances")
+    reservations = []
+    for page in paginator.paginate(Filters=filters):
+        reservations.extend(page["Reservations"])
+    return {"Reservations": reservations}
+
+
+def reduce_instances(response):
+    """[{Name, InstanceId, PrivateIpAddress, PublicIpAddress, AvailabilityZone}] from a reply"""
+    instances = []
+    for reservation in response.get("Reservations", []):
+        for instance in reservation.get("Instances", []):
+            tags = {tag["Key"]: tag["Value"] for tag in instance.get("Tags", [])}
+            item = {field: instance.get(field) for field in FIELDS}
+            item["Name"] = tags.get("Name", instance.get("InstanceId"))
+            item["AvailabilityZone"] = instance.get("Placement", {}).get("AvailabilityZone")
+            instances.append(item)
+    return sorted(instances, key=lambda item: item["Name"])
+
+
+def load_instances(region=DEFAULT_REGION, ttl=DEFAULT_TTL, refresh=False, response_file=None):
+    """Instances from the cache, a recorded reply (response_file) or one AWS call"""
+    if response_file:
+        with open(response_file) as f:
+            return reduce_instances(json.load(f))
+    filters = instance_filters()
+    path = cache_path(region, filters)
+    if not refresh:
+        cached = read_cache(path, ttl)
+        if cached is not None:
+            return cached
+    instances = reduce_instances(describe_instances(region, filters))
+    write_cache(path, instances)
+    return instances
+
+
+def build_inventory(instances, key_file="./redis-infra-key.pem"):
+    """Ansible JSON inventory with the same groups and vars create-inventory.sh writes"""
+    bastion = next((item for item in instances if item["Name"] == BASTION_NAME), None)
+    nodes = [item for item in instances if item["Name"].startswith(NODE_PREFIX)]
+    hostvars = {}
+    inventory = {"_meta": {"hostvars": hostvars},
+                 "all": {"vars": {"ansible_ssh_user": SSH_USER, "ansible_ssh_private_key_file": key_file}},
+                 "redis_nodes": {"hosts": [], "vars": {
+                     "ansible_ssh_private_key_file": key_file,
+                     "ansible_python_interpreter": "/usr/bin/python3"}}}
+
+    ssh_args = "-o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null"
+    if bastion and bastion["PublicIpAddress"]:
+        public_ip = bastion["PublicIpAddress"]
+        inventory["all"]["vars"]["bastion_host"] = public_ip
+        inventory["bastion"] = {"hosts": ["bastion"]}
+        hostvars["bastion"] = {"ansible_host": public_ip, "ansible_user": SSH_USER,
+                               "instance_id": bastion["InstanceId"]}
+        ssh_args += (f' -o ProxyCommand="ssh -W %h:%p -i {key_file} -o StrictHostKeyChecking=no '
+                     f'{SSH_USER}@{public_ip}"')
+    inventory["redis_nodes"]["vars"]["ansible_ssh_common_args"] = ssh_args
+
+    for index, node in enumerate(nodes, 1):
+        name = f"redis-node-{index}"
+        inventory["redis_nodes"]["hosts"].append(name)
+        hostvars[name] = {"ansible_host": node["PrivateIpAddress"], "ansible_user": SSH_USER,
+                          "instance_id": node["InstanceId"], "ec2_name": node["Name"],
+                          "availability_zone": node["AvailabilityZone"]}
+    return inventory
+
+
+def format_ini(inventory):
+    """The same inventory as an INI file, for tools that read inventory.ini"""
+    hostvars = inventory["_meta"]["hostvars"]
+    lines = []
+    for group in ("bastion", "redis_nodes"):
+        if group not in inventory:
+            continue
+        lines.append(f"[{group}]")
+        for host in inventory[group]["hosts"]:
+            settings = " ".join(f"{key}={hostvars[host][key]}" for key in ("ansible_host", "ansible_user"))
+            lines.append(f"{host} {settings}")
+        lines.append("")
+    for group in ("redis_nodes", "all"):
+        lines.append(f"[{group}:vars]")
+        lines.extend(f"{key}={value}" for key, value in inventory[group]["vars"].items())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Ansible dynamic inventory for the Redis EC2 instances")
+    parser.add_argument("--list", action="store_true", help="print the whole inventory (Ansible protocol)")
+    parser.add_argument("--host", help="print one host's variables (Ansible protocol)")
+    parser.add_argument("--ini", metavar="FILE", help="write the inventory as INI to FILE, e.g. inventory.ini")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cache and call AWS")
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION", DEFAULT_REGION),
+                        help="AWS region (default: $AWS_REGION or ap-south-1)")
+    parser.add_argument("--ttl", type=float, default=float(os.environ.get("EC2_INVENTORY_TTL", DEFAULT_TTL)),
+                        help="cache lifetime in seconds (default: $EC2_INVENTORY_TTL or 300)")
+    parser.add_argument("--key-file", default=os.environ.get("EC2_INVENTORY_KEY_FILE", "./redis-infra-key.pem"),
+                        help="SSH private key used for the nodes and the bastion hop")
+    parser.add_argument("--response", default=os.environ.get("EC2_INVENTORY_RESPONSE"), metavar="FILE",
+                        help="use a recorded describe-instances JSON reply instead of AWS")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        instances = load_instances(args.region, args.ttl, args.refresh, args.response)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    inventory = build_inventory(instances, args.key_file)
+
+    if args.ini:
+        with open(args.ini, "w") as f:
+            f.write(format_ini(inventory))
+        print(f"✅ Inventory written to {args.ini} ({len(inventory['redis_nodes']['hosts'])} Redis nodes, "
+              f"bastion {inventory['all']['vars'].get('bastion_host', 'not found')})", file=sys.stderr)
+    if args.host:
+        print(json.dumps(inventory["_meta"]["hostvars"].get(args.host, {}), indent=2))
+    elif args.list or not args.ini:
+        print(json.dumps(inventory, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
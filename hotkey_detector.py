@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Redis Hot-Key Detector
+Samples command traffic with MONITOR on every master and keeps a Count-Min Sketch plus a top-K heap
+in fixed memory, reporting the hottest keys and how unevenly the load falls on slots and nodes
+"""
+
+import argparse
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import random
+import re
+import sys
+import time
+
+from redis_cluster import KEYLESS_COMMANDS, ClusterClient
+from redis_inventory import add_target_arguments, target_addresses
+from redis_protocol import CLUSTER_SLOTS, RedisConnection, RedisError, key_slot
+
+# Commands whose every argument is a key, and those alternating key / value
+ALL_KEYS = frozenset((b"MGET", b"DEL", b"UNLINK", b"EXISTS", b"TOUCH", b"WATCH", b"SINTER", b"SUNION", b"SDIFF",
+                      b"PFCOUNT"))
+KEY_VALUE_PAIRS = frozenset((b"MSET", b"MSETNX"))
+# Scripts and functions: name / body, numkeys, then that many keys
+NUMKEYS_COMMANDS = frozenset((b"EVAL", b"EVALSHA", b"EVAL_RO", b"EVALSHA_RO", b"FCALL", b"FCALL_RO"))
+# Connection and transaction commands MONITOR shows that touch no key
+NO_KEYS = KEYLESS_COMMANDS | frozenset((b"AUTH", b"SELECT", b"MULTI", b"EXEC", b"DISCARD", b"HELLO", b"QUIT",
+                                        b"READONLY", b"READWRITE", b"ASKING", b"UNWATCH", b"WAIT", b"SUBSCRIBE",
+                                        b"PUBLISH"))
+
+_MONITOR_LINE = re.compile(r'^(\d+\.\d+) \[(\d+) ([^\]]*)\] (.*)$')
+_ESCAPES = {"n": b"\n", "r": b"\r", "t": b"\t", "a": b"\a", "b": b"\b", '"': b'"', "\\": b"\\"}
+
+
+def parse_monitor_line(line):
+    """'1697500000.123 [0 10.0.1.5:50412] "GET" "k"' -> (timestamp, client, [b'GET', b'k']), None if not one"""
+    match = _MONITOR_LINE.match(line)
+    if not match:
+        return None
+    timestamp, _db, client, rest = match.groups()
+    args = []
+    position = 0
+    while True:
+        position = rest.find('"', position)
+        if position == -1:
+            break
+        position += 1
+        arg = bytearray()
+        while position < len(rest) and rest[position] != '"':
+            char = rest[position]
+            if char == "\\" and position + 1 < len(rest):
+                escape = rest[position + 1]
+                if escape == "x" and position + 3 < len(rest):
+                    arg.append(int(rest[position + 2:position + 4], 16))
+                    position += 4
+                    continue
+                arg += _ESCAPES.get(escape, escape.encode())
+                position += 2
+                continue
+            arg += char.encode("utf-8")
+            position += 1
+        args.append(bytes(arg))
+        position += 1
+    return float(timestamp), client, args
+
+
+def command_keys(args):
+    """The keys a command touches, from its name and arguments"""
+    if not args:
+        return []
+    name = args[0].upper()
+    if name in NO_KEYS or len(args) < 2:
+        return []
+    if name in ALL_KEYS:
+        return args[1:]
+    if name in KEY_VALUE_PAIRS:
+        return args[1::2]
+    if name in NUMKEYS_COMMANDS:
+        try:
+            return args[3:3 + int(args[2])]
+        except (ValueError, IndexError):
+            return []
+    return args[1:2]
+
+
+class CountMinSketch:
+    """Approximate counts in depth x width counters; overestimates by at most e/width of the total
+    with probability 1 - e^-depth. Conservative update only raises the counters that are at the minimum."""
+
+    __slots__ = ("width", "depth", "rows", "total")
+
+    def __init__(self, width=2048, depth=5):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    @classmethod
+    def for_error(cls, epsilon=0.001, delta=0.001):
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        """Count key and return its new estimate"""
+        columns = self._columns(key)
+        estimate = min(row[column] for row, column in zip(self.rows, columns)) + count
+        for row, column in zip(self.rows, columns):
+            if row[column] < estimate:
+                row[column] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, key):
+        return min(row[column] for row, column in zip(self.rows, self._columns(key)))
+
+    @property
+    def error(self):
+        """Largest overcount expected for any key"""
+        return math.e / self.width * self.total
+
+
+class TopK:
+    """The k keys with the highest estimates seen so far; the heap is rebuilt when stale entries pile up"""
+
+    __slots__ = ("k", "counts", "_heap")
+
+    def __init__(self, k=50):
+        self.k = k
+        self.counts = {}
+        self._heap = []
+
+    def _minimum(self):
+        while self._heap:
+            count, key = self._heap[0]
+            if self.counts.get(key) == count:
+                return count, key
+            heapq.heappop(self._heap)
+        return None
+
+    def offer(self, key, estimate):
+        if key in self.counts:
+            self.counts[key] = estimate
+        elif len(self.counts) < self.k:
+            self.counts[key] = estimate
+        else:
+            count, smallest = self._minimum()
+            if estimate <= count:
+                return
+            heapq.heappop(self._heap)
+            del self.counts[smallest]
+            self.counts[key] = estimate
+        heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(count, key) for key, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def items(self):
+        return sorted(self.counts.items(), key=lambda item: -item[1])
+
+
+class TrafficStats:
+    """Sampled key accesses per key (sketch + top-K), per slot and per node; all of fixed size"""
+
+    __slots__ = ("sketch", "top", "slots", "nodes", "commands", "sample_rate", "seconds")
+
+    def __init__(self, sketch, top, sample_rate=1.0):
+        self.sketch = sketch
+        self.top = top
+        self.slots = [0] * CLUSTER_SLOTS
+        self.nodes = {}
+        self.commands = {}
+        self.sample_rate = sample_rate
+        self.seconds = 0.0
+
+    def add(self, node, args):
+        keys = command_keys(args)
+        if not keys:
+            return
+        name = args[0].upper().decode("ascii", "replace")
+        self.commands[name] = self.commands.get(name, 0) + len(keys)
+        self.nodes[node] = self.nodes.get(node, 0) + len(keys)
+        for key in keys:
+            self.slots[key_slot(key)] += 1
+            self.top.offer(key, self.sketch.add(key))
+
+
+class HotKeyDetector:
+    """One MONITOR connection per master, sampling lines into shared TrafficStats"""
+
+    def __init__(self, client, stats, window=10.0, every=None, seed=None):
+        self.client = client
+        self.stats = stats
+        self.window = window
+        self.every = every or window
+        self.random = random.Random(seed)
+        self.lines = 0
+        self.errors = {}
+
+    async def _monitor(self, address, seconds):
+        node = f"{address[0]}:{address[1]}"
+        connection = await RedisConnection.open(*address, timeout=self.client.timeout)
+        try:
+            await connection.execute("MONITOR")
+            deadline = time.monotonic() + seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    line = await asyncio.wait_for(connection.read_reply(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self.lines += 1
+                if self.stats.sample_rate < 1.0 and self.random.random() >= self.stats.sample_rate:
+                    continue
+                parsed = parse_monitor_line(line) if isinstance(line, str) else None
+                if parsed:
+                    self.stats.add(node, parsed[2])
+        finally:
+            # MONITOR cannot be turned off; closing the connection is the only way out
+            await connection.close()
+
+    async def _window(self):
+        masters = self.client.masters
+        start = time.monotonic()
+        try:
+            results = await asyncio.gather(*(self._monitor(address, self.window) for address in masters),
+                                           return_exceptions=True)
+        finally:
+            self.stats.seconds += time.monotonic() - start
+        for address, result in zip(masters, results):
+            if isinstance(result, (OSError, RedisError, ConnectionError, asyncio.TimeoutError)):
+                self.errors[f"{address[0]}:{address[1]}"] = str(result) or type(result).__name__
+            elif isinstance(result, BaseException):
+                raise result
+
+    async def run(self, duration, progress=True):
+        """MONITOR for `window` seconds every `every` seconds, as many windows as fit in duration"""
+        await self.client.refresh()
+        start = time.monotonic()
+        windows = max(1, int(duration // self.every))
+        for window in range(windows):
+            await self._window()
+            if progress:
+                hottest = self.stats.top.items()[:1]
+                print(f"  ⏱️  {time.monotonic() - start:>5.0f}s  {self.lines} commands seen, "
+                      f"{self.stats.sketch.total} key accesses sampled"
+                      + (f", hottest {_text(hottest[0][0])} ({hottest[0][1]})" if hottest else ""))
+            if window + 1 < windows:
+                await asyncio.sleep(self.every - self.window)
+                await self.client.refresh()
+
+
+def _text(key):
+    return key.decode("utf-8", "backslashreplace")
+
+
+def skew(values):
+    """max / mean of the values (1.0 is perfectly even)"""
+    values = list(values)
+    mean = sum(values) / len(values) if values else 0
+    return max(values) / mean if mean else 0.0
+
+
+def build_report(stats, owners, masters, top=20, top_slots=10):
+    scale = 1.0 / stats.sample_rate
+    seconds = stats.seconds or 1.0
+    node_names = [f"{host}:{port}" for host, port in masters]
+    node_counts = {node: stats.nodes.get(node, 0) for node in node_names}
+    total = sum(node_counts.values()) or 1
+    busiest = max(node_counts.values()) if node_counts else 0
+
+    def owner(slot):
+        address = owners[slot] if owners else None
+        return f"{address[0]}:{address[1]}" if address else None
+
+    keys = []
+    for key, estimate in stats.top.items()[:top]:
+        slot = key_slot(key)
+        node = owner(slot)
+        keys.append({
+            "key": _text(key), "slot": slot, "node": node, "accesses": estimate,
+            "per_second": estimate * scale / seconds,
+            "node_share": estimate / node_counts[node] if node_counts.get(node) else None,
+        })
+    slots = sorted(range(CLUSTER_SLOTS), key=lambda slot: -stats.slots[slot])[:top_slots]
+    # Slot skew over the slots that saw traffic; a hot slot among idle ones is what matters
+    active = [count for count in stats.slots if count]
+    return {
+        "seconds": stats.seconds,
+        "sample_rate": stats.sample_rate,
+        "accesses": stats.sketch.total,
+        "sketch": {"width": stats.sketch.width, "depth": stats.sketch.depth,
+                   "max_overcount": round(stats.sketch.error, 1)},
+        "nodes": [{"node": node, "accesses": count, "per_second": count * scale / seconds, "share": count / total}
+                  for node, count in sorted(node_counts.items(), key=lambda item: -item[1])],
+        "node_skew": skew(node_counts.values()),
+        "busiest_node_share": busiest / total,
+        "slot_skew": skew(active),
+        "slots": [{"slot": slot, "node": owner(slot), "accesses": stats.slots[slot],
+                   "share": stats.slots[slot] / total} for slot in slots if stats.slots[slot]],
+        "commands": dict(sorted(stats.commands.items(), key=lambda item: -item[1])),
+        "keys": keys,
+    }
+
+
+def print_report(report):
+    print("=" * 50)
+    print(f"🔥 {report['accesses']} key accesses sampled over {report['seconds']:.0f}s of MONITOR "
+          f"(sample rate {report['sample_rate']:g}; counts may be up to "
+          f"{report['sketch']['max_overcount']:.0f} high)")
+    print("=" * 50)
+    print(f"\n🖥️  Nodes (skew {report['node_skew']:.2f}x, 1.00 is even)")
+    for node in report["nodes"]:
+        bar = "█" * int(round(node["share"] * 30))
+        print(f"  {node['node']:<21}  {node['per_second']:>9.0f}/s  {node['share']:>6.1%}  {bar}")
+
+    print(f"\n🎯 Hottest slots (skew over active slots {report['slot_skew']:.1f}x)")
+    for slot in report["slots"]:
+        print(f"  slot {slot['slot']:>5}  {slot['node'] or '?':<21}  {slot['accesses']:>9}  {slot['share']:>6.1%}")
+
+    print("\n🔑 Hottest keys")
+    for key in report["keys"]:
+        share = f"{key['node_share']:.1%} of its node" if key["node_share"] is not None else ""
+        print(f"  {key['per_second']:>9.0f}/s  {key['key']}  (slot {key['slot']}, {key['node'] or '?'}) {share}")
+
+    hottest = report["keys"][0] if report["keys"] else None
+    if hottest and hottest["node_share"] and hottest["node_share"] >= 0.2:
+        print(f"\n⚠️  {hottest['key']} alone is {hottest['node_share']:.0%} of {hottest['node']}'s traffic; "
+              f"consider caching it client-side or splitting it across slots")
+    elif report["busiest_node_share"] > 1.5 / max(len(report["nodes"]), 1):
+        print("\n⚠️  Load is uneven across nodes; check the hottest slots before resharding")
+    else:
+        print("\n✅ No single key or slot dominates a node")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Find hot keys and slot/node load skew with sampled MONITOR")
+    add_target_arguments(parser, "watch the cluster this node belongs to instead of the inventory")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="seconds to watch (default: 30)")
+    parser.add_argument("--window", type=float, default=10.0,
+                        help="seconds MONITOR stays on per cycle (default: 10)")
+    parser.add_argument("--every", type=float,
+                        help="seconds between the start of MONITOR windows; above --window it limits the "
+                             "MONITOR overhead to window/every of the time (default: continuous)")
+    parser.add_argument("--sample", type=float, default=1.0,
+                        help="fraction of monitored commands counted (default: 1.0)")
+    parser.add_argument("--epsilon", type=float, default=0.001,
+                        help="sketch error as a fraction of all accesses (default: 0.001)")
+    parser.add_argument("--delta", type=float, default=0.001,
+                        help="probability a count exceeds that error (default: 0.001)")
+    parser.add_argument("--top", type=int, default=20, help="hot keys to track and list (default: 20)")
+    parser.add_argument("--top-slots", type=int, default=10, help="hottest slots to list (default: 10)")
+    parser.add_argument("--json", metavar="FILE", help="also write the report to FILE as JSON")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible sampling")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.every and args.every < args.window:
+        print("❌ --every must be at least --window")
+        return 1
+    print("🔥 Redis hot-key detector")
+    print("=" * 50)
+    try:
+        addresses = target_addresses(args)
+    except (OSError, KeyError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    stats = TrafficStats(CountMinSketch.for_error(args.epsilon, args.delta), TopK(args.top), args.sample)
+    client = ClusterClient(addresses, max_connections=1)
+    detector = HotKeyDetector(client, stats, min(args.window, args.duration), args.every, args.seed)
+    print(f"📡 MONITOR {detector.window:g}s every {detector.every:g}s for {args.duration:g}s "
+          "(MONITOR costs the server throughput while it is on)")
+
+    async def run():
+        try:
+            await detector.run(args.duration)
+        finally:
+            await client.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; reporting what was sampled so far")
+    except (OSError, ConnectionError, RedisError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    for node, error in detector.errors.items():
+        print(f"❌ {node}: {error}")
+    report = build_report(stats, client.owners, client.masters, args.top, args.top_slots)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"💾 Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Jenkins Stage Duration Statistics
+Aggregates per-stage p50/p95/p99 durations from Jenkins `wfapi/describe` (or `wfapi/runs`) JSON exports
+"""
+
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+# Stages or builds still running have no final duration yet
+UNFINISHED = ("NOT_EXECUTED", "IN_PROGRESS", "PAUSED_PENDING_INPUT")
+
+# wfapi status -> Blue Ocean diagram status
+STATUS_MAP = {
+    "SUCCESS": "success",
+    "IN_PROGRESS": "running",
+    "PAUSED_PENDING_INPUT": "running",
+    "FAILED": "failed",
+    "UNSTABLE": "failed",
+    "ABORTED": "failed",
+    "NOT_EXECUTED": "pending",
+}
+
+
+class StageStats:
+    """Duration distribution of one pipeline stage across builds"""
+
+    __slots__ = ("name", "durations", "statuses")
+
+    def __init__(self, name):
+        self.name = name
+        self.durations = []
+        self.statuses = []
+
+    @property
+    def count(self):
+        return len(self.durations)
+
+    @property
+    def failures(self):
+        return sum(1 for status in self.statuses if STATUS_MAP.get(status) == "failed")
+
+    @property
+    def last_status(self):
+        return STATUS_MAP.get(self.statuses[-1], "pending") if self.statuses else "pending"
+
+    def percentile(self, q):
+        """Duration in milliseconds at percentile q (0 when the stage never ran)"""
+        if not self.durations:
+            return 0.0
+        return float(np.percentile(np.asarray(self.durations, dtype=float), q))
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+
+def _export_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*.json")))
+        else:
+            yield path
+
+
+def load_builds(paths):
+    """Read builds from wfapi exports; each file holds one describe object or a runs list"""
+    builds = []
+    for path in _export_files(paths):
+        with open(path) as f:
+            data = json.load(f)
+        for build in data if isinstance(data, list) else [data]:
+            if "stages" not in build:
+                raise ValueError(f"{path}: not a wfapi/describe export (no 'stages')")
+            builds.append(build)
+
+    # Oldest first, so "last status" means the most recent build; same build exported twice counts once
+    unique = {}
+    for build in builds:
+        unique[(build.get("id"), build.get("startTimeMillis"))] = build
+    return sorted(unique.values(), key=lambda build: build.get("startTimeMillis", 0))
+
+
+def aggregate_stages(builds):
+    """One StageStats per stage name, in pipeline order
+
+    Stages keep the position they first appear at, so stages added in later
+    builds slot in after their predecessor instead of going to the end.
+    """
+    stats = {}
+    order = []
+    for build in builds:
+        previous = None
+        for stage in build["stages"]:
+            name = stage["name"]
+            if name not in stats:
+                stats[name] = StageStats(name)
+                order.insert(order.index(previous) + 1 if previous else 0, name)
+            previous = name
+
+            status = stage.get("status", "")
+            stats[name].statuses.append(status)
+            # Skipped stages report 0ms and running ones a partial time; both would skew the percentiles
+            if status not in UNFINISHED:
+                stats[name].durations.append(stage.get("durationMillis", 0) - stage.get("pauseDurationMillis", 0))
+    return [stats[name] for name in order]
+
+
+def build_summary(builds):
+    """Build count, success count and p50/p95 of total build duration (ms)"""
+    durations = np.asarray([build.get("durationMillis", 0) for build in builds
+                            if build.get("status") not in UNFINISHED], dtype=float)
+    succeeded = sum(1 for build in builds if build.get("status") == "SUCCESS")
+    p50, p95 = np.percentile(durations, (50, 95)) if len(durations) else (0.0, 0.0)
+    return {"builds": len(builds), "succeeded": succeeded, "p50": float(p50), "p95": float(p95)}
+
+
+def format_duration(millis):
+    """Jenkins-style short duration, e.g. 15s, 2m 30s, 1h 5m"""
+    seconds = int(round(millis / 1000.0))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s" if seconds else f"{minutes}m"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m" if minutes else f"{hours}h"
+
+
+def flow_stages(stats):
+    """Stage dicts for create_blue_ocean_flow(), carrying the percentiles for the heatmap"""
+    return [
+        {
+            "name": stage.name,
+            "status": stage.last_status,
+            "time": f"p50 {format_duration(stage.p50)}\np95 {format_duration(stage.p95)}\n"
+                    f"p99 {format_duration(stage.p99)}",
+            "p50": stage.p50,
+            "p95": stage.p95,
+            "p99": stage.p99,
+        }
+        for stage in stats
+    ]
+
+
+def main(argv=None):
+    """Print the per-stage duration table, slowest p95 first"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python jenkins_stage_stats.py <wfapi export.json | directory> ...")
+        return 2
+
+    missing = [path for path in argv if not os.path.exists(path)]
+    if missing:
+        print(f"❌ File not found: {', '.join(missing)}")
+        return 1
+
+    builds = load_builds(argv)
+    stats = aggregate_stages(builds)
+    summary = build_summary(builds)
+    total_p50 = sum(stage.p50 for stage in stats) or 1.0
+
+    print(f"📊 {summary['builds']} builds, {summary['succeeded']} succeeded, "
+          f"build p50 {format_duration(summary['p50'])}, p95 {format_duration(summary['p95'])}")
+    width = max((len(stage.name) for stage in stats), default=0)
+    print(f"  {'stage':<{width}}  {'runs':>4}  {'p50':>8}  {'p95':>8}  {'p99':>8}  {'share':>5}  fail")
+    for stage in sorted(stats, key=lambda stage: -stage.p95):
+        print(f"  {stage.name:<{width}}  {stage.count:>4}  {format_duration(stage.p50):>8}  "
+              f"{format_duration(stage.p95):>8}  {format_duration(stage.p99):>8}  "
+              f"{stage.p50 / total_p50:>5.0%}  {stage.failures}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
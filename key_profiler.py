@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Live Redis Key-Pattern Profiler
+SCANs every master in parallel with an adaptive COUNT, samples MEMORY USAGE / PTTL / TYPE in pipelines
+and builds a key-pattern tree, backing off whenever a node's CPU, ops/sec or probe p99 exceeds the budget.
+The probe PINGs from a worker process, so it times the server and not this process's event loop
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import random
+import re
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from latency_histogram import LatencyHistogram
+from redis_cluster import ClusterClient
+from redis_inventory import add_target_arguments, target_addresses
+from redis_protocol import RedisError, parse_info
+
+# Segment shapes collapsed into one pattern, tried in order
+SEGMENT_SHAPES = (
+    (re.compile(r"^\d+$"), "#"),
+    (re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"), "<uuid>"),
+    (re.compile(r"^(?=.*\d)[0-9a-fA-F]{16,}$"), "<hex>"),
+)
+_DIGITS = re.compile(r"\d+")
+# Children a pattern node keeps before further distinct segments are folded into '*'
+MAX_CHILDREN = 100
+PROBE_INTERVAL = 0.05
+# Seconds of probing a worker reports back at a time
+PROBE_WINDOW = 0.5
+# The worker process's probe sockets, by node address
+_probe_sockets = {}
+
+
+def key_segments(key, separators, depth):
+    """'user:42:cart' -> ['user:', '#:', 'cart'] (each segment keeps its separator), at most depth deep"""
+    pattern = "([" + re.escape(separators) + "])"
+    parts = re.split(pattern, key)
+    segments = []
+    for index in range(0, len(parts), 2):
+        segment = parts[index]
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        if not segment and not separator:
+            break
+        for shape, replacement in SEGMENT_SHAPES:
+            if shape.match(segment):
+                segment = replacement
+                break
+        else:
+            segment = _DIGITS.sub("#", segment)
+        if len(segments) == depth:
+            segments[-1] += "*"
+            break
+        segments.append(segment + separator)
+    return segments
+
+
+def probe_round_trips(address, seconds, interval=PROBE_INTERVAL, timeout=5.0):
+    """PING the node every interval for seconds on a blocking socket; the round trips, in seconds
+
+    Runs in a worker process: a reply that arrives while the scanner's event loop is busy parsing
+    SCAN pages would otherwise be timed as server latency.
+    """
+    sock = _probe_sockets.get(address)
+    if sock is None:
+        sock = _probe_sockets[address] = socket.create_connection(address, timeout)
+    round_trips = []
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            sock.sendall(b"PING\r\n")
+            reply = b""
+            while not reply.endswith(b"\r\n"):
+                data = sock.recv(64)
+                if not data:
+                    raise ConnectionError(f"{address[0]}:{address[1]} closed the probe connection")
+                reply += data
+            round_trips.append(time.perf_counter() - start)
+            time.sleep(interval)
+    except OSError:
+        _probe_sockets.pop(address).close()
+        raise
+    return round_trips
+
+
+class PatternNode:
+    """Keys under one pattern prefix: exact counts from SCAN, memory and TTL from the sampled keys"""
+
+    __slots__ = ("keys", "sampled", "memory", "sizes", "ttls", "persistent", "types", "children")
+
+    def __init__(self):
+        self.keys = 0
+        self.sampled = 0
+        self.memory = 0
+        self.sizes = LatencyHistogram()
+        self.ttls = LatencyHistogram()
+        self.persistent = 0
+        self.types = {}
+        self.children = {}
+
+    def child(self, segment):
+        node = self.children.get(segment)
+        if node is None:
+            if len(self.children) >= MAX_CHILDREN:
+                segment = "*"
+                node = self.children.get(segment)
+            if node is None:
+                node = self.children[segment] = PatternNode()
+        return node
+
+    def estimated_memory(self):
+        """Sampled memory scaled up to every key scanned under the pattern"""
+        return self.memory * self.keys / self.sampled if self.sampled else 0
+
+    def walk(self, prefix="", depth=1):
+        """Yield (pattern, depth, node) depth first, biggest estimated memory first"""
+        for segment, node in sorted(self.children.items(), key=lambda item: -item[1].estimated_memory()):
+            yield prefix + segment, depth, node
+            yield from node.walk(prefix + segment, depth + 1)
+
+
+class KeyProfile:
+    """The pattern tree plus the biggest sampled keys"""
+
+    __slots__ = ("root", "separators", "depth", "biggest", "top")
+
+    def __init__(self, separators=":/", depth=3, top=20):
+        self.root = PatternNode()
+        self.separators = separators
+        self.depth = depth
+        self.biggest = []
+        self.top = top
+
+    def _path(self, key):
+        nodes = [self.root]
+        for segment in key_segments(key, self.separators, self.depth):
+            nodes.append(nodes[-1].child(segment))
+        return nodes
+
+    def add_scanned(self, key):
+        for node in self._path(key):
+            node.keys += 1
+
+    def add_sample(self, key, node_name, memory, pttl, type_name):
+        for node in self._path(key):
+            node.sampled += 1
+            node.memory += memory
+            node.sizes.record(memory)
+            if pttl < 0:
+                node.persistent += 1
+            else:
+                node.ttls.record(pttl // 1000)
+            node.types[type_name] = node.types.get(type_name, 0) + 1
+        item = (memory, key, node_name, type_name)
+        if len(self.biggest) < self.top:
+            heapq.heappush(self.biggest, item)
+        elif memory > self.biggest[0][0]:
+            heapq.heapreplace(self.biggest, item)
+
+
+class Budget:
+    """Limits on the load a node may be under while it is scanned"""
+
+    __slots__ = ("max_cpu", "ops_rise", "p99_factor", "max_p99_ms")
+
+    def __init__(self, max_cpu=0.5, ops_rise=0.25, p99_factor=2.0, max_p99_ms=5.0):
+        self.max_cpu = max_cpu
+        self.ops_rise = ops_rise
+        self.p99_factor = p99_factor
+        self.max_p99_ms = max_p99_ms
+
+
+class NodeScan:
+    """Scan state and throttle of one master
+
+    COUNT grows while SCAN calls stay under the target time and halves when they exceed it.
+    Every check interval the node's CPU, the other clients' ops/sec and the p99 of a PING probe
+    (sent from a worker process, see probe_round_trips) are compared with the budget. When any is over, COUNT and its ceiling halve and the pause
+    between batches doubles; both recover once a whole interval is back under budget.
+    """
+
+    __slots__ = ("address", "count", "ceiling", "min_count", "max_count", "pause", "max_pause", "cursor", "done",
+                 "scanned", "sampled", "commands", "started", "elapsed", "throttled", "backoffs", "reason",
+                 "probes", "baseline_ops", "baseline_p99", "_last_info", "_last_check", "_last_commands",
+                 "error")
+
+    def __init__(self, address, count=100, min_count=10, max_count=5000, max_pause=2.0):
+        self.address = address
+        self.count = count
+        self.ceiling = max_count
+        self.min_count = min_count
+        self.max_count = max_count
+        self.pause = 0.0
+        self.max_pause = max_pause
+        self.cursor = b"0"
+        self.done = False
+        self.scanned = 0
+        self.sampled = 0
+        self.commands = 0
+        self.started = None
+        self.elapsed = 0.0
+        self.throttled = 0.0
+        self.backoffs = 0
+        self.reason = None
+        self.probes = []
+        self.baseline_ops = None
+        self.baseline_p99 = None
+        self._last_info = None
+        self._last_check = None
+        self._last_commands = 0
+        self.error = None
+
+    @property
+    def node(self):
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def probe_p99(self):
+        """p99 of the probe round trips since the last check, in milliseconds"""
+        if not self.probes:
+            return 0.0
+        histogram = LatencyHistogram()
+        for seconds in self.probes:
+            histogram.record_seconds(seconds)
+        return histogram.percentile(99) / 1000.0
+
+    def adapt_count(self, seconds, target):
+        """Tune COUNT so one SCAN call costs about target seconds"""
+        if seconds > target:
+            self.count = max(self.min_count, self.count // 2)
+        elif seconds < target / 2:
+            self.count = min(self.ceiling, int(self.count * 1.5) + 1)
+
+    def check(self, info, now, budget):
+        """Compare the load since the last check with the budget; returns the reason when over it"""
+        p99 = self.probe_p99()
+        self.probes = []
+        previous, self._last_info = self._last_info, info
+        last_check, self._last_check = self._last_check, now
+        ours, self._last_commands = self.commands - self._last_commands, self.commands
+        if previous is None:
+            return None
+        window = max(now - last_check, 1e-6)
+        cpu = (float(info["used_cpu_sys"]) + float(info["used_cpu_user"])
+               - float(previous["used_cpu_sys"]) - float(previous["used_cpu_user"])) / window
+        # Our own SCAN, MEMORY USAGE and probe commands are not the production traffic we yield to
+        others = max(0.0, (int(info["total_commands_processed"])
+                           - int(previous["total_commands_processed"]) - ours) / window)
+        if self.baseline_ops is None:
+            self.baseline_ops, self.baseline_p99 = others, p99
+            return None
+
+        reason = None
+        if cpu > budget.max_cpu:
+            reason = f"cpu {cpu:.0%}"
+        elif others > self.baseline_ops * (1 + budget.ops_rise) + 100:
+            reason = f"ops/sec {others:.0f} (baseline {self.baseline_ops:.0f})"
+        elif p99 > max(self.baseline_p99 * budget.p99_factor, budget.max_p99_ms):
+            reason = f"p99 {p99:.2f}ms (baseline {self.baseline_p99:.2f}ms)"
+
+        if reason:
+            self.ceiling = self.count = max(self.min_count, self.count // 2)
+            self.pause = min(self.max_pause, max(0.05, self.pause * 2))
+            self.backoffs += 1
+        else:
+            self.ceiling = min(self.max_count, self.ceiling * 2)
+            self.pause = self.pause / 2 if self.pause >= 0.01 else 0.0
+        self.reason = reason
+        return reason
+
+
+class Profiler:
+    """Scans all masters concurrently, each within its own budget"""
+
+    def __init__(self, client, profile, budget, sample_rate=0.05, target_ms=2.0, check_interval=1.0,
+                 memory_samples=5, count=100, max_count=5000, match=None, progress=True):
+        self.client = client
+        self.profile = profile
+        self.budget = budget
+        self.sample_rate = sample_rate
+        self.target = target_ms / 1000.0
+        self.check_interval = check_interval
+        self.memory_samples = memory_samples
+        self.initial_count = count
+        self.max_count = max_count
+        self.match = match
+        self.progress = progress
+        self.scans = []
+        self.probe_pool = None
+
+    async def _probe(self, scan):
+        """Collect the worker's PING round trips, the latency other clients get, until the scan is done"""
+        loop = asyncio.get_running_loop()
+        while not scan.done:
+            round_trips = await loop.run_in_executor(self.probe_pool, probe_round_trips, scan.address,
+                                                     PROBE_WINDOW, PROBE_INTERVAL, self.client.timeout)
+            scan.probes += round_trips
+            scan.commands += len(round_trips)
+
+    async def _check(self, connection, scan):
+        info = parse_info(await connection.execute("INFO"))
+        scan.commands += 1
+        reason = scan.check(info, time.monotonic(), self.budget)
+        if reason and self.progress:
+            print(f"  🐌 {scan.node}: over budget ({reason}), COUNT {scan.count}, pause {scan.pause:.2f}s")
+        return reason
+
+    async def _scan_node(self, scan):
+        async with self.client.pool(scan.address).connection() as connection:
+            # The first check starts the measurement window; the second sets the baseline
+            await self._check(connection, scan)
+            await asyncio.sleep(self.check_interval)
+            await self._check(connection, scan)
+            scan.started = time.monotonic()
+            next_check = scan.started + self.check_interval
+            while not scan.done:
+                command = [b"SCAN", scan.cursor, b"COUNT", scan.count]
+                if self.match:
+                    command += [b"MATCH", self.match]
+                start = time.perf_counter()
+                scan.cursor, keys = await connection.execute(*command)
+                scan.adapt_count(time.perf_counter() - start, self.target)
+                scan.commands += 1
+                scan.scanned += len(keys)
+                scan.done = scan.cursor == b"0"
+
+                texts = [key.decode("utf-8", "backslashreplace") for key in keys]
+                for text in texts:
+                    self.profile.add_scanned(text)
+                sample = [index for index in range(len(keys)) if random.random() < self.sample_rate]
+                if sample:
+                    commands = []
+                    for index in sample:
+                        commands += [(b"MEMORY", b"USAGE", keys[index], b"SAMPLES", self.memory_samples),
+                                     (b"PTTL", keys[index]), (b"TYPE", keys[index])]
+                    replies = await connection.pipeline(commands)
+                    scan.commands += len(commands)
+                    for position, index in enumerate(sample):
+                        memory, pttl, type_name = replies[3 * position:3 * position + 3]
+                        if isinstance(memory, RedisError) or memory is None or pttl == -2:
+                            continue  # deleted or expired between SCAN and the sample
+                        self.profile.add_sample(texts[index], scan.node, memory, pttl,
+                                                type_name if isinstance(type_name, str) else type_name.decode())
+                        scan.sampled += 1
+
+                now = time.monotonic()
+                if now >= next_check:
+                    await self._check(connection, scan)
+                    next_check = now + self.check_interval
+                if scan.pause and not scan.done:
+                    scan.throttled += scan.pause
+                    await asyncio.sleep(scan.pause)
+            scan.elapsed = time.monotonic() - scan.started
+
+    async def _run_node(self, scan):
+        probe = asyncio.ensure_future(self._probe(scan))
+        try:
+            await self._scan_node(scan)
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            scan.error = str(e) or type(e).__name__
+        finally:
+            scan.done = True
+            try:
+                await probe
+            except (OSError, asyncio.TimeoutError, RedisError):
+                pass
+
+    async def run(self):
+        await self.client.refresh()
+        self.scans = [NodeScan(address, self.initial_count, max_count=self.max_count)
+                      for address in self.client.masters]
+        # One probe worker per master; Ctrl-C is left to this process, which reports what was scanned
+        with ProcessPoolExecutor(len(self.scans), initializer=signal.signal,
+                                 initargs=(signal.SIGINT, signal.SIG_IGN)) as self.probe_pool:
+            await asyncio.gather(*(self._run_node(scan) for scan in self.scans))
+        return self.scans
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def format_ttl(seconds):
+    for size, unit in ((86400, "d"), (3600, "h"), (60, "m")):
+        if seconds >= size:
+            return f"{seconds / size:.1f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def build_report(profile, scans, min_share=0.01):
+    total = profile.root.estimated_memory() or 1
+    patterns = []
+    for pattern, depth, node in profile.root.walk():
+        if node.estimated_memory() < min_share * total and node.keys < min_share * profile.root.keys:
+            continue
+        patterns.append({
+            "pattern": pattern,
+            "depth": depth,
+            "keys": node.keys,
+            "sampled": node.sampled,
+            "memory": round(node.estimated_memory()),
+            "size_p50": node.sizes.percentile(50) if node.sampled else None,
+            "size_p99": node.sizes.percentile(99) if node.sampled else None,
+            "size_max": node.sizes.max if node.sampled else None,
+            "with_ttl": node.sampled - node.persistent,
+            "ttl_p50": node.ttls.percentile(50) if node.ttls.total else None,
+            "types": dict(sorted(node.types.items(), key=lambda item: -item[1])),
+        })
+    return {
+        "keys": profile.root.keys,
+        "sampled": profile.root.sampled,
+        "memory": round(profile.root.estimated_memory()),
+        "nodes": [{"node": scan.node, "scanned": scan.scanned, "sampled": scan.sampled, "seconds": scan.elapsed,
+                   "final_count": scan.count, "backoffs": scan.backoffs, "throttled_seconds": scan.throttled,
+                   "error": scan.error} for scan in scans],
+        "patterns": patterns,
+        "biggest": [{"key": key, "node": node, "type": type_name, "memory": memory}
+                    for memory, key, node, type_name in sorted(profile.biggest, reverse=True)],
+    }
+
+
+def print_report(report):
+    print("=" * 50)
+    print(f"🔑 {report['keys']} keys scanned, {report['sampled']} sampled, "
+          f"~{format_bytes(report['memory'])} estimated")
+    for node in report["nodes"]:
+        if node["error"]:
+            print(f"  ❌ {node['node']}: {node['error']}")
+            continue
+        print(f"  🖥️  {node['node']}: {node['scanned']} keys in {node['seconds']:.1f}s, "
+              f"COUNT ended at {node['final_count']}, {node['backoffs']} backoffs "
+              f"({node['throttled_seconds']:.1f}s paused)")
+    print("=" * 50)
+
+    total = report["memory"] or 1
+    width = max((2 * (row["depth"] - 1) + len(row["pattern"]) for row in report["patterns"]), default=7)
+    print(f"  {'pattern':<{width}}  {'keys':>9}  {'memory':>10}  {'share':>6}  {'p50':>9}  {'max':>9}  "
+          f"{'TTL':>9}  types")
+    for row in report["patterns"]:
+        label = "  " * (row["depth"] - 1) + row["pattern"]
+        sizes = (f"{format_bytes(row['size_p50']):>9}  {format_bytes(row['size_max']):>9}" if row["sampled"]
+                 else f"{'-':>9}  {'-':>9}")
+        ttl = "-" if not row["sampled"] else (f"{row['with_ttl'] / row['sampled']:.0%}"
+                                              + (f" {format_ttl(row['ttl_p50'])}" if row["ttl_p50"] is not None
+                                                 else ""))
+        types = ", ".join(row["types"])
+        print(f"  {label:<{width}}  {row['keys']:>9}  {format_bytes(row['memory']):>10}  "
+              f"{row['memory'] / total:>6.1%}  {sizes}  {ttl:>9}  {types}")
+
+    print("\n🐘 Biggest sampled keys")
+    for item in report["biggest"]:
+        print(f"  {format_bytes(item['memory']):>10}  {item['key']}  ({item['type']}, {item['node']})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Profile key patterns on a live Redis cluster with SCAN")
+    add_target_arguments(parser, "profile the cluster this node belongs to instead of the inventory")
+    parser.add_argument("--match", help="only keys matching this SCAN MATCH pattern")
+    parser.add_argument("--separators", default=":/", help="characters that split key segments (default: ':/')")
+    parser.add_argument("--depth", type=int, default=3, help="pattern tree depth (default: 3)")
+    parser.add_argument("--sample", type=float, default=0.05,
+                        help="fraction of scanned keys sampled with MEMORY USAGE (default: 0.05)")
+    parser.add_argument("--memory-samples", type=int, default=5,
+                        help="elements MEMORY USAGE samples in collections (default: 5)")
+    parser.add_argument("--count", type=int, default=100, help="initial SCAN COUNT (default: 100)")
+    parser.add_argument("--max-count", type=int, default=5000, help="largest SCAN COUNT (default: 5000)")
+    parser.add_argument("--target-ms", type=float, default=2.0,
+                        help="round trip one SCAN call should take; COUNT adapts to it (default: 2)")
+    parser.add_argument("--max-cpu", type=float, default=0.5,
+                        help="back off while the node uses more than this many cores (default: 0.5)")
+    parser.add_argument("--ops-rise", type=float, default=0.25,
+                        help="back off while other clients' ops/sec is this much above the baseline (default: 0.25)")
+    parser.add_argument("--p99-factor", type=float, default=2.0,
+                        help="back off while probe p99 exceeds this multiple of the baseline (default: 2)")
+    parser.add_argument("--max-p99-ms", type=float, default=5.0,
+                        help="...and this many milliseconds (default: 5)")
+    parser.add_argument("--check-interval", type=float, default=1.0, help="seconds between budget checks (default: 1)")
+    parser.add_argument("--min-share", type=float, default=0.01,
+                        help="hide patterns below this share of keys and memory (default: 0.01)")
+    parser.add_argument("--top", type=int, default=20, help="biggest keys to list (default: 20)")
+    parser.add_argument("--json", metavar="FILE", help="also write the report to FILE as JSON")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible sampling")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    print("🔍 Redis key-pattern profiler")
+    print("=" * 50)
+    try:
+        addresses = target_addresses(args)
+    except (OSError, KeyError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    profile = KeyProfile(args.separators, args.depth, args.top)
+    budget = Budget(args.max_cpu, args.ops_rise, args.p99_factor, args.max_p99_ms)
+    # One connection scans; the probe has its own socket in a worker process
+    profiler = Profiler(ClusterClient(addresses, max_connections=1), profile, budget, args.sample, args.target_ms,
+                        args.check_interval, args.memory_samples, args.count, args.max_count, args.match)
+
+    async def run():
+        try:
+            return await profiler.run()
+        finally:
+            await profiler.client.close()
+
+    try:
+        scans = asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; reporting the keys scanned so far")
+        scans = profiler.scans
+    except (OSError, ConnectionError, RedisError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    report = build_report(profile, scans, args.min_share)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"💾 Report written to {args.json}")
+    return 0 if not any(scan.error for scan in scans) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
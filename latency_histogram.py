@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+HDR-Style Latency Histogram
+Log-linear buckets with bounded relative error, so p99/p99.9 stay accurate without storing every sample
+"""
+
+import math
+
+# 2**SUB_BUCKET_BITS linear sub-buckets per power of two: values are kept to within 1/128 (<1%)
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+def bucket_index(value):
+    """Bucket for a non-negative integer value (microseconds in practice)"""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def bucket_range(index):
+    """(lowest, highest) value that falls into bucket index"""
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    sub = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return sub << shift, ((sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Counts of latencies in microseconds; percentiles report the bucket's highest value like HdrHistogram"""
+
+    __slots__ = ("counts", "total", "min", "max", "sum")
+
+    def __init__(self):
+        self.counts = []
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def record(self, micros, count=1):
+        value = max(0, int(micros))
+        index = bucket_index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.total += count
+        self.sum += value * count
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def record_seconds(self, seconds, count=1):
+        self.record(seconds * 1e6, count)
+
+    def merge(self, other):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        return self
+
+    def percentile(self, q):
+        """Latency (µs) at or below which q percent of the samples fall"""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(self.total * q / 100.0))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(bucket_range(index)[1], self.max)
+        return self.max
+
+    def percentiles(self, qs=(50, 90, 99, 99.9)):
+        return {q: self.percentile(q) for q in qs}
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    def reset(self):
+        self.__init__()
+
+    def to_dict(self, qs=(50, 90, 99, 99.9)):
+        """Summary in milliseconds for reports and JSON output"""
+        summary = {"count": self.total, "mean_ms": self.mean / 1000.0,
+                   "min_ms": (self.min or 0) / 1000.0, "max_ms": self.max / 1000.0}
+        for q, micros in self.percentiles(qs).items():
+            summary[f"p{q:g}_ms"] = micros / 1000.0
+        return summary
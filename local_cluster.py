@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Local Redis Cluster for Offline Testing
+Spawns redis-server processes in cluster mode on localhost and joins them into a working cluster
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+
+from redis_protocol import RedisConnection, RedisError
+
+
+async def wait_for_ping(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection = await RedisConnection.open(host, port, timeout=1.0)
+            try:
+                if await connection.execute("PING") == "PONG":
+                    return
+            finally:
+                await connection.close()
+        except (OSError, RedisError, asyncio.TimeoutError):
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"redis-server on {host}:{port} did not answer PING within {timeout:.0f}s")
+        await asyncio.sleep(0.05)
+
+
+class LocalCluster:
+    """redis-server processes on consecutive localhost ports, one cluster master each
+
+    Usable as `async with LocalCluster(3) as cluster:`; cluster.addresses lists (host, port).
+    """
+
+    def __init__(self, nodes=3, base_port=7000, redis_server=None, form=True, host="127.0.0.1"):
+        self.host = host
+        self.ports = [base_port + index for index in range(nodes)]
+        self.redis_server = redis_server or os.environ.get("REDIS_SERVER") or shutil.which("redis-server")
+        self.form = form
+        self.workdir = None
+        self.processes = []
+
+    @property
+    def addresses(self):
+        return [(self.host, port) for port in self.ports]
+
+    def spawn(self, port):
+        """Start one more cluster-enabled redis-server (not yet part of the cluster)"""
+        node_dir = os.path.join(self.workdir, str(port))
+        os.makedirs(node_dir, exist_ok=True)
+        command = [self.redis_server, "--port", str(port), "--bind", self.host,
+                   "--cluster-enabled", "yes", "--cluster-config-file", "nodes.conf",
+                   "--cluster-node-timeout", "5000", "--dir", node_dir,
+                   "--save", "", "--appendonly", "no", "--protected-mode", "no",
+                   "--logfile", os.path.join(node_dir, "redis.log")]
+        self.processes.append(subprocess.Popen(command, stdout=subprocess.DEVNULL,
+                                               stderr=subprocess.DEVNULL))
+        if port not in self.ports:
+            self.ports.append(port)
+
+    async def start(self):
+        if not self.redis_server:
+            raise FileNotFoundError("redis-server not found; install Redis or set $REDIS_SERVER")
+        self.workdir = tempfile.mkdtemp(prefix="redis-cluster-")
+        for port in list(self.ports):
+            self.spawn(port)
+        try:
+            await asyncio.gather(*(wait_for_ping(host, port) for host, port in self.addresses))
+            if self.form:
+                from redis_cluster_admin import ClusterAdmin
+                admin = ClusterAdmin(self.addresses)
+                try:
+                    await admin.create()
+                finally:
+                    await admin.close()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def stop(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+async def _serve(args):
+    cluster = LocalCluster(args.nodes, args.port, args.redis_server, form=not args.no_form)
+    await cluster.start()
+    print(f"🚀 Local Redis cluster with {args.nodes} nodes:")
+    for host, port in cluster.addresses:
+        print(f"   {host}:{port}")
+    print("Press Ctrl+C to stop")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        cluster.stop()
+        print("\n🧹 Cluster stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a throwaway Redis cluster on localhost")
+    parser.add_argument("-n", "--nodes", type=int, default=3, help="number of master nodes (default: 3)")
+    parser.add_argument("-p", "--port", type=int, default=7000, help="first port (default: 7000)")
+    parser.add_argument("--redis-server", help="redis-server binary (default: $REDIS_SERVER or PATH)")
+    parser.add_argument("--no-form", action="store_true",
+                        help="start the nodes with no slots assigned, as the playbooks leave them")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except (FileNotFoundError, TimeoutError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Batched Matplotlib Drawing Backend for Pipeline Diagrams
+Builds stage markers, boxes, connectors and arrows as NumPy arrays and draws each kind as one collection
+"""
+
+import math
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.collections import EllipseCollection, LineCollection, PathCollection
+from matplotlib.path import Path
+
+STATUS_COLORS = {
+    'success': '#4CAF50',
+    'running': '#FF9800',
+    'pending': '#E0E0E0',
+    'failed': '#F44336',
+}
+
+STATUS_GLYPHS = {
+    'success': '✓',
+    'running': '⟳',
+    'failed': '✗',
+}
+
+IDLE_CONNECTOR = '#E0E0E0'
+
+
+def stage_positions(count, left, right):
+    """Evenly spaced stage centres between left and right (inclusive)"""
+    if count == 1:
+        return np.array([(left + right) / 2.0])
+    return np.linspace(left, right, count)
+
+
+def stage_radius(x, max_radius=0.4, fill=0.35):
+    """Marker radius that keeps neighbouring stages from overlapping"""
+    if len(x) < 2:
+        return max_radius
+    return min(max_radius, fill * float(np.min(np.diff(x))))
+
+
+def label_stride(x, min_gap):
+    """Draw every n-th label so labels stay at least min_gap apart"""
+    if len(x) < 2:
+        return 1
+    spacing = float(np.min(np.diff(x)))
+    return max(1, math.ceil(min_gap / spacing)) if spacing > 0 else len(x)
+
+
+def status_colors(statuses, palette=STATUS_COLORS):
+    return np.array([palette[status] for status in statuses])
+
+
+def heat_colors(values, cmap='YlOrRd', floor=0.15):
+    """RGBA colours for values scaled against their maximum; floor keeps the smallest visible"""
+    values = np.asarray(values, dtype=float)
+    peak = values.max() if len(values) and values.max() > 0 else 1.0
+    return colormaps[cmap](floor + (1.0 - floor) * values / peak)
+
+
+def fit_fontsize(ax, labels, width, max_size, char_width=0.6):
+    """Largest font size (<= max_size) at which every label fits in width data units"""
+    longest = max((len(line) for label in labels for line in str(label).split('\n')), default=0)
+    if not longest:
+        return max_size
+    x0, x1 = ax.get_xlim()
+    points_per_unit = ax.bbox.width / abs(x1 - x0) * 72.0 / ax.figure.dpi
+    return min(max_size, width * points_per_unit / (char_width * longest))
+
+
+def split_label(label):
+    """Break a label at the space nearest its middle, e.g. 'Terraform\\nApply/Destroy'"""
+    spaces = [i for i, char in enumerate(label) if char == ' ']
+    if not spaces:
+        return label
+    cut = min(spaces, key=lambda i: abs(i - len(label) / 2))
+    return label[:cut] + '\n' + label[cut + 1:]
+
+
+def draw_stage_markers(ax, x, y, radius, colors, edgecolor='white', linewidth=3, zorder=3):
+    """One EllipseCollection for all stage circles, sized in data units like Circle patches"""
+    x = np.asarray(x, dtype=float)
+    offsets = np.column_stack([x, np.broadcast_to(np.asarray(y, dtype=float), x.shape)])
+    diameter = np.full(len(x), 2.0 * radius)
+    markers = EllipseCollection(diameter, diameter, np.zeros(len(x)), units='xy',
+                                offsets=offsets, offset_transform=ax.transData,
+                                facecolors=colors, edgecolors=edgecolor,
+                                linewidths=linewidth, zorder=zorder)
+    ax.add_collection(markers)
+    return markers
+
+
+def draw_status_icons(ax, x, y, statuses, fontsize=16, color='white', glyphs=STATUS_GLYPHS, zorder=4):
+    """One scatter call per glyph (not per stage) for the status icons inside the markers"""
+    x = np.asarray(x, dtype=float)
+    y = np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+    statuses = np.asarray(statuses)
+    artists = []
+    for status, glyph in glyphs.items():
+        mask = statuses == status
+        if mask.any():
+            artists.append(ax.scatter(x[mask], y[mask], s=fontsize ** 2, marker=f'${glyph}$',
+                                      c=color, linewidths=0, zorder=zorder))
+    return artists
+
+
+def connector_segments(x, y, radius):
+    """Segments joining the edge of each stage marker to the next one, shape (n-1, 2, 2)"""
+    x = np.asarray(x, dtype=float)
+    y = np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+    segments = np.empty((max(len(x) - 1, 0), 2, 2))
+    segments[:, 0, 0] = x[:-1] + radius
+    segments[:, 0, 1] = y[:-1]
+    segments[:, 1, 0] = x[1:] - radius
+    segments[:, 1, 1] = y[1:]
+    return segments
+
+
+def draw_connectors(ax, segments, colors, linewidth=4, zorder=2):
+    lines = LineCollection(segments, colors=colors, linewidths=linewidth, zorder=zorder)
+    ax.add_collection(lines)
+    return lines
+
+
+def rounded_box_vertices(x, y, width, height, pad, arc_points=8):
+    """Outlines of round-cornered boxes matching FancyBboxPatch(boxstyle="round,pad=pad")
+
+    Returns an (n, 4 * arc_points + 1, 2) array; the last vertex closes each outline.
+    """
+    x, y, width, height = (np.atleast_1d(np.asarray(value, dtype=float))
+                           for value in (x, y, width, height))
+    x, y, width, height = np.broadcast_arrays(x, y, width, height)
+    left, bottom = x - pad, y - pad
+    right, top = x + width + pad, y + height + pad
+
+    # Corner centres in counter-clockwise order starting top-right, shape (n, 4)
+    cx = np.stack([right - pad, left + pad, left + pad, right - pad], axis=1)
+    cy = np.stack([top - pad, top - pad, bottom + pad, bottom + pad], axis=1)
+    quarter = np.linspace(0.0, np.pi / 2, arc_points)
+    angles = np.concatenate([quarter + k * np.pi / 2 for k in range(4)])
+
+    vx = np.repeat(cx, arc_points, axis=1) + pad * np.cos(angles)
+    vy = np.repeat(cy, arc_points, axis=1) + pad * np.sin(angles)
+    vertices = np.stack([vx, vy], axis=2)
+    return np.concatenate([vertices, vertices[:, :1]], axis=1)
+
+
+def draw_boxes(ax, x, y, width, height, facecolors, edgecolors='black', linewidth=1, pad=0.1, zorder=1):
+    """One PathCollection for many rounded boxes; (x, y) is each box's lower-left corner"""
+    vertices = rounded_box_vertices(x, y, width, height, pad)
+    codes = np.full(vertices.shape[1], Path.LINETO, dtype=Path.code_type)
+    codes[0] = Path.MOVETO
+    codes[-1] = Path.CLOSEPOLY
+    boxes = PathCollection([Path(outline, codes) for outline in vertices],
+                           facecolors=facecolors, edgecolors=edgecolors,
+                           linewidths=linewidth, zorder=zorder)
+    ax.add_collection(boxes)
+    return boxes
+
+
+def arrow_segments(starts, ends, head_length=0.25, head_angle=30):
+    """Shaft and open '->' head strokes for each arrow, shape (3n, 2, 2)"""
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    direction = ends - starts
+    length = np.hypot(direction[:, 0], direction[:, 1])[:, None]
+    unit = direction / np.where(length == 0, 1.0, length)
+
+    spread = np.radians(head_angle)
+    cos, sin = np.cos(spread), np.sin(spread)
+    back = -unit
+    # Rotate the reversed direction by +/- head_angle to get the two barbs
+    barb_a = np.column_stack([back[:, 0] * cos - back[:, 1] * sin, back[:, 0] * sin + back[:, 1] * cos])
+    barb_b = np.column_stack([back[:, 0] * cos + back[:, 1] * sin, -back[:, 0] * sin + back[:, 1] * cos])
+
+    segments = np.empty((len(starts), 3, 2, 2))
+    segments[:, 0, 0], segments[:, 0, 1] = starts, ends
+    segments[:, 1, 0], segments[:, 1, 1] = ends, ends + head_length * barb_a
+    segments[:, 2, 0], segments[:, 2, 1] = ends, ends + head_length * barb_b
+    return segments.reshape(-1, 2, 2)
+
+
+def draw_arrows(ax, starts, ends, color='#333', linewidth=2, head_length=0.25, zorder=2):
+    """One LineCollection holding every arrow shaft and head"""
+    lines = LineCollection(arrow_segments(starts, ends, head_length), colors=color,
+                           linewidths=linewidth, capstyle='round', zorder=zorder)
+    ax.add_collection(lines)
+    return lines
+
+
+def draw_labels(ax, x, y, labels, stride=1, **text_kwargs):
+    """Text labels for every stride-th position; text is the one per-artist cost left"""
+    return [ax.text(xi, y, label, **text_kwargs)
+            for xi, label in zip(np.asarray(x)[::stride], list(labels)[::stride])]
+
+
+def draw_pipeline(ax, stages, y, left, right, max_radius=0.4, min_label_gap=1.2, colors=None):
+    """Draw a left-to-right stage pipeline with batched markers, icons and connectors
+
+    stages is a sequence of dicts with 'name', 'status' and 'time'; an explicit 'x'
+    on every stage overrides the even spacing. colors replaces the status colours
+    of the markers (e.g. heat_colors() of stage durations). Returns the stage x positions.
+    """
+    if all('x' in stage for stage in stages):
+        x = np.array([stage['x'] for stage in stages], dtype=float)
+    else:
+        x = stage_positions(len(stages), left, right)
+    statuses = [stage['status'] for stage in stages]
+    fill = status_colors(statuses)
+    radius = stage_radius(x, max_radius)
+    scale = radius / max_radius
+
+    # Completed stages keep their colour on the outgoing connector, the rest are greyed out
+    connector_colors = np.where(np.asarray(statuses[:-1]) == 'success', fill[:-1], IDLE_CONNECTOR)
+    draw_connectors(ax, connector_segments(x, y, radius), connector_colors, linewidth=max(1.0, 4 * scale))
+    if colors is None:
+        draw_stage_markers(ax, x, y, radius, fill, linewidth=max(0.5, 3 * scale))
+        draw_status_icons(ax, x, y, statuses, fontsize=max(4.0, 16 * scale))
+    else:
+        # Custom fill: the status moves to the marker ring and the icons go dark for contrast
+        draw_stage_markers(ax, x, y, radius, colors, edgecolor=fill, linewidth=max(0.5, 3 * scale))
+        draw_status_icons(ax, x, y, statuses, fontsize=max(4.0, 16 * scale), color='#333333')
+
+    stride = label_stride(x, min_label_gap)
+    names = [stage['name'] for stage in stages][::stride]
+    times = [stage['time'] for stage in stages][::stride]
+    slot = min_label_gap if len(x) < 2 else float(np.min(np.diff(x))) * stride
+    name_size = fit_fontsize(ax, names, 0.95 * slot, 11)
+    if name_size < 8:
+        names = [split_label(name) for name in names]
+        name_size = fit_fontsize(ax, names, 0.95 * slot, 11)
+    draw_labels(ax, x[::stride], y - 0.55, names, fontsize=name_size, fontweight='bold',
+                ha='center', va='top', linespacing=1.0, color='black')
+    draw_labels(ax, x[::stride], y - 0.95, times,
+                fontsize=fit_fontsize(ax, times, 0.95 * slot, 9), ha='center', va='top', color='gray')
+    return x
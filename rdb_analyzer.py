@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Offline RDB Keyspace Analyzer
+Streams dump.rdb snapshots through mmap and reports estimated memory per key prefix, type and TTL,
+plus the biggest keys; databases (and large databases in chunks) are analyzed on all cores
+"""
+
+import argparse
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Opcodes that precede or separate key records
+OP_SLOT_INFO = 0xF4
+OP_FUNCTION2 = 0xF5
+OP_FUNCTION_PRE_GA = 0xF6
+OP_MODULE_AUX = 0xF7
+OP_IDLE = 0xF8
+OP_FREQ = 0xF9
+OP_AUX = 0xFA
+OP_RESIZEDB = 0xFB
+OP_EXPIRETIME_MS = 0xFC
+OP_EXPIRETIME = 0xFD
+OP_SELECTDB = 0xFE
+OP_EOF = 0xFF
+
+# RDB value type -> (Redis type, encoding)
+RDB_TYPES = {
+    0: ("string", "string"),
+    1: ("list", "linkedlist"),
+    2: ("set", "hashtable"),
+    3: ("zset", "skiplist"),
+    4: ("hash", "hashtable"),
+    5: ("zset", "skiplist"),
+    6: ("module", "module"),
+    7: ("module", "module"),
+    9: ("hash", "zipmap"),
+    10: ("list", "ziplist"),
+    11: ("set", "intset"),
+    12: ("zset", "ziplist"),
+    13: ("hash", "ziplist"),
+    14: ("list", "quicklist"),
+    15: ("stream", "listpacks"),
+    16: ("hash", "listpack"),
+    17: ("zset", "listpack"),
+    18: ("list", "quicklist"),
+    19: ("stream", "listpacks"),
+    20: ("set", "listpack"),
+    21: ("stream", "listpacks"),
+    22: ("hash", "hashtable"),
+    23: ("hash", "listpack"),
+    24: ("hash", "hashtable"),
+    25: ("hash", "listpack"),
+}
+
+# Upper bounds (seconds) of the TTL buckets, relative to the snapshot time
+TTL_BUCKETS = ((60, "< 1m"), (3600, "< 1h"), (86400, "< 1d"), (7 * 86400, "< 7d"), (30 * 86400, "< 30d"))
+
+_DIGITS = re.compile(r"\d+")
+
+
+class RdbError(Exception):
+    pass
+
+
+def malloc_size(size):
+    """Bytes jemalloc really hands out for a request: 16-byte steps, then four classes per power of two"""
+    if size <= 8:
+        return 8
+    if size <= 128:
+        return (size + 15) & ~15
+    step = (1 << (size - 1).bit_length()) // 8
+    return (size + step - 1) // step * step
+
+
+def sds_size(length):
+    """Allocation of an sds string: header + data + terminator"""
+    header = 2 if length < 32 else 4 if length < 256 else 6 if length < 65536 else 10
+    return malloc_size(length + header)
+
+
+ROBJ = 16
+DICT_ENTRY = malloc_size(24)
+SKIPLIST_NODE = malloc_size(48)
+
+
+def dict_size(count):
+    """Hash table buckets (a power of two, at least 4) plus the dict itself"""
+    buckets = 1 << max(2, (count - 1).bit_length())
+    return malloc_size(8 * buckets) + malloc_size(56)
+
+
+def string_value_size(length, is_int):
+    if is_int:
+        return ROBJ
+    if length <= 44:
+        return malloc_size(ROBJ + 4 + length)  # embstr: object and sds in one allocation
+    return ROBJ + sds_size(length)
+
+
+def lzf_decompress(data, length, limit=None):
+    """Decompress an LZF block (liblzf format); stop after limit output bytes when given"""
+    limit = length if limit is None else min(limit, length)
+    out = bytearray()
+    position = 0
+    while position < len(data) and len(out) < limit:
+        control = data[position]
+        position += 1
+        if control < 32:
+            run = control + 1
+            out += data[position:position + run]
+            position += run
+            continue
+        size = control >> 5
+        if size == 7:
+            size += data[position]
+            position += 1
+        reference = len(out) - ((control & 0x1F) << 8) - data[position] - 1
+        position += 1
+        size += 2
+        if reference < 0:
+            raise RdbError("corrupt LZF data")
+        if reference + size <= len(out):
+            out += out[reference:reference + size]
+        else:
+            for index in range(size):  # overlapping copy repeats the pattern
+                out.append(out[reference + index])
+    return bytes(out[:limit])
+
+
+class RdbParser:
+    """Walks the records of a memory-mapped RDB file without materializing values"""
+
+    def __init__(self, data, position=0, db=0):
+        self.data = data
+        self.pos = position
+        self.db = db
+        self.version = None
+        self.aux = {}
+        self.end = None
+
+    def read_header(self):
+        magic = bytes(self.data[:9])
+        if len(magic) < 9 or magic[:5] != b"REDIS" or not magic[5:].isdigit():
+            raise RdbError("not an RDB file (missing REDIS magic)")
+        self.version = int(magic[5:])
+        self.pos = 9
+        return self.version
+
+    def _raw(self, size):
+        start = self.pos
+        self.pos += size
+        if self.pos > len(self.data):
+            raise RdbError(f"truncated at offset {start}")
+        return start
+
+    def length(self):
+        """(value, is_special_encoding) of a length field"""
+        first = self.data[self._raw(1)]
+        kind = first >> 6
+        if kind == 0:
+            return first & 0x3F, False
+        if kind == 1:
+            return (first & 0x3F) << 8 | self.data[self._raw(1)], False
+        if first == 0x80:
+            return struct.unpack_from(">I", self.data, self._raw(4))[0], False
+        if first == 0x81:
+            return struct.unpack_from(">Q", self.data, self._raw(8))[0], False
+        if kind == 3:
+            return first & 0x3F, True
+        raise RdbError(f"bad length byte {first:#x} at offset {self.pos - 1}")
+
+    def string_span(self):
+        """(raw length, offset, stored length, form) of a string; form is None, 'int' or 'lzf'"""
+        length, special = self.length()
+        if not special:
+            return length, self._raw(length), length, None
+        if length in (0, 1, 2):
+            size = 1 << length
+            offset = self._raw(size)
+            value = int.from_bytes(self.data[offset:offset + size], "little", signed=True)
+            return len(str(value)), offset, size, "int"
+        if length == 3:
+            stored, _ = self.length()
+            raw, _ = self.length()
+            return raw, self._raw(stored), stored, "lzf"
+        raise RdbError(f"unknown string encoding {length} at offset {self.pos - 1}")
+
+    def string(self):
+        """The string's bytes (integers as decimal text, LZF decompressed)"""
+        raw, offset, stored, form = self.string_span()
+        if form is None:
+            return bytes(self.data[offset:offset + stored])
+        if form == "int":
+            return str(int.from_bytes(self.data[offset:offset + stored], "little", signed=True)).encode()
+        return lzf_decompress(self.data[offset:offset + stored], raw)
+
+    def skip_string(self):
+        """(raw length, is integer) without copying the string"""
+        raw, _, _, form = self.string_span()
+        return raw, form == "int"
+
+    def blob(self, head):
+        """(raw length, first `head` bytes) of a serialized ziplist / listpack / intset"""
+        raw, offset, stored, form = self.string_span()
+        if form == "lzf":
+            return raw, lzf_decompress(self.data[offset:offset + stored], raw, head)
+        return raw, bytes(self.data[offset:offset + min(head, stored)])
+
+    def _module_opcodes(self):
+        while True:
+            opcode, _ = self.length()
+            if opcode == 0:
+                return
+            if opcode in (1, 2):
+                self.length()
+            elif opcode == 3:
+                self._raw(4)
+            elif opcode == 4:
+                self._raw(8)
+            elif opcode == 5:
+                self.skip_string()
+            else:
+                raise RdbError(f"unknown module opcode {opcode}")
+
+    def value(self, rdb_type):
+        """(estimated memory, element count) of the value that follows, leaving pos after it"""
+        if rdb_type == 0:
+            length, is_int = self.skip_string()
+            return string_value_size(length, is_int), 1
+        if rdb_type in (2, 4, 1):
+            count, _ = self.length()
+            memory = dict_size(count) if rdb_type != 1 else malloc_size(48)
+            per_entry = DICT_ENTRY if rdb_type != 1 else malloc_size(24) + ROBJ
+            for _ in range(count):
+                memory += per_entry + sds_size(self.skip_string()[0])
+                if rdb_type == 4:
+                    memory += sds_size(self.skip_string()[0])
+            return memory, count
+        if rdb_type in (3, 5):
+            count, _ = self.length()
+            memory = dict_size(count) + malloc_size(32 + 32 * 16)
+            for _ in range(count):
+                memory += DICT_ENTRY + SKIPLIST_NODE + sds_size(self.skip_string()[0])
+                if rdb_type == 5:
+                    self._raw(8)
+                else:
+                    size = self.data[self._raw(1)]
+                    if size < 253:
+                        self._raw(size)
+            return memory, count
+        if rdb_type in (9, 10, 11, 12, 13, 16, 17, 20):
+            raw, head = self.blob(10)
+            return ROBJ + malloc_size(raw), compact_count(rdb_type, head)
+        if rdb_type in (23, 25):
+            if rdb_type == 25:
+                self._raw(8)  # minimum field expire time
+            raw, head = self.blob(6)
+            return ROBJ + malloc_size(raw), compact_count(rdb_type, head)
+        if rdb_type in (14, 18):
+            nodes, _ = self.length()
+            memory, count = ROBJ + malloc_size(40), 0
+            for _ in range(nodes):
+                container = 2
+                if rdb_type == 18:
+                    container, _ = self.length()
+                raw, head = self.blob(10)
+                memory += malloc_size(32) + malloc_size(raw)
+                count += 1 if container == 1 else compact_count(10 if rdb_type == 14 else 17, head, pairs=False)
+            return memory, count
+        if rdb_type in (15, 19, 21):
+            return self._stream(rdb_type)
+        if rdb_type in (22, 24):
+            if rdb_type == 24:
+                self._raw(8)
+            count, _ = self.length()
+            memory = dict_size(count)
+            for _ in range(count):
+                self.length()  # field TTL
+                memory += DICT_ENTRY + sds_size(self.skip_string()[0]) + sds_size(self.skip_string()[0]) + 8
+            return memory, count
+        if rdb_type == 7:
+            start = self.pos
+            self.length()  # module id
+            self._module_opcodes()
+            return ROBJ + self.pos - start, 1
+        if rdb_type == 6:
+            raise RdbError("module values in the pre-RDB 8 format cannot be skipped without the module")
+        raise RdbError(f"unknown value type {rdb_type} at offset {self.pos - 1}")
+
+    def _stream(self, rdb_type):
+        nodes, _ = self.length()
+        memory = ROBJ + malloc_size(64)
+        for _ in range(nodes):
+            self.skip_string()  # master entry ID
+            raw, _ = self.blob(0)
+            memory += malloc_size(raw) + malloc_size(48)  # listpack + its radix tree node
+        items, _ = self.length()
+        self.length(), self.length()  # last ID
+        if rdb_type >= 19:
+            for _ in range(5):  # first ID, max deleted ID, entries added
+                self.length()
+        groups, _ = self.length()
+        for _ in range(groups):
+            memory += malloc_size(64) + sds_size(self.skip_string()[0])
+            self.length(), self.length()  # last delivered ID
+            if rdb_type >= 19:
+                self.length()  # entries read
+            pending, _ = self.length()
+            for _ in range(pending):
+                self._raw(16 + 8)  # ID, delivery time
+                self.length()  # delivery count
+            memory += pending * malloc_size(64)
+            consumers, _ = self.length()
+            for _ in range(consumers):
+                memory += malloc_size(48) + sds_size(self.skip_string()[0])
+                self._raw(16 if rdb_type >= 21 else 8)  # seen (and active) time
+                owned, _ = self.length()
+                self._raw(16 * owned)
+        return memory, items
+
+    def records(self, decode_keys=True, end=None):
+        """Yield (offset, db, key, rdb type, expire ms, memory, elements) per key until EOF or `end`
+
+        The offset is where the key's record starts, including its expire/LRU/LFU prefix, so a
+        later parser can resume there. Keys are None when decode_keys is false.
+        """
+        data = self.data
+        while end is None or self.pos < end:
+            start = self.pos
+            expire = None
+            while True:
+                opcode = data[self._raw(1)]
+                if opcode == OP_EXPIRETIME_MS:
+                    expire = struct.unpack_from("<q", data, self._raw(8))[0]
+                elif opcode == OP_EXPIRETIME:
+                    expire = struct.unpack_from("<i", data, self._raw(4))[0] * 1000
+                elif opcode == OP_FREQ:
+                    self._raw(1)
+                elif opcode == OP_IDLE:
+                    self.length()
+                else:
+                    break
+
+            if opcode == OP_EOF:
+                self.end = self.pos
+                return
+            if opcode == OP_SELECTDB:
+                self.db, _ = self.length()
+            elif opcode == OP_RESIZEDB:
+                self.length(), self.length()
+            elif opcode == OP_AUX:
+                name = self.string().decode("utf-8", "replace")
+                self.aux[name] = self.string().decode("utf-8", "replace")
+            elif opcode == OP_MODULE_AUX:
+                self.length(), self.length(), self.length()  # module id, when opcode, when
+                self._module_opcodes()
+            elif opcode == OP_FUNCTION2:
+                self.skip_string()
+            elif opcode == OP_SLOT_INFO:
+                self.length(), self.length(), self.length()
+            elif opcode == OP_FUNCTION_PRE_GA:
+                raise RdbError("Redis 7.0 release-candidate function records are not supported")
+            else:
+                if decode_keys:
+                    key = self.string()
+                    key_memory = sds_size(len(key))
+                else:
+                    key = None
+                    key_memory = sds_size(self.skip_string()[0])
+                memory, elements = self.value(opcode)
+                memory += DICT_ENTRY + key_memory + (DICT_ENTRY if expire is not None else 0)
+                yield start, self.db, key, opcode, expire, memory, elements
+
+
+def compact_count(rdb_type, head, pairs=True):
+    """Element count from the header of a compact encoding (None when the header does not say)"""
+    if rdb_type == 11:
+        count = struct.unpack_from("<I", head, 4)[0] if len(head) >= 8 else None
+    elif rdb_type == 9:
+        count = head[0] if head and head[0] < 254 else None  # zipmaps count pairs already
+    elif rdb_type in (10, 12, 13):
+        count = struct.unpack_from("<H", head, 8)[0] if len(head) >= 10 else None
+        count = None if count == 0xFFFF else count
+    else:
+        count = struct.unpack_from("<H", head, 4)[0] if len(head) >= 6 else None
+        count = None if count == 0xFFFF else count
+    if count is None or not pairs:
+        return count
+    if rdb_type in (12, 13, 16, 17):
+        return count // 2
+    if rdb_type in (23, 25):
+        return count // 3
+    return count
+
+
+def key_prefix(key, separator=":", depth=1):
+    """'user:42:profile' -> 'user:*'; keys without the separator group by their digit-free shape"""
+    parts = key.split(separator, depth)
+    if len(parts) > depth:
+        return separator.join(parts[:depth]) + separator + "*"
+    return _DIGITS.sub("#", key)
+
+
+def ttl_bucket(expire_ms, snapshot_ms):
+    if expire_ms is None:
+        return "no TTL"
+    remaining = (expire_ms - snapshot_ms) / 1000.0
+    if remaining <= 0:
+        return "expired"
+    for limit, label in TTL_BUCKETS:
+        if remaining < limit:
+            return label
+    return ">= 30d"
+
+
+class KeyspaceStats:
+    """Estimated memory by type, prefix, TTL and database, plus the biggest keys; merges across chunks"""
+
+    __slots__ = ("keys", "memory", "types", "prefixes", "ttls", "dbs", "biggest", "top", "max_prefixes")
+
+    def __init__(self, top=20, max_prefixes=10000):
+        self.keys = 0
+        self.memory = 0
+        self.types = {}
+        self.prefixes = {}
+        self.ttls = {}
+        self.dbs = {}
+        self.biggest = []
+        self.top = top
+        self.max_prefixes = max_prefixes
+
+    @staticmethod
+    def _add(table, name, memory, width=2):
+        row = table.get(name)
+        if row is None:
+            row = table[name] = [0] * width
+        row[0] += 1
+        row[1] += memory
+        return row
+
+    def add(self, db, key, rdb_type, expire_ms, memory, elements, prefix, ttl):
+        self.keys += 1
+        self.memory += memory
+        type_name, encoding = RDB_TYPES.get(rdb_type, ("unknown", str(rdb_type)))
+        self._add(self.types, f"{type_name}/{encoding}", memory)
+        if prefix not in self.prefixes and len(self.prefixes) >= self.max_prefixes:
+            prefix = "<other prefixes>"
+        row = self._add(self.prefixes, prefix, memory, 3)
+        row[2] += expire_ms is not None
+        self._add(self.ttls, ttl, memory)
+        self._add(self.dbs, db, memory)
+        item = (memory, key, db, type_name, encoding, elements)
+        if len(self.biggest) < self.top:
+            heapq.heappush(self.biggest, item)
+        elif memory > self.biggest[0][0]:
+            heapq.heapreplace(self.biggest, item)
+
+    def merge(self, other):
+        self.keys += other.keys
+        self.memory += other.memory
+        for mine, theirs in ((self.types, other.types), (self.ttls, other.ttls), (self.dbs, other.dbs),
+                             (self.prefixes, other.prefixes)):
+            for name, row in theirs.items():
+                if mine is self.prefixes and name not in mine and len(mine) >= self.max_prefixes:
+                    name = "<other prefixes>"
+                target = mine.setdefault(name, [0] * len(row))
+                for index, value in enumerate(row):
+                    target[index] += value
+        for item in other.biggest:
+            if len(self.biggest) < self.top:
+                heapq.heappush(self.biggest, item)
+            elif item[0] > self.biggest[0][0]:
+                heapq.heapreplace(self.biggest, item)
+        return self
+
+
+class Options:
+    """Settings every worker needs; picklable"""
+
+    __slots__ = ("separator", "depth", "top", "max_prefixes")
+
+    def __init__(self, separator=":", depth=1, top=20, max_prefixes=10000):
+        self.separator = separator
+        self.depth = depth
+        self.top = top
+        self.max_prefixes = max_prefixes
+
+
+def analyze_chunk(path, start, end, db, snapshot_ms, options):
+    """KeyspaceStats for the key records between two offsets of one database"""
+    stats = KeyspaceStats(options.top, options.max_prefixes)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        parser = RdbParser(data, start, db)
+        for _, db, key, rdb_type, expire, memory, elements in parser.records(end=end):
+            text = key.decode("utf-8", "backslashreplace")
+            stats.add(db, text, rdb_type, expire, memory, elements,
+                      key_prefix(text, options.separator, options.depth), ttl_bucket(expire, snapshot_ms))
+    return stats
+
+
+def plan_chunks(path, chunk_bytes, info):
+    """Yield (start, end, db) splitting the file at database changes and every chunk_bytes
+
+    Each chunk is yielded as soon as the next one starts, so workers begin on it while this
+    pass walks the rest of the file. It only follows the record framing: keys are not decoded
+    and nothing is aggregated. info gets the path, size and version at once and the aux
+    fields as they are read; Redis writes those before the first key.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        parser = RdbParser(data)
+        parser.read_header()
+        info.update(path=path, version=parser.version, aux=parser.aux, size=len(data))
+        chunk_start = chunk_db = None
+        for offset, db, *_ in parser.records(decode_keys=False):
+            if chunk_start is None:
+                chunk_start, chunk_db = offset, db
+            elif db != chunk_db or offset - chunk_start >= chunk_bytes:
+                yield chunk_start, offset, chunk_db
+                chunk_start, chunk_db = offset, db
+        if chunk_start is not None:
+            yield chunk_start, parser.end - 1, chunk_db
+
+
+def snapshot_time_ms(info):
+    """When the snapshot was taken: the ctime aux field, else the file's mtime"""
+    ctime = info["aux"].get("ctime")
+    if ctime and ctime.lstrip("-").isdigit():
+        return int(ctime) * 1000
+    return int(os.path.getmtime(info["path"]) * 1000)
+
+
+def analyze(paths, options, jobs=None, chunk_bytes=64 << 20):
+    """([file info], merged KeyspaceStats) for one or more RDB files"""
+    stats = KeyspaceStats(options.top, options.max_prefixes)
+    infos = []
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for path in paths:
+            info = {}
+            infos.append(info)
+            for start, end, db in plan_chunks(path, chunk_bytes, info):
+                stats.merge(analyze_chunk(path, start, end, db, snapshot_time_ms(info), options))
+        return infos, stats
+
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = []
+        for path in paths:
+            info = {}
+            infos.append(info)
+            # Submitted as planned: the workers run while the planning pass is still walking the file
+            for start, end, db in plan_chunks(path, chunk_bytes, info):
+                futures.append(pool.submit(analyze_chunk, path, start, end, db, snapshot_time_ms(info), options))
+        for future in futures:
+            stats.merge(future.result())
+    return infos, stats
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def report(infos, stats, top_prefixes=20):
+    ttl_order = ["no TTL", "expired"] + [label for _, label in TTL_BUCKETS] + [">= 30d"]
+    return {
+        "files": [{"path": info["path"], "size": info["size"], "rdb_version": info["version"],
+                   "redis_version": info["aux"].get("redis-ver"), "used_memory": info["aux"].get("used-mem")}
+                  for info in infos],
+        "keys": stats.keys,
+        "memory": stats.memory,
+        "types": {name: {"keys": row[0], "memory": row[1]}
+                  for name, row in sorted(stats.types.items(), key=lambda item: -item[1][1])},
+        "prefixes": [{"prefix": name, "keys": row[0], "memory": row[1], "with_ttl": row[2]}
+                     for name, row in sorted(stats.prefixes.items(), key=lambda item: -item[1][1])[:top_prefixes]],
+        "ttl": {name: {"keys": stats.ttls[name][0], "memory": stats.ttls[name][1]}
+                for name in ttl_order if name in stats.ttls},
+        "dbs": {str(db): {"keys": row[0], "memory": row[1]} for db, row in sorted(stats.dbs.items())},
+        "biggest": [{"key": key, "db": db, "type": type_name, "encoding": encoding, "elements": elements,
+                     "memory": memory}
+                    for memory, key, db, type_name, encoding, elements in sorted(stats.biggest, reverse=True)],
+    }
+
+
+def print_report(summary, elapsed):
+    total = summary["memory"] or 1
+    print("=" * 50)
+    for info in summary["files"]:
+        used = f", used_memory {format_bytes(int(info['used_memory']))}" if info["used_memory"] else ""
+        print(f"📦 {info['path']}: {format_bytes(info['size'])}, RDB v{info['rdb_version']}, "
+              f"Redis {info['redis_version'] or '?'}{used}")
+    print(f"🔑 {summary['keys']} keys, ~{format_bytes(summary['memory'])} estimated in memory "
+          f"(analyzed in {elapsed:.1f}s)")
+    print("=" * 50)
+
+    def table(title, rows):
+        print(f"\n{title}")
+        width = max((len(str(name)) for name, _, _ in rows), default=4)
+        for name, keys, memory in rows:
+            print(f"  {str(name):<{width}}  {keys:>10} keys  {format_bytes(memory):>10}  {memory / total:>6.1%}")
+
+    table("🧩 By type/encoding", [(name, row["keys"], row["memory"]) for name, row in summary["types"].items()])
+    table("🏷️  By prefix", [(row["prefix"], row["keys"], row["memory"]) for row in summary["prefixes"]])
+    table("⏳ By TTL", [(name, row["keys"], row["memory"]) for name, row in summary["ttl"].items()])
+    if len(summary["dbs"]) > 1:
+        table("🗄️  By database", [(f"db{db}", row["keys"], row["memory"]) for db, row in summary["dbs"].items()])
+
+    print("\n🐘 Biggest keys")
+    for item in summary["biggest"]:
+        elements = "" if item["elements"] is None else f", {item['elements']} elements"
+        print(f"  {format_bytes(item['memory']):>10}  {item['key']}  ({item['type']}/{item['encoding']}"
+              f"{elements}, db{item['db']})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Estimate what uses memory in Redis RDB snapshots")
+    parser.add_argument("paths", nargs="+", metavar="dump.rdb", help="RDB files, e.g. one per cluster node")
+    parser.add_argument("--separator", default=":", help="key prefix separator (default: ':')")
+    parser.add_argument("--depth", type=int, default=1, help="separator-delimited segments per prefix (default: 1)")
+    parser.add_argument("--top", type=int, default=20, help="biggest keys and prefixes to list (default: 20)")
+    parser.add_argument("--max-prefixes", type=int, default=10000,
+                        help="distinct prefixes tracked before the rest go to '<other prefixes>' (default: 10000)")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-mb", type=float, default=64,
+                        help="split databases larger than this into chunks for the workers (default: 64)")
+    parser.add_argument("--json", metavar="FILE", help="also write the report to FILE as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ File not found: {', '.join(missing)}")
+        return 1
+
+    start = time.perf_counter()
+    options = Options(args.separator, args.depth, args.top, args.max_prefixes)
+    try:
+        infos, stats = analyze(args.paths, options, args.jobs, int(args.chunk_mb * (1 << 20)))
+    except (OSError, ValueError, RdbError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    summary = report(infos, stats, args.top)
+    print_report(summary, time.perf_counter() - start)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+        print(f"💾 Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Redis Cluster Load Generator and Latency Benchmark
+Drives GET/SET/MGET mixes over many pipelined asyncio connections and reports
+throughput with HDR-style latency percentiles
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from latency_histogram import LatencyHistogram
+from redis_cluster import ClusterClient
+from redis_inventory import add_target_arguments, target_addresses
+from redis_protocol import RedisError, key_slot
+
+OPERATIONS = ("get", "set", "mget")
+# Sizes and operations are drawn up front and cycled, so the hot loop only indexes lists
+POOL_SIZE = 4096
+
+
+def parse_distribution(text):
+    """Size distribution: 'N' fixed, 'A-B' uniform, 'normal:MEAN:STDDEV' or 'lognormal:MEDIAN:SIGMA'"""
+    kind, _, params = text.partition(":")
+    try:
+        if kind == "normal":
+            mean, stddev = (float(value) for value in params.split(":"))
+            return lambda rng: rng.gauss(mean, stddev)
+        if kind == "lognormal":
+            median, sigma = (float(value) for value in params.split(":"))
+            return lambda rng: median * rng.lognormvariate(0.0, sigma)
+        if "-" in text:
+            low, high = (int(value) for value in text.split("-"))
+            return lambda rng: rng.randint(low, high)
+        size = int(text)
+        return lambda rng: size
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size distribution {text!r}") from None
+
+
+def parse_ratio(text):
+    """'get:set:mget' weights, e.g. 8:2:0"""
+    try:
+        weights = [float(value) for value in text.split(":")]
+    except ValueError:
+        weights = []
+    if len(weights) != len(OPERATIONS) or min(weights) < 0 or not sum(weights):
+        raise argparse.ArgumentTypeError(f"ratio must be three non-negative weights get:set:mget, got {text!r}")
+    return weights
+
+
+def parse_duration(text):
+    """Seconds to run; must be positive, since the run only ends at its deadline"""
+    try:
+        seconds = float(text)
+    except ValueError:
+        seconds = 0.0
+    if not seconds > 0:
+        raise argparse.ArgumentTypeError(f"duration must be a positive number of seconds, got {text!r}")
+    return seconds
+
+
+def sample_sizes(distribution, rng, count=POOL_SIZE, minimum=1):
+    return [max(minimum, int(distribution(rng))) for _ in range(count)]
+
+
+class Keyspace:
+    """Keys grouped by hash tag, so an MGET over one group never crosses slots
+
+    Key i is '<prefix>:{g<i % groups>}:<i>', padded to its drawn key size.
+    """
+
+    def __init__(self, count, key_sizes, group_size, prefix="bench"):
+        self.groups = max(1, count // max(1, group_size))
+        self.keys = []
+        for index in range(count):
+            key = f"{prefix}:{{g{index % self.groups}}}:{index}".encode()
+            pad = key_sizes[index % len(key_sizes)] - len(key)
+            self.keys.append(key + b"x" * pad if pad > 0 else key)
+        self.group_slots = [key_slot(self.keys[group]) for group in range(self.groups)]
+
+    def partition(self, owners):
+        """{address: [[key, ...] per group]} for the node owning each group's slot"""
+        nodes = {}
+        for group, slot in enumerate(self.group_slots):
+            nodes.setdefault(owners[slot], []).append(self.keys[group::self.groups])
+        return nodes
+
+
+class BenchmarkStats:
+    """Latency histograms and counters per operation"""
+
+    def __init__(self):
+        self.histograms = {op: LatencyHistogram() for op in OPERATIONS}
+        self.errors = {}
+        self.started = time.perf_counter()
+
+    def reset(self):
+        self.__init__()
+
+    def record(self, op, micros):
+        self.histograms[op].record(micros)
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    @property
+    def total(self):
+        return sum(histogram.total for histogram in self.histograms.values())
+
+
+class Workload:
+    """Shared state for every connection: key groups per node, size pools and the stop condition"""
+
+    def __init__(self, args, partition, seed):
+        rng = random.Random(seed)
+        self.partition = partition
+        self.pipeline = args.pipeline
+        self.mget_keys = args.mget_keys
+        self.ops = rng.choices(OPERATIONS, weights=args.ratio, k=POOL_SIZE)
+        self.value_sizes = sample_sizes(args.value_size, rng)
+        # One random buffer; values are slices of it, so SET payloads cost no allocation per command
+        self.values = memoryview(os.urandom(max(self.value_sizes)))
+        self.stats = BenchmarkStats()
+        self.deadline = None
+        self.remaining = None
+
+    def take(self, count):
+        """Commands this connection may still send, or 0 when the run is over"""
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return 0
+        if self.remaining is None:
+            return count
+        count = min(count, self.remaining)
+        self.remaining -= count
+        return count
+
+    def batch(self, groups, rng, count):
+        commands = []
+        ops = []
+        for _ in range(count):
+            op = self.ops[rng.randrange(POOL_SIZE)]
+            keys = groups[rng.randrange(len(groups))]
+            if op == "get":
+                commands.append((b"GET", keys[rng.randrange(len(keys))]))
+            elif op == "set":
+                size = self.value_sizes[rng.randrange(POOL_SIZE)]
+                commands.append((b"SET", keys[rng.randrange(len(keys))], self.values[:size]))
+            else:
+                commands.append((b"MGET", *rng.sample(keys, min(self.mget_keys, len(keys)))))
+            ops.append(op)
+        return commands, ops
+
+
+async def drive_connection(client, address, groups, workload, seed):
+    """Send pipelined batches until the workload says stop; every reply in a batch shares its round trip
+
+    Batches only hold keys owned by address, so they bypass per-command routing; a MOVED
+    reply (resharding mid-run) is counted as an error rather than retried.
+    """
+    rng = random.Random(seed)
+    async with client.pool(address).connection() as connection:
+        while True:
+            count = workload.take(workload.pipeline)
+            if not count:
+                return
+            commands, ops = workload.batch(groups, rng, count)
+            start = time.perf_counter()
+            replies = await connection.pipeline(commands)
+            micros = (time.perf_counter() - start) * 1e6
+            for op, reply in zip(ops, replies):
+                if isinstance(reply, RedisError):
+                    workload.stats.error(reply.kind)
+                else:
+                    workload.stats.record(op, micros)
+
+
+async def preload(client, keys, workload, batch=2000):
+    """SET every key once so GET and MGET measure hits"""
+    sizes = workload.value_sizes
+    for offset in range(0, len(keys), batch):
+        replies = await client.pipeline([
+            (b"SET", key, workload.values[:sizes[(offset + index) % POOL_SIZE]])
+            for index, key in enumerate(keys[offset:offset + batch])])
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+
+
+async def run_benchmark(addresses, args):
+    async with ClusterClient(addresses, max_connections=args.connections) as client:
+        return await _run_benchmark(client, args)
+
+
+async def _run_benchmark(client, args):
+    rng = random.Random(args.seed)
+    keyspace = Keyspace(args.keys, sample_sizes(args.key_size, rng), args.mget_keys)
+    partition = keyspace.partition(client.owners)
+    nodes = sorted(partition)
+    print(f"🎯 {len(nodes)} node(s): {', '.join(f'{host}:{port}' for host, port in nodes)}")
+    print(f"   {args.connections} connection(s) per node, pipeline depth {args.pipeline}, "
+          f"{len(keyspace.keys)} keys in {keyspace.groups} hash-tag groups")
+
+    workload = Workload(args, partition, args.seed)
+    if not args.no_preload:
+        start = time.perf_counter()
+        await preload(client, keyspace.keys, workload)
+        print(f"📥 Preloaded {len(keyspace.keys)} keys in {time.perf_counter() - start:.2f}s")
+
+    async def phase(seconds=None, requests=None):
+        workload.deadline = time.perf_counter() + seconds if seconds is not None else None
+        workload.remaining = requests
+        workload.stats.reset()
+        await asyncio.gather(*(
+            drive_connection(client, address, partition[address], workload, args.seed + index)
+            for index, address in enumerate(nodes * args.connections)))
+        return time.perf_counter() - workload.stats.started
+
+    if args.warmup:
+        await phase(seconds=args.warmup)
+        print(f"🔥 Warm-up: {workload.stats.total} requests in {args.warmup:g}s (discarded)")
+
+    if args.requests:
+        elapsed = await phase(requests=args.requests)
+    else:
+        elapsed = await phase(seconds=args.duration)
+    return workload.stats, elapsed, nodes
+
+
+def summarize(stats, elapsed, nodes, args):
+    operations = {}
+    for op, histogram in stats.histograms.items():
+        if histogram.total:
+            summary = histogram.to_dict()
+            summary["ops_per_second"] = histogram.total / elapsed
+            operations[op] = summary
+    return {
+        "nodes": [f"{host}:{port}" for host, port in nodes],
+        "connections_per_node": args.connections,
+        "pipeline": args.pipeline,
+        "seconds": elapsed,
+        "requests": stats.total,
+        "ops_per_second": stats.total / elapsed if elapsed else 0.0,
+        "errors": stats.errors,
+        "operations": operations,
+    }
+
+
+def print_summary(summary):
+    print("\n📊 Results")
+    print("=" * 50)
+    print(f"   {'op':<5} {'count':>10} {'ops/s':>11} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8}")
+    for op, result in summary["operations"].items():
+        print(f"   {op:<5} {result['count']:>10} {result['ops_per_second']:>11,.0f} "
+              f"{result['p50_ms']:>6.2f}ms {result['p90_ms']:>6.2f}ms {result['p99_ms']:>6.2f}ms "
+              f"{result['p99.9_ms']:>6.2f}ms {result['max_ms']:>6.2f}ms")
+    print(f"\n⚡ {summary['requests']:,} requests in {summary['seconds']:.2f}s "
+          f"→ {summary['ops_per_second']:,.0f} ops/s")
+    for kind, count in sorted(summary["errors"].items()):
+        print(f"❌ {count} {kind} error(s)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load-test the Redis cluster with pipelined GET/SET/MGET traffic")
+    target = add_target_arguments(parser, "benchmark this node instead of the inventory (repeatable)")
+    target.add_argument("--local", type=int, metavar="N",
+                        help="spawn an N-node cluster of local redis-server processes and benchmark it")
+    parser.add_argument("--ratio", type=parse_ratio, default=parse_ratio("8:2:0"), metavar="GET:SET:MGET",
+                        help="operation mix weights (default: 8:2:0)")
+    parser.add_argument("--mget-keys", type=int, default=10, help="keys per MGET (default: 10)")
+    parser.add_argument("--keys", type=int, default=100000, help="keyspace size (default: 100000)")
+    parser.add_argument("--key-size", type=parse_distribution, default=parse_distribution("24"),
+                        metavar="DIST", help="key length in bytes: N, A-B, normal:MEAN:STDDEV or "
+                                             "lognormal:MEDIAN:SIGMA (default: 24)")
+    parser.add_argument("--value-size", type=parse_distribution, default=parse_distribution("64"),
+                        metavar="DIST", help="value length in bytes, same forms as --key-size (default: 64)")
+    parser.add_argument("-c", "--connections", type=int, default=16,
+                        help="connections per node (default: 16)")
+    parser.add_argument("-P", "--pipeline", type=int, default=16,
+                        help="commands in flight per connection (default: 16)")
+    parser.add_argument("-d", "--duration", type=parse_duration, default=10.0, help="seconds to run (default: 10)")
+    parser.add_argument("-n", "--requests", type=int, help="stop after this many requests instead")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds of discarded warm-up (default: 1)")
+    parser.add_argument("--no-preload", action="store_true", help="skip writing every key before the run")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE as JSON")
+    return parser
+
+
+async def _main(args):
+    if args.local:
+        from local_cluster import LocalCluster
+        async with LocalCluster(args.local) as cluster:
+            return await run_benchmark(cluster.addresses, args)
+    return await run_benchmark(target_addresses(args), args)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    print("🚀 Redis benchmark")
+    print("=" * 50)
+    try:
+        stats, elapsed, nodes = asyncio.run(_main(args))
+    except (OSError, RedisError, KeyError, TimeoutError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    summary = summarize(stats, elapsed, nodes, args)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+        print(f"💾 Results written to {args.json}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
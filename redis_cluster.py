@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Slot-Routing Redis Cluster Client
+Caches the CLUSTER SLOTS map, routes commands by CRC16 hash slot over bounded per-node
+connection pools and follows MOVED/ASK redirections without refreshing the whole map per call
+"""
+
+import asyncio
+import contextlib
+import time
+
+from redis_protocol import CLUSTER_SLOTS, RedisConnection, RedisError, key_slot, parse_address
+
+# Commands that carry no key; they go to any master (or to every master via execute_on_all).
+# MEMORY USAGE is the exception: command_key routes it by its key argument
+KEYLESS_COMMANDS = frozenset((
+    b"PING", b"INFO", b"CLUSTER", b"DBSIZE", b"SCAN", b"FLUSHALL", b"FLUSHDB", b"CONFIG", b"TIME",
+    b"MEMORY", b"SLOWLOG", b"CLIENT", b"COMMAND", b"LATENCY", b"SCRIPT", b"ECHO", b"RANDOMKEY",
+))
+
+
+def command_key(command):
+    """The key a command is routed by: the first key argument, or None for keyless commands"""
+    name = command[0].upper() if isinstance(command[0], bytes) else str(command[0]).upper().encode()
+    if name == b"MEMORY":
+        subcommand = command[1] if len(command) > 2 else b""
+        subcommand = subcommand.upper() if isinstance(subcommand, bytes) else str(subcommand).upper().encode()
+        return command[2] if subcommand == b"USAGE" else None
+    if name in KEYLESS_COMMANDS or len(command) < 2:
+        return None
+    if name in (b"EVAL", b"EVALSHA"):
+        return command[3] if len(command) > 3 and int(command[2]) > 0 else None
+    return command[1]
+
+
+def parse_redirect(error):
+    """MOVED/ASK error -> (slot, (host, port))"""
+    _kind, slot, address = str(error).split(" ")
+    return int(slot), parse_address(address)
+
+
+class NodePool:
+    """At most max_connections connections to one node; idle ones are reused most-recent first"""
+
+    __slots__ = ("host", "port", "timeout", "_idle", "_available")
+
+    def __init__(self, host, port, max_connections=16, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle = []
+        self._available = asyncio.Semaphore(max_connections)
+
+    async def acquire(self):
+        await self._available.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await RedisConnection.open(self.host, self.port, self.timeout)
+        except BaseException:
+            self._available.release()
+            raise
+
+    def release(self, connection, discard=False):
+        if discard:
+            # A reply may still be in flight; the stream cannot be trusted for the next caller
+            connection.abort()
+        else:
+            self._idle.append(connection)
+        self._available.release()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        connection = await self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, discard=True)
+            raise
+        self.release(connection)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(connection.close() for connection in idle))
+
+
+class ClusterClient:
+    """Async client for a Redis Cluster (or a single standalone node)
+
+    The slot map is fetched once and patched slot by slot from MOVED replies; a full
+    CLUSTER SLOTS refresh happens at most once per refresh_interval after a redirect.
+    """
+
+    def __init__(self, startup_nodes, max_connections=16, timeout=5.0, max_redirects=5,
+                 refresh_interval=1.0):
+        self.startup_nodes = [parse_address(node) if isinstance(node, str) else tuple(node)
+                              for node in startup_nodes]
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.refresh_interval = refresh_interval
+        self.owners = None
+        # Distinct slot owners, sorted; kept in step with owners so routing never rescans the map
+        self.masters = []
+        self.cluster = True
+        self.pools = {}
+        self.stats = {"refreshes": 0, "moved": 0, "ask": 0, "tryagain": 0}
+        self._stale = False
+        self._refreshed = 0.0
+        self._refreshing = None
+
+    async def __aenter__(self):
+        await self.refresh()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def pool(self, address):
+        pool = self.pools.get(address)
+        if pool is None:
+            pool = self.pools[address] = NodePool(*address, self.max_connections, self.timeout)
+        return pool
+
+    async def close(self):
+        pools, self.pools = self.pools, {}
+        await asyncio.gather(*(pool.close() for pool in pools.values()))
+
+    async def refresh(self):
+        """Reload the slot map; concurrent callers share one CLUSTER SLOTS round trip"""
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._load_slots())
+        try:
+            await asyncio.shield(self._refreshing)
+        finally:
+            if self._refreshing is not None and self._refreshing.done():
+                self._refreshing = None
+
+    async def _load_slots(self):
+        errors = []
+        # Known masters first: after a failover the startup nodes may be the ones that are gone
+        for address in dict.fromkeys(self.masters + self.startup_nodes):
+            try:
+                async with self.pool(address).connection() as connection:
+                    ranges = await connection.execute("CLUSTER", "SLOTS")
+                # A node that sees only part of the map counts as failed; another may see all of it
+                owners = self._slot_owners(ranges, address)
+            except RedisError as e:
+                if "cluster support disabled" not in str(e):
+                    errors.append(f"{address[0]}:{address[1]}: {e}")
+                    continue
+                self.cluster = False
+                self.owners = [address] * CLUSTER_SLOTS
+            except (OSError, asyncio.TimeoutError) as e:
+                errors.append(f"{address[0]}:{address[1]}: {e}")
+                continue
+            else:
+                self.owners = owners
+            self.masters = sorted(set(self.owners))
+            self._stale = False
+            self._refreshed = time.monotonic()
+            self.stats["refreshes"] += 1
+            return
+        raise ConnectionError("no node returned the slot map (" + "; ".join(errors) + ")")
+
+    @staticmethod
+    def _slot_owners(ranges, address):
+        owners = [None] * CLUSTER_SLOTS
+        for first, last, master, *_replicas in ranges:
+            # An empty host means "the address you asked"
+            host = master[0].decode() if master[0] else address[0]
+            owners[first:last + 1] = [(host, master[1])] * (last - first + 1)
+        missing = owners.count(None)
+        if missing:
+            raise RedisError(f"CLUSTERDOWN {missing} of {CLUSTER_SLOTS} slots are not assigned")
+        return owners
+
+    async def _ensure_slots(self):
+        if self.owners is None:
+            await self.refresh()
+        elif self._stale and time.monotonic() - self._refreshed >= self.refresh_interval:
+            await self.refresh()
+
+    def node_for(self, key):
+        return self.owners[key_slot(key)]
+
+    def _route(self, command):
+        key = command_key(command)
+        return self.masters[0] if key is None else self.node_for(key)
+
+    async def _send(self, address, commands, items):
+        """One pipelined round trip to address for items [(index, asking)]"""
+        batch = []
+        positions = []
+        for index, asking in items:
+            if asking:
+                batch.append((b"ASKING",))
+            positions.append(len(batch))
+            batch.append(commands[index])
+        async with self.pool(address).connection() as connection:
+            replies = await connection.pipeline(batch)
+        return [replies[position] for position in positions]
+
+    async def pipeline(self, commands):
+        """Run commands grouped into one pipeline per node, following redirects
+
+        Replies come back in command order; error replies are returned as RedisError
+        instances like RedisConnection.pipeline.
+        """
+        await self._ensure_slots()
+        replies = [None] * len(commands)
+        pending = [(index, self._route(command), False) for index, command in enumerate(commands)]
+        for _attempt in range(self.max_redirects + 1):
+            if not pending:
+                break
+            batches = {}
+            for index, address, asking in pending:
+                batches.setdefault(address, []).append((index, asking))
+            if len(batches) == 1:
+                # No task per node: the request is written before this coroutine first suspends
+                (address, items), = batches.items()
+                results = [await self._send(address, commands, items)]
+            else:
+                results = await asyncio.gather(*(self._send(address, commands, items)
+                                                 for address, items in batches.items()))
+            pending = []
+            backoff = False
+            for (address, items), batch_replies in zip(batches.items(), results):
+                for (index, _asking), reply in zip(items, batch_replies):
+                    replies[index] = reply
+                    if not isinstance(reply, RedisError):
+                        continue
+                    if reply.kind == "MOVED":
+                        slot, target = parse_redirect(reply)
+                        self.owners[slot] = target
+                        if target not in self.masters:
+                            self.masters = sorted(self.masters + [target])
+                        self._stale = True
+                        self.stats["moved"] += 1
+                        pending.append((index, target, False))
+                    elif reply.kind == "ASK":
+                        # The slot is mid-migration; only this key moved, so the map stays as is
+                        _slot, target = parse_redirect(reply)
+                        self.stats["ask"] += 1
+                        pending.append((index, target, True))
+                    elif reply.kind == "TRYAGAIN":
+                        self.stats["tryagain"] += 1
+                        backoff = True
+                        pending.append((index, address, False))
+            if backoff:
+                await asyncio.sleep(0.05)
+        return replies
+
+    async def execute(self, *args):
+        """Run one command on the node owning its key, raising RedisError on an error reply"""
+        reply = (await self.pipeline([args]))[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    async def execute_on(self, address, *args):
+        async with self.pool(address).connection() as connection:
+            return await connection.execute(*args)
+
+    async def execute_on_all(self, *args):
+        """{address: reply} from every master; error replies are returned, not raised"""
+        await self._ensure_slots()
+        masters = self.masters
+
+        async def run(address):
+            try:
+                return await self.execute_on(address, *args)
+            except RedisError as e:
+                return e
+
+        return dict(zip(masters, await asyncio.gather(*(run(address) for address in masters))))
+
+    async def mget(self, keys):
+        """Values for keys that may span slots: one MGET per slot, one pipeline per node"""
+        by_slot = {}
+        for position, key in enumerate(keys):
+            by_slot.setdefault(key_slot(key), []).append(position)
+        groups = list(by_slot.values())
+        replies = await self.pipeline([(b"MGET", *(keys[position] for position in group))
+                                       for group in groups])
+        values = [None] * len(keys)
+        for group, reply in zip(groups, replies):
+            if isinstance(reply, RedisError):
+                raise reply
+            for position, value in zip(group, reply):
+                values[position] = value
+        return values
+
+    async def scan_iter(self, match=None, count=1000, type_name=None):
+        """Yield every key on every master, one SCAN cursor per node"""
+        await self._ensure_slots()
+        for address in self.masters:
+            cursor = b"0"
+            while True:
+                command = [b"SCAN", cursor, b"COUNT", count]
+                if match:
+                    command += [b"MATCH", match]
+                if type_name:
+                    command += [b"TYPE", type_name]
+                cursor, keys = await self.execute_on(address, *command)
+                for key in keys:
+                    yield key
+                if cursor == b"0":
+                    break
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Redis Cluster Bootstrap and Rebalance Tool
+Assigns the 16384 hash slots across the inventory nodes, joins them with CLUSTER MEET
+and moves slots with pipelined MIGRATE ... KEYS batches when nodes are added
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+from redis_cluster import ClusterClient
+from redis_inventory import add_target_arguments, target_addresses
+from redis_protocol import CLUSTER_SLOTS, RedisError, parse_address, parse_info
+from slot_migration import SlotMigrator
+
+
+class ClusterNode:
+    """One line of CLUSTER NODES"""
+
+    __slots__ = ("id", "host", "port", "flags", "slots")
+
+    def __init__(self, node_id, host, port, flags, slots):
+        self.id = node_id
+        self.host = host
+        self.port = port
+        self.flags = flags
+        self.slots = slots
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    @property
+    def is_master(self):
+        return "master" in self.flags and "fail" not in self.flags
+
+
+def parse_cluster_nodes(text, address):
+    """CLUSTER NODES reply (asked of address) -> [ClusterNode]"""
+    if isinstance(text, bytes):
+        text = text.decode()
+    nodes = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        host, _, port = fields[1].split("@")[0].rpartition(":")
+        flags = set(fields[2].split(","))
+        if "myself" in flags and not host:
+            # A node that has not met anyone yet does not know its own IP
+            host, port = address[0], address[1]
+        slots = []
+        for item in fields[8:]:
+            if item.startswith("["):
+                continue  # [slot->-id] / [slot-<-id]: migration in progress
+            first, _, last = item.partition("-")
+            slots.extend(range(int(first), int(last or first) + 1))
+        nodes.append(ClusterNode(fields[0], host, int(port), flags, slots))
+    return nodes
+
+
+def slot_ranges(node_count, slots=CLUSTER_SLOTS):
+    """Contiguous (first, last) slot ranges splitting the slots evenly across nodes"""
+    ranges = []
+    first = 0
+    for index in range(node_count):
+        size = slots // node_count + (1 if index < slots % node_count else 0)
+        ranges.append((first, first + size - 1))
+        first += size
+    return ranges
+
+
+def plan_rebalance(masters):
+    """[(slot, source, target)] moving the fewest slots so every master owns an even share"""
+    ordered = sorted(masters, key=lambda node: (-len(node.slots), node.address))
+    targets = [last - first + 1 for first, last in slot_ranges(len(ordered))]
+    surplus = []
+    deficits = []
+    for node, target in zip(ordered, targets):
+        extra = len(node.slots) - target
+        if extra > 0:
+            # Give away the highest slots, so the remaining ranges stay contiguous
+            surplus.extend((slot, node) for slot in sorted(node.slots)[-extra:])
+        elif extra < 0:
+            deficits.extend([node] * -extra)
+    return [(slot, source, target) for (slot, source), target in zip(surplus, deficits)]
+
+
+class ClusterAdmin:
+    """Issues the admin commands to every node concurrently through one ClusterClient's pools"""
+
+    def __init__(self, addresses, timeout=10.0):
+        self.addresses = [(socket.gethostbyname(host), port) for host, port in addresses]
+        self.client = ClusterClient(self.addresses, max_connections=4, timeout=timeout)
+
+    async def close(self):
+        await self.client.close()
+
+    async def run(self, address, *args):
+        return await self.client.execute_on(address, *args)
+
+    async def run_all(self, *args, addresses=None):
+        addresses = addresses or self.addresses
+        return await asyncio.gather(*(self.run(address, *args) for address in addresses))
+
+    async def nodes(self, address=None):
+        address = address or self.addresses[0]
+        return parse_cluster_nodes(await self.run(address, "CLUSTER", "NODES"), address)
+
+    async def add_slots(self, address, first, last):
+        try:
+            await self.run(address, "CLUSTER", "ADDSLOTSRANGE", first, last)
+        except RedisError as e:
+            # ADDSLOTSRANGE arrived in Redis 7; Ubuntu's redis-server is 6.x
+            if "subcommand" not in str(e).lower():
+                raise
+            await self.run(address, "CLUSTER", "ADDSLOTS", *range(first, last + 1))
+
+    async def meet(self, addresses):
+        """Introduce every node to the first; gossip spreads the rest"""
+        host, port = addresses[0]
+        await asyncio.gather(*(self.run(address, "CLUSTER", "MEET", host, port)
+                               for address in addresses[1:]))
+
+    async def wait_until_ok(self, addresses=None, timeout=30.0):
+        """Block until every node knows every other and reports cluster_state:ok"""
+        addresses = addresses or self.addresses
+        deadline = time.monotonic() + timeout
+        while True:
+            infos = await self.run_all("CLUSTER", "INFO", addresses=addresses)
+            states = [parse_info(info) for info in infos]
+            if all(state.get("cluster_state") == "ok" and
+                   int(state.get("cluster_known_nodes", 0)) >= len(addresses) for state in states):
+                return
+            if time.monotonic() > deadline:
+                bad = [f"{host}:{port}={state.get('cluster_state')}"
+                       for (host, port), state in zip(addresses, states)]
+                raise TimeoutError(f"cluster did not converge: {', '.join(bad)}")
+            await asyncio.sleep(0.1)
+
+    async def create(self):
+        """Assign all slots evenly and join the nodes; a no-op on an already healthy cluster"""
+        infos = [parse_info(info) for info in await self.run_all("CLUSTER", "INFO")]
+        assigned = [int(info.get("cluster_slots_assigned", 0)) for info in infos]
+        if all(info.get("cluster_state") == "ok" for info in infos) and min(assigned) == CLUSTER_SLOTS:
+            return False
+        if any(assigned):
+            raise RedisError("ERR some nodes already own slots; use rebalance instead of create")
+
+        await asyncio.gather(*(self.add_slots(address, first, last)
+                               for address, (first, last) in zip(self.addresses,
+                                                                 slot_ranges(len(self.addresses)))))
+        await self.meet(self.addresses)
+        await self.wait_until_ok()
+        return True
+
+    async def add_node(self, address):
+        """MEET a new, empty master into the cluster and wait until everyone knows it"""
+        address = (socket.gethostbyname(address[0]), address[1])
+        if address not in self.addresses:
+            self.addresses.append(address)
+        await self.meet([self.addresses[0], address])
+        await self.wait_until_ok()
+
+    async def rebalance(self, **options):
+        """Even out slot ownership; options go to SlotMigrator (batch, rate limit, p99 target)"""
+        masters = [node for node in await self.nodes() if node.is_master]
+        plan = plan_rebalance(masters)
+        return plan, await SlotMigrator(self, **options).migrate(plan)
+
+    async def status(self):
+        """[(ClusterNode, key count)] for every master"""
+        masters = sorted((node for node in await self.nodes() if node.is_master),
+                         key=lambda node: node.address)
+        sizes = await asyncio.gather(*(self.run(node.address, "DBSIZE") for node in masters))
+        return list(zip(masters, sizes))
+
+
+def print_status(rows):
+    print(f"   {'node':<22} {'id':<10} {'slots':>6} {'keys':>10}")
+    for node, keys in rows:
+        print(f"   {node.host + ':' + str(node.port):<22} {node.id[:8]:<10} {len(node.slots):>6} {keys:>10}")
+
+
+async def _command(args, addresses, local=None):
+    admin = ClusterAdmin(addresses)
+    try:
+        if args.command == "create":
+            created = await admin.create()
+            print("✅ Cluster created" if created else "✅ Cluster already has every slot assigned")
+        elif args.command in ("add-node", "rebalance"):
+            if args.command == "add-node":
+                if args.new_node:
+                    new_node = parse_address(args.new_node)
+                else:
+                    # --local without an address: start one more empty redis-server
+                    new_node = (local.host, max(local.ports) + 1)
+                    local.spawn(new_node[1])
+                    from local_cluster import wait_for_ping
+                    await wait_for_ping(*new_node)
+                await admin.add_node(new_node)
+                print(f"🤝 {new_node[0]}:{new_node[1]} joined the cluster")
+            start = time.perf_counter()
+            plan, results = await admin.rebalance(
+                batch=args.batch, min_batch=args.min_batch, max_batch=args.max_batch, pipeline=args.pipeline,
+                bytes_per_second=args.rate * 1e6 if args.rate else None, target_p99_ms=args.target_p99_ms)
+            for source, keys in results:
+                print(f"   {source.host}:{source.port}: {sum(1 for move in plan if move[1] is source)} slots, "
+                      f"{keys} keys migrated")
+            print(f"⚖️  Moved {len(plan)} slots in {time.perf_counter() - start:.2f}s")
+        print_status(await admin.status())
+    finally:
+        await admin.close()
+
+
+async def _local(args):
+    from local_cluster import LocalCluster
+    # create starts from empty nodes, like the playbooks leave them
+    async with LocalCluster(args.local, form=args.command != "create") as cluster:
+        await _command(args, cluster.addresses, cluster)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Create, grow and rebalance the Redis cluster")
+    parser.add_argument("command", choices=("create", "add-node", "rebalance", "status"))
+    parser.add_argument("new_node", nargs="?", metavar="HOST:PORT",
+                        help="node to add (add-node); optional with --local, which spawns one")
+    target = add_target_arguments(parser, "cluster node to use instead of the inventory (repeatable)")
+    target.add_argument("--local", type=int, metavar="N",
+                        help="run against N freshly spawned local redis-server processes")
+    parser.add_argument("--batch", type=int, default=100, help="initial keys per MIGRATE (default: 100)")
+    parser.add_argument("--min-batch", type=int, default=10, help="smallest adaptive batch (default: 10)")
+    parser.add_argument("--max-batch", type=int, default=1000, help="largest adaptive batch (default: 1000)")
+    parser.add_argument("--pipeline", type=int, default=1,
+                        help="MIGRATE commands per round trip; each one blocks the source (default: 1)")
+    parser.add_argument("--rate", type=float, metavar="MB/S",
+                        help="cap migration traffic at this many megabytes per second")
+    parser.add_argument("--target-p99-ms", type=float, default=2.0,
+                        help="shrink batches while the source's p99 latency exceeds this (default: 2.0)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "add-node" and not (args.new_node or args.local):
+        parser.error("add-node needs HOST:PORT")
+
+    print(f"🔧 Redis cluster {args.command}")
+    print("=" * 50)
+    try:
+        if args.local:
+            asyncio.run(_local(args))
+        else:
+            addresses = target_addresses(args)
+            asyncio.run(_command(args, addresses))
+    except (OSError, RedisError, KeyError, TimeoutError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Redis Slow-Log and Latency Collector
+Polls SLOWLOG, LATENCY LATEST, INFO commandstats and INFO memory from every cluster node in parallel
+and exports Prometheus text plus CSV/Parquet rollups of which commands dominate latency
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from latency_histogram import LatencyHistogram
+from redis_cluster import ClusterClient
+from redis_cluster_admin import parse_cluster_nodes
+from redis_inventory import add_target_arguments, target_addresses
+from redis_protocol import RedisError, parse_info
+
+# INFO memory field -> Prometheus gauge
+MEMORY_FIELDS = {
+    "used_memory": "redis_memory_used_bytes",
+    "used_memory_rss": "redis_memory_rss_bytes",
+    "used_memory_peak": "redis_memory_peak_bytes",
+    "maxmemory": "redis_memory_max_bytes",
+    "mem_fragmentation_ratio": "redis_memory_fragmentation_ratio",
+}
+# Longest argument kept from a slowlog entry; Redis itself truncates at 128 bytes
+MAX_ARG_LENGTH = 64
+# The collector's own calls in each commandstats delta, by commandstats name (Redis 7 adds
+# |subcommand). A snapshot is taken by the third command of a poll, so it counts the
+# previous poll's two INFOs and this poll's SLOWLOG GET and LATENCY LATEST.
+OWN_CALLS = {"info": 2, "slowlog": 1, "slowlog|get": 1, "latency": 1, "latency|latest": 1}
+
+
+def _text(value):
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+class SlowlogEntry:
+    """One SLOWLOG GET entry"""
+
+    __slots__ = ("id", "time", "duration_us", "args", "client", "client_name")
+
+    def __init__(self, entry_id, timestamp, duration_us, args, client="", client_name=""):
+        self.id = entry_id
+        self.time = timestamp
+        self.duration_us = duration_us
+        self.args = args
+        self.client = client
+        self.client_name = client_name
+
+    @property
+    def command(self):
+        return self.args[0].lower() if self.args else "?"
+
+
+def _printable(arg):
+    """A slowlog argument as one printable line; binary values are escaped"""
+    if not isinstance(arg, bytes):
+        return str(arg)
+    try:
+        text = arg.decode("utf-8")
+        if text.isprintable():
+            return text
+    except UnicodeDecodeError:
+        pass
+    return repr(arg)[2:-1]
+
+
+def parse_slowlog(reply):
+    """SLOWLOG GET reply -> [SlowlogEntry], newest first like Redis returns them"""
+    entries = []
+    for item in reply or []:
+        args = [_printable(arg[:MAX_ARG_LENGTH]) for arg in item[3]]
+        # Client address and name were added in Redis 4.0
+        client = _text(item[4]) if len(item) > 4 else ""
+        client_name = _text(item[5]) if len(item) > 5 else ""
+        entries.append(SlowlogEntry(int(item[0]), int(item[1]), int(item[2]), args, client, client_name))
+    return entries
+
+
+def parse_commandstats(text):
+    """INFO commandstats -> {command: {"calls": int, "usec": int, ...}}"""
+    stats = {}
+    for key, value in parse_info(text).items():
+        if not key.startswith("cmdstat_"):
+            continue
+        fields = {}
+        for pair in value.split(","):
+            name, _, number = pair.partition("=")
+            fields[name] = float(number) if "." in number else int(number)
+        stats[key[len("cmdstat_"):]] = fields
+    return stats
+
+
+def parse_latency(reply):
+    """LATENCY LATEST -> [(event, timestamp, latest_ms, max_ms)]"""
+    return [(_text(item[0]), int(item[1]), int(item[2]), int(item[3])) for item in reply or []]
+
+
+def parse_memory(text):
+    info = parse_info(text)
+    return {field: float(info[field]) for field in MEMORY_FIELDS if field in info}
+
+
+class NodeSample:
+    """What one poll read from one node"""
+
+    __slots__ = ("address", "time", "error", "slowlog", "latency", "commandstats", "memory")
+
+    def __init__(self, address, timestamp, error=None):
+        self.address = address
+        self.time = timestamp
+        self.error = error
+        self.slowlog = []
+        self.latency = []
+        self.commandstats = {}
+        self.memory = {}
+
+    @property
+    def node(self):
+        return f"{self.address[0]}:{self.address[1]}"
+
+
+class CommandTotals:
+    """A command's calls and time over the whole run, from commandstats deltas and the slowlog"""
+
+    __slots__ = ("calls", "usec", "slow")
+
+    def __init__(self):
+        self.calls = 0
+        self.usec = 0
+        self.slow = LatencyHistogram()
+
+
+class Collector:
+    """Polls the nodes, de-duplicates the slowlog and turns counters into per-interval deltas"""
+
+    def __init__(self, client, slowlog_len=128, rollup=60.0, sinks=()):
+        self.client = client
+        self.slowlog_len = slowlog_len
+        self.rollup = rollup
+        self.sinks = list(sinks)
+        self.nodes = []
+        self.samples = {}
+        self.totals = {}
+        # Calls and time of the collector's own polling, kept out of totals and the rollups
+        self.own = CommandTotals()
+        # node -> highest slowlog id seen; node -> previous commandstats
+        self._slowlog_ids = {}
+        self._previous = {}
+        # node -> command -> cumulative slowlog entries / microseconds for Prometheus
+        self.slowlog_counts = {}
+        self._window = None
+        self._rows = {}
+
+    async def discover(self):
+        """Every node that answers for the cluster: masters and their replicas"""
+        await self.client.refresh()
+        if not self.client.cluster:
+            self.nodes = self.client.masters
+            return self.nodes
+        reply = await self.client.execute_on(self.client.masters[0], "CLUSTER", "NODES")
+        self.nodes = sorted(node.address for node in parse_cluster_nodes(reply, self.client.masters[0])
+                            if "fail" not in node.flags and "noaddr" not in node.flags)
+        return self.nodes
+
+    async def configure(self, latency_threshold_ms=None, slower_than_us=None):
+        """Turn on the latency monitor / lower the slowlog threshold on every node"""
+        settings = []
+        if latency_threshold_ms is not None:
+            settings.append(("latency-monitor-threshold", latency_threshold_ms))
+        if slower_than_us is not None:
+            settings.append(("slowlog-log-slower-than", slower_than_us))
+        # One parameter per CONFIG SET: Redis 6 does not take several
+        await asyncio.gather(*(self.client.execute_on(address, "CONFIG", "SET", name, value)
+                               for address in self.nodes for name, value in settings))
+
+    async def poll_node(self, address):
+        sample = NodeSample(address, time.time())
+        commands = [("SLOWLOG", "GET", self.slowlog_len), ("LATENCY", "LATEST"),
+                    ("INFO", "commandstats"), ("INFO", "memory")]
+        try:
+            async with self.client.pool(address).connection() as connection:
+                replies = await asyncio.wait_for(connection.pipeline(commands), self.client.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            sample.error = str(e) or type(e).__name__
+            return sample
+        slowlog, latency, commandstats, memory = replies
+        # An error reply (e.g. a command renamed away in redis.conf) only loses that part
+        if not isinstance(slowlog, RedisError):
+            sample.slowlog = parse_slowlog(slowlog)
+        if not isinstance(latency, RedisError):
+            sample.latency = parse_latency(latency)
+        if not isinstance(commandstats, RedisError):
+            sample.commandstats = parse_commandstats(commandstats)
+        if not isinstance(memory, RedisError):
+            sample.memory = parse_memory(memory)
+        return sample
+
+    def _new_slowlog(self, sample):
+        last = self._slowlog_ids.get(sample.node)
+        entries = sample.slowlog
+        if entries:
+            newest = entries[0].id
+            # Ids keep growing across SLOWLOG RESET; a smaller newest id means the node restarted
+            if last is not None and newest >= last:
+                entries = [entry for entry in entries if entry.id > last]
+            self._slowlog_ids[sample.node] = newest
+        elif last is None:
+            self._slowlog_ids[sample.node] = -1
+        return list(reversed(entries))
+
+    def _deltas(self, sample):
+        previous = self._previous.get(sample.node)
+        self._previous[sample.node] = sample.commandstats
+        if previous is None:
+            return {}
+        deltas = {}
+        for command, fields in sample.commandstats.items():
+            before = previous.get(command, {})
+            calls = fields.get("calls", 0) - before.get("calls", 0)
+            usec = fields.get("usec", 0) - before.get("usec", 0)
+            if calls < 0 or usec < 0:
+                # CONFIG RESETSTAT or a restart: everything since is new
+                calls, usec = fields.get("calls", 0), fields.get("usec", 0)
+            own = min(calls, OWN_CALLS.get(command, 0))
+            if own:
+                # Our calls cost about the command's average over the interval
+                own_usec = usec * own // calls
+                self.own.calls += own
+                self.own.usec += own_usec
+                calls -= own
+                usec -= own_usec
+            if calls:
+                deltas[command] = {"calls": calls, "usec": usec,
+                                   "failed_calls": max(0, fields.get("failed_calls", 0)
+                                                       - before.get("failed_calls", 0))}
+        return deltas
+
+    def _row(self, table, key, **initial):
+        rows = self._rows.setdefault(table, {})
+        if key not in rows:
+            rows[key] = dict(initial)
+        return rows[key]
+
+    def _command_row(self, window, node, command):
+        return self._row("commandstats", (node, command), window=window, node=node, command=command,
+                         calls=0, usec=0, failed_calls=0, slowlog_entries=0, slowlog_usec=0, slowlog_max_usec=0)
+
+    def ingest(self, sample):
+        """Fold one node sample into the totals and the current rollup window; returns new slowlog entries"""
+        self.samples[sample.node] = sample
+        if sample.error:
+            return []
+        window = iso(sample.time - sample.time % self.rollup)
+        slowlog = self._new_slowlog(sample)
+        for command, delta in self._deltas(sample).items():
+            totals = self.totals.setdefault(command, CommandTotals())
+            totals.calls += delta["calls"]
+            totals.usec += delta["usec"]
+            row = self._command_row(window, sample.node, command)
+            for field in ("calls", "usec", "failed_calls"):
+                row[field] += delta[field]
+
+        counts = self.slowlog_counts.setdefault(sample.node, {})
+        for entry in slowlog:
+            self.totals.setdefault(entry.command, CommandTotals()).slow.record(entry.duration_us)
+            count, usec = counts.get(entry.command, (0, 0))
+            counts[entry.command] = (count + 1, usec + entry.duration_us)
+            row = self._command_row(window, sample.node, entry.command)
+            row["slowlog_entries"] += 1
+            row["slowlog_usec"] += entry.duration_us
+            row["slowlog_max_usec"] = max(row["slowlog_max_usec"], entry.duration_us)
+
+        if sample.memory:
+            row = self._row("memory", (sample.node,), window=window, node=sample.node, samples=0,
+                            used_memory_max=0.0)
+            row["samples"] += 1
+            row["used_memory_max"] = max(row["used_memory_max"], sample.memory.get("used_memory", 0.0))
+            for field in ("used_memory_rss", "maxmemory", "mem_fragmentation_ratio"):
+                row[field] = sample.memory.get(field)
+        for event, _, latest_ms, max_ms in sample.latency:
+            row = self._row("latency", (sample.node, event), window=window, node=sample.node, event=event,
+                            latest_ms_max=0, max_ms=0)
+            row["latest_ms_max"] = max(row["latest_ms_max"], latest_ms)
+            row["max_ms"] = max(row["max_ms"], max_ms)
+        return slowlog
+
+    def flush(self):
+        """Hand the finished rollup window to the sinks"""
+        rows = {table: list(rows.values()) for table, rows in self._rows.items()}
+        self._rows = {}
+        for row in rows.get("commandstats", []):
+            row["usec_per_call"] = round(row["usec"] / row["calls"], 2) if row["calls"] else None
+        if rows:
+            for sink in self.sinks:
+                sink.write_rollup(self._window, rows)
+
+    async def poll(self):
+        """One parallel pass over every node; returns the samples and the new [(node, slowlog entry)]"""
+        now = time.time()
+        window = now - now % self.rollup
+        if self._window is not None and window != self._window:
+            self.flush()
+        self._window = window
+
+        samples = await asyncio.gather(*(self.poll_node(address) for address in self.nodes))
+        slowlog = []
+        for sample in samples:
+            slowlog.extend((sample.node, entry) for entry in self.ingest(sample))
+        for sink in self.sinks:
+            sink.write_poll(self, slowlog)
+        if any(sample.error for sample in samples):
+            try:
+                await self.discover()
+            except (OSError, RedisError):
+                pass
+        return samples, slowlog
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(collector):
+    """Prometheus text exposition of the latest sample from every node"""
+    metrics = {}
+
+    def add(name, kind, help_text, labels, value):
+        if value is None:
+            return
+        family = metrics.setdefault(name, (kind, help_text, []))
+        label_text = ",".join(f'{key}="{_label(item)}"' for key, item in labels.items())
+        family[2].append(f"{name}{{{label_text}}} {value}")
+
+    for node, sample in sorted(collector.samples.items()):
+        add("redis_collector_up", "gauge", "1 if the node answered the last poll.", {"node": node},
+            0 if sample.error else 1)
+        for command, fields in sorted(sample.commandstats.items()):
+            labels = {"node": node, "command": command}
+            add("redis_command_calls_total", "counter", "Calls per command (INFO commandstats).", labels,
+                fields.get("calls"))
+            add("redis_command_duration_seconds_total", "counter", "Time spent executing the command.", labels,
+                fields.get("usec", 0) / 1e6)
+            add("redis_command_failed_calls_total", "counter", "Calls that returned an error.", labels,
+                fields.get("failed_calls"))
+        for command, (count, usec) in sorted(collector.slowlog_counts.get(node, {}).items()):
+            labels = {"node": node, "command": command}
+            add("redis_slowlog_entries_total", "counter", "Slowlog entries seen by the collector.", labels, count)
+            add("redis_slowlog_duration_seconds_total", "counter", "Time of the slowlog entries.", labels,
+                usec / 1e6)
+        for event, timestamp, latest_ms, max_ms in sample.latency:
+            labels = {"node": node, "event": event}
+            add("redis_latency_latest_seconds", "gauge", "Latest latency spike (LATENCY LATEST).", labels,
+                latest_ms / 1000.0)
+            add("redis_latency_max_seconds", "gauge", "Largest latency spike since the monitor started.", labels,
+                max_ms / 1000.0)
+        for field, value in sorted(sample.memory.items()):
+            add(MEMORY_FIELDS[field], "gauge", f"INFO memory {field}.", {"node": node}, value)
+
+    lines = []
+    for name, (kind, help_text, samples) in metrics.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusFile:
+    """Rewrites a node_exporter textfile-collector file after every poll"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write_poll(self, collector, slowlog):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Write-then-rename: node_exporter never scrapes a half-written file
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(prometheus_text(collector))
+        os.replace(tmp, self.path)
+
+    def write_rollup(self, window, rows):
+        pass
+
+    def close(self):
+        pass
+
+
+SLOWLOG_COLUMNS = ("time", "node", "id", "duration_us", "command", "args", "client", "client_name")
+ROLLUP_COLUMNS = {
+    "commandstats": ("window", "node", "command", "calls", "usec", "usec_per_call", "failed_calls",
+                     "slowlog_entries", "slowlog_usec", "slowlog_max_usec"),
+    "memory": ("window", "node", "samples", "used_memory_max", "used_memory_rss", "maxmemory",
+               "mem_fragmentation_ratio"),
+    "latency": ("window", "node", "event", "latest_ms_max", "max_ms"),
+}
+
+
+def slowlog_rows(slowlog):
+    return [{"time": iso(entry.time), "node": node, "id": entry.id, "duration_us": entry.duration_us,
+             "command": entry.command, "args": " ".join(entry.args), "client": entry.client,
+             "client_name": entry.client_name} for node, entry in slowlog]
+
+
+class CsvRollups:
+    """Appends rollup windows and new slowlog entries to one CSV file per table"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _append(self, table, columns, rows):
+        path = os.path.join(self.directory, f"{table}.csv")
+        new = not os.path.exists(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, columns, extrasaction="ignore")
+            if new:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def write_poll(self, collector, slowlog):
+        if slowlog:
+            self._append("slowlog", SLOWLOG_COLUMNS, slowlog_rows(slowlog))
+
+    def write_rollup(self, window, rows):
+        for table, columns in ROLLUP_COLUMNS.items():
+            if rows.get(table):
+                self._append(table, columns, rows[table])
+
+    def close(self):
+        pass
+
+
+class ParquetRollups:
+    """One Parquet file per table and rollup window (needs pyarrow)"""
+
+    def __init__(self, directory):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.directory = directory
+        self.slowlog = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, table, window, rows):
+        stamp = datetime.fromtimestamp(window, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(self.directory, f"{table}-{stamp}.parquet")
+        self.parquet.write_table(self.pyarrow.Table.from_pylist(rows), path, compression="zstd")
+
+    def write_poll(self, collector, slowlog):
+        self.slowlog.extend(slowlog_rows(slowlog))
+
+    def write_rollup(self, window, rows):
+        for table in ROLLUP_COLUMNS:
+            if rows.get(table):
+                self._write(table, window, rows[table])
+        if self.slowlog:
+            self._write("slowlog", window, self.slowlog)
+            self.slowlog = []
+
+    def close(self):
+        pass
+
+
+def print_summary(collector, elapsed, top=10):
+    """Commands ranked by the server time they used, with their slowlog entries
+
+    The collector's own INFO / SLOWLOG / LATENCY polling is left out of the ranking and shown
+    on its own line, so the ranking reflects the application's traffic.
+    """
+    commands = sorted(collector.totals.items(), key=lambda item: -item[1].usec)[:top]
+    total_usec = sum(totals.usec for totals in collector.totals.values()) or 1
+    print("=" * 50)
+    print(f"📊 {len(collector.nodes)} nodes over {elapsed:.0f}s")
+    print("=" * 50)
+    print(f"  {'command':<16}  {'calls':>10}  {'µs/call':>8}  {'time':>6}  {'slow':>5}  {'slow p99':>9}")
+    for command, totals in commands:
+        per_call = totals.usec / totals.calls if totals.calls else 0.0
+        print(f"  {command:<16}  {totals.calls:>10}  {per_call:>8.1f}  {totals.usec / total_usec:>6.1%}  "
+              f"{totals.slow.total:>5}  {totals.slow.percentile(99) / 1000.0:>7.2f}ms")
+    if collector.own.calls:
+        print(f"  🔎 not ranked: the collector's own polling, {collector.own.calls} calls, "
+              f"{collector.own.usec / 1000.0:.1f}ms of server time")
+    for node, sample in sorted(collector.samples.items()):
+        if sample.error:
+            print(f"  ❌ {node}: {sample.error}")
+            continue
+        memory = sample.memory
+        spikes = ", ".join(f"{event} {max_ms}ms" for event, _, _, max_ms in sample.latency)
+        print(f"  🧠 {node}: {memory.get('used_memory', 0) / 2**20:.1f} MiB used, "
+              f"fragmentation {memory.get('mem_fragmentation_ratio', 0):.2f}"
+              + (f", latency spikes: {spikes}" if spikes else ""))
+
+
+async def run_collector(collector, args):
+    """Poll on the interval grid until --count / --duration (or ^C); the sinks are flushed either way"""
+    start = time.monotonic()
+    polls = 0
+    try:
+        await collector.discover()
+        await collector.configure(args.latency_threshold, args.slower_than)
+        print(f"📡 Polling {len(collector.nodes)} nodes every {args.interval:g}s")
+        while True:
+            samples, slowlog = await collector.poll()
+            polls += 1
+            down = [sample.node for sample in samples if sample.error]
+            print(f"  {iso(time.time())}  {len(samples) - len(down)}/{len(samples)} nodes"
+                  f"{', down: ' + ', '.join(down) if down else ''}  slowlog {len(slowlog)}")
+            if args.count and polls >= args.count:
+                break
+            if args.duration and time.monotonic() - start + args.interval > args.duration:
+                break
+            # Polls stay on the interval grid however long a pass took
+            await asyncio.sleep(args.interval - (time.monotonic() - start) % args.interval)
+    finally:
+        collector.close()
+        await collector.client.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Collect Redis slowlog, latency, commandstats and memory metrics")
+    add_target_arguments(parser, "poll this node (and the cluster it belongs to) instead of the inventory")
+    parser.add_argument("-i", "--interval", type=float, default=10.0, help="seconds between polls (default: 10)")
+    parser.add_argument("-d", "--duration", type=float, help="stop after this many seconds (default: run until ^C)")
+    parser.add_argument("-n", "--count", type=int, help="stop after this many polls")
+    parser.add_argument("--slowlog-len", type=int, default=128, help="entries read per SLOWLOG GET (default: 128)")
+    parser.add_argument("--rollup", type=float, default=60.0, help="seconds per CSV/Parquet rollup row (default: 60)")
+    parser.add_argument("--prometheus", metavar="FILE",
+                        help="rewrite FILE in Prometheus text format after every poll (node_exporter textfile)")
+    parser.add_argument("--csv", metavar="DIR", help="append rollups and slowlog entries to CSV files in DIR")
+    parser.add_argument("--parquet", metavar="DIR", help="write one Parquet file per table and rollup (pyarrow)")
+    parser.add_argument("--latency-threshold", type=int, metavar="MS",
+                        help="CONFIG SET latency-monitor-threshold on every node first (off by default in Redis)")
+    parser.add_argument("--slower-than", type=int, metavar="US",
+                        help="CONFIG SET slowlog-log-slower-than on every node first")
+    parser.add_argument("--top", type=int, default=10, help="commands in the final summary (default: 10)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    print("📡 Redis collector")
+    print("=" * 50)
+    try:
+        sinks = []
+        if args.prometheus:
+            sinks.append(PrometheusFile(args.prometheus))
+        if args.csv:
+            sinks.append(CsvRollups(args.csv))
+        if args.parquet:
+            sinks.append(ParquetRollups(args.parquet))
+        addresses = target_addresses(args)
+        collector = Collector(ClusterClient(addresses, max_connections=2), args.slowlog_len, args.rollup, sinks)
+    except (OSError, RuntimeError, KeyError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    start = time.monotonic()
+    try:
+        asyncio.run(run_collector(collector, args))
+    except KeyboardInterrupt:
+        print("⏹️  Stopped")
+    except (OSError, RedisError, KeyError, TimeoutError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print_summary(collector, time.monotonic() - start, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
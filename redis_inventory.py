@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Ansible INI Inventory Reader
+Turns inventory_fixed.ini style host groups into Redis node addresses for the Python tooling
+"""
+
+import os
+import shlex
+
+from redis_protocol import parse_address
+
+DEFAULT_INVENTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory_fixed.ini")
+DEFAULT_GROUP = "redis_nodes"
+DEFAULT_PORT = 6379
+
+
+def load_inventory(path=DEFAULT_INVENTORY):
+    """{group: [(host name, {var: value})]} plus group vars under "<group>:vars" """
+    groups = {}
+    section = "ungrouped"
+    with open(path) as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith(("#", ";")):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1].strip()
+                groups.setdefault(section, {} if section.endswith(":vars") else [])
+                continue
+            if section.endswith(":vars"):
+                key, _, value = line.partition("=")
+                groups[section][key.strip()] = value.strip()
+                continue
+            fields = shlex.split(line, comments=True)
+            host_vars = dict(field.split("=", 1) for field in fields[1:] if "=" in field)
+            groups.setdefault(section, []).append((fields[0], host_vars))
+    return groups
+
+
+def redis_addresses(path=DEFAULT_INVENTORY, group=DEFAULT_GROUP, port=DEFAULT_PORT):
+    """(host, port) for each host in group, preferring ansible_host over the inventory name"""
+    groups = load_inventory(path)
+    if group not in groups:
+        raise KeyError(f"group [{group}] not found in {path}")
+    group_vars = groups.get(f"{group}:vars", {})
+    addresses = []
+    for name, host_vars in groups[group]:
+        host = host_vars.get("ansible_host", name)
+        addresses.append((host, int(host_vars.get("redis_port", group_vars.get("redis_port", port)))))
+    return addresses
+
+
+def add_target_arguments(parser, node_help="use this cluster node instead of the inventory (repeatable)"):
+    """--inventory / --node / --group, the node selection every cluster tool shares
+
+    Returns the --inventory/--node exclusive group so a tool can add another source to it.
+    """
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--inventory", default=DEFAULT_INVENTORY,
+                        help="Ansible INI inventory to read nodes from (default: inventory_fixed.ini)")
+    target.add_argument("--node", action="append", dest="nodes", metavar="HOST:PORT", help=node_help)
+    parser.add_argument("--group", default=DEFAULT_GROUP, help="inventory group (default: redis_nodes)")
+    return target
+
+
+def target_addresses(args):
+    """(host, port) for each --node, or the inventory group's nodes when none was given"""
+    if args.nodes:
+        return [parse_address(node) for node in args.nodes]
+    return redis_addresses(args.inventory, args.group)
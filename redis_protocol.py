@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Minimal Async Redis Protocol Client
+Runs commands over connections that receive straight into a resp.Parser buffer and maps keys
+to cluster hash slots using only the standard library
+"""
+
+import asyncio
+
+# RedisError, ProtocolError and the encoders are re-exported for the tools that import them from here
+from resp import INCOMPLETE, Parser, ProtocolError, RedisError, encode_command, encode_pipeline, to_bytes
+
+CLUSTER_SLOTS = 16384
+
+
+class _ReplyProtocol(asyncio.BufferedProtocol):
+    """Lets the event loop receive straight into the connection's resp.Parser buffer"""
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.transport = None
+        self.exception = None
+        self._readable = None
+        self._drained = None
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        return self.parser.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        self.parser.buffer_updated(nbytes)
+        self._wake()
+
+    def eof_received(self):
+        self.exception = ConnectionError("connection closed by server")
+        self._wake()
+        return False
+
+    def connection_lost(self, exc):
+        if self.exception is None:
+            self.exception = exc or ConnectionError("connection closed")
+        self._wake()
+        if self._drained is not None and not self._drained.done():
+            self._drained.set_result(None)
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+    def pause_writing(self):
+        self._drained = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        if self._drained is not None and not self._drained.done():
+            self._drained.set_result(None)
+        self._drained = None
+
+    def _wake(self):
+        if self._readable is not None and not self._readable.done():
+            self._readable.set_result(None)
+
+    async def readable(self):
+        """Wait until more bytes (or the end of the connection) arrive"""
+        if self.exception is not None:
+            raise self.exception
+        self._readable = asyncio.get_running_loop().create_future()
+        try:
+            await self._readable
+        finally:
+            self._readable = None
+
+    async def drain(self):
+        if self.exception is not None:
+            raise self.exception
+        if self._drained is not None:
+            await self._drained
+
+
+class RedisConnection:
+    """One TCP connection to a Redis node"""
+
+    __slots__ = ("host", "port", "transport", "protocol", "parser")
+
+    def __init__(self, host, port, transport, protocol):
+        self.host = host
+        self.port = port
+        self.transport = transport
+        self.protocol = protocol
+        self.parser = protocol.parser
+
+    @classmethod
+    async def open(cls, host, port=6379, timeout=5.0):
+        loop = asyncio.get_running_loop()
+        transport, protocol = await asyncio.wait_for(
+            loop.create_connection(lambda: _ReplyProtocol(Parser()), host, port), timeout)
+        return cls(host, port, transport, protocol)
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    async def read_reply(self):
+        """The next reply; error replies are returned as RedisError instances, not raised"""
+        while True:
+            reply = self.parser.gets()
+            if reply is not INCOMPLETE:
+                return reply
+            await self.protocol.readable()
+
+    async def execute(self, *args):
+        """Send one command and return its reply, raising RedisError on an error reply"""
+        self.transport.write(encode_command(*args))
+        await self.protocol.drain()
+        reply = await self.read_reply()
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    async def pipeline(self, commands):
+        """Send all commands in one write and read every reply (errors included, in order)"""
+        self.transport.write(encode_pipeline(commands))
+        await self.protocol.drain()
+        replies = []
+        while len(replies) < len(commands):
+            # Parse whatever has arrived in one pass rather than one call per reply
+            replies.extend(self.parser.gets_all(len(commands) - len(replies)))
+            if len(replies) < len(commands):
+                await self.protocol.readable()
+        return replies
+
+    def abort(self):
+        """Drop the connection at once, e.g. when a reply may still be in flight"""
+        self.transport.abort()
+
+    async def close(self):
+        self.transport.close()
+        try:
+            await self.protocol.closed
+        except (ConnectionError, OSError):
+            pass
+
+
+def _crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16(data):
+    """CRC16-CCITT (XMODEM), the checksum Redis Cluster uses for key slots"""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def key_slot(key):
+    """Cluster hash slot of key, honouring {hash tags}"""
+    key = to_bytes(key)
+    start = key.find(b"{")
+    if start != -1:
+        end = key.find(b"}", start + 1)
+        if end > start + 1:
+            key = key[start + 1:end]
+    return crc16(key) % CLUSTER_SLOTS
+
+
+def parse_address(text, default_port=6379):
+    """'host:port' or 'host' -> (host, port)"""
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def parse_info(text):
+    """INFO / CLUSTER INFO reply -> dict of strings"""
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", "replace")
+    info = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#") and ":" in line:
+            key, _, value = line.partition(":")
+            info[key] = value
+    return info
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Redis Configuration Tuner
+Derives maxmemory, io-threads, hz, persistence, tcp-backlog and activedefrag from the
+instance size and workload profile, and renders them as redis role variables with the reason for each
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(ROOT, "group_vars", "redis_nodes.yml")
+DEFAULT_INSTANCE_TYPE = "t3.micro"
+NODE_PREFIX = "redis-private"
+
+# EC2 instance type -> (memory MiB, vCPUs, burstable CPU credits)
+INSTANCE_TYPES = {
+    "t3.micro": (1024, 2, True),
+    "t3.small": (2048, 2, True),
+    "t3.medium": (4096, 2, True),
+    "t3.large": (8192, 2, True),
+    "t3.xlarge": (16384, 4, True),
+    "t3.2xlarge": (32768, 8, True),
+    "m5.large": (8192, 2, False),
+    "m5.xlarge": (16384, 4, False),
+    "m5.2xlarge": (32768, 8, False),
+    "m5.4xlarge": (65536, 16, False),
+    "c5.large": (4096, 2, False),
+    "c5.xlarge": (8192, 4, False),
+    "c5.2xlarge": (16384, 8, False),
+    "r5.large": (16384, 2, False),
+    "r5.xlarge": (32768, 4, False),
+    "r5.2xlarge": (65536, 8, False),
+    "r5.4xlarge": (131072, 16, False),
+    "r6g.large": (16384, 2, False),
+    "r6g.xlarge": (32768, 4, False),
+    "r6g.2xlarge": (65536, 8, False),
+}
+
+PROFILES = ("read-heavy", "write-heavy", "cache-only")
+
+# Share of the memory left after the OS reserve that the dataset may use. Persistence forks
+# the server; every page written while the child runs is copied, so write-heavy nodes keep
+# half of it free for copy-on-write and the rest keep room for allocator fragmentation.
+DATASET_SHARE = {"cache-only": 0.90, "read-heavy": 0.75, "write-heavy": 0.50}
+# Smallest maxmemory worth deploying; below it the node is too small to run Redis at all
+MIN_MAXMEMORY_MB = 32
+HEADROOM = {
+    "cache-only": "no forks, so only fragmentation headroom",
+    "read-heavy": "the rest absorbs fragmentation and snapshot copy-on-write",
+    "write-heavy": "half stays free for copy-on-write during AOF rewrites",
+}
+
+
+class Sizing:
+    """Memory, CPU and credit model of the machine Redis runs on"""
+
+    __slots__ = ("instance_type", "memory_mb", "vcpus", "burstable")
+
+    def __init__(self, instance_type=None, memory_mb=None, vcpus=None, burstable=None):
+        known = INSTANCE_TYPES.get(instance_type)
+        if known is None and (memory_mb is None or vcpus is None):
+            raise ValueError(f"unknown instance type {instance_type!r}: pass --memory-mb and --vcpus "
+                             f"(known: {', '.join(sorted(INSTANCE_TYPES))})")
+        self.instance_type = instance_type
+        self.memory_mb = memory_mb if memory_mb is not None else known[0]
+        self.vcpus = vcpus if vcpus is not None else known[1]
+        if burstable is None:
+            burstable = known[2] if known else (instance_type or "").startswith("t")
+        self.burstable = burstable
+
+    def __str__(self):
+        name = self.instance_type or "custom"
+        return f"{name} ({self.memory_mb} MiB, {self.vcpus} vCPU{', burstable' if self.burstable else ''})"
+
+
+class Setting:
+    """One tuned role variable and why it has that value"""
+
+    __slots__ = ("var", "value", "reason")
+
+    def __init__(self, var, value, reason):
+        self.var = var
+        self.value = value
+        self.reason = reason
+
+
+def os_reserve_mb(memory_mb):
+    """Memory kept for the OS, client output buffers and the replication backlog"""
+    return min(2048, max(256, memory_mb // 10))
+
+
+def tune(sizing, profile="read-heavy"):
+    """[Setting] for the redis role: every tuned variable with its explanation"""
+    if profile not in PROFILES:
+        raise ValueError(f"unknown profile {profile!r} (choose from {', '.join(PROFILES)})")
+    settings = []
+    memory, vcpus, burstable = sizing.memory_mb, sizing.vcpus, sizing.burstable
+    reserve = os_reserve_mb(memory)
+
+    maxmemory = int((memory - reserve) * DATASET_SHARE[profile])
+    if maxmemory < MIN_MAXMEMORY_MB:
+        # 0mb would mean "no limit" and a negative value stops redis-server from starting
+        raise ValueError(f"{memory} MiB leaves {maxmemory} MiB for data after the {reserve} MiB OS reserve; "
+                         f"need at least {MIN_MAXMEMORY_MB} MiB")
+    settings.append(Setting("redis_maxmemory", f"{maxmemory}mb",
+                            f"{memory} MiB minus {reserve} MiB for the OS and buffers, "
+                            f"{DATASET_SHARE[profile]:.0%} of the rest for data; {HEADROOM[profile]}"))
+
+    if profile == "write-heavy":
+        settings.append(Setting("redis_maxmemory_policy", "volatile-lru",
+                                "evict only keys with a TTL, so durable writes are never dropped silently"))
+    else:
+        settings.append(Setting("redis_maxmemory_policy", "allkeys-lru",
+                                "any key may be evicted once maxmemory is reached, least recently used first"))
+
+    if burstable:
+        io_threads = 1
+        io_reason = "burstable CPU: extra I/O threads spin and burn CPU credits for little gain"
+    elif vcpus < 4:
+        io_threads = 1
+        io_reason = f"{vcpus} vCPUs: threaded I/O only pays off from 4 cores"
+    else:
+        io_threads = min(8, vcpus - 1 if vcpus < 8 else vcpus - 2)
+        io_reason = f"{vcpus} vCPUs: leave cores for the main thread and the OS, more than 8 threads rarely helps"
+    settings.append(Setting("redis_io_threads", io_threads, io_reason))
+    if io_threads == 1:
+        reads_reason = "only meaningful with more than one I/O thread"
+    elif profile == "write-heavy":
+        reads_reason = "write-heavy traffic is bound by the main thread, so threaded reads add little"
+    else:
+        reads_reason = "threaded reads help read-heavy traffic with many clients"
+    settings.append(Setting("redis_io_threads_do_reads", io_threads > 1 and profile != "write-heavy",
+                            reads_reason))
+
+    if burstable:
+        hz, hz_reason = 10, "default rate: background tasks on an idle burstable node still consume credits"
+    elif profile == "cache-only":
+        hz, hz_reason = 20, "expire TTL keys and evict sooner under steady cache churn"
+    else:
+        hz, hz_reason = 10, "default rate; dynamic-hz raises it with many clients"
+    settings.append(Setting("redis_hz", hz, hz_reason))
+
+    if profile == "cache-only":
+        settings.append(Setting("redis_save", [], "no RDB snapshots: the data can be rebuilt, so never fork"))
+        settings.append(Setting("redis_appendonly", False, "no AOF: a restart starts with an empty cache"))
+    elif profile == "read-heavy":
+        if burstable or memory < 2048:
+            save = ["3600 1", "900 10000"]
+            save_reason = "at most one fork per 15 minutes, so snapshots do not compete with traffic on a small node"
+        else:
+            save = ["3600 1", "300 100", "60 10000"]
+            save_reason = "Redis 7 schedule: few writes, so snapshots stay rare"
+        settings.append(Setting("redis_save", save, save_reason))
+        settings.append(Setting("redis_appendonly", False, "RDB is enough for a read-mostly dataset"))
+    else:
+        settings.append(Setting("redis_save", [], "AOF carries durability; RDB snapshots would add forks"))
+        settings.append(Setting("redis_appendonly", True, "every write is logged, so at most a second is lost"))
+    settings.append(Setting("redis_appendfsync", "everysec",
+                            "fsync once a second: 'always' would cap writes at the disk's sync rate"
+                            if profile == "write-heavy" else "used only when AOF is on"))
+    settings.append(Setting("redis_no_appendfsync_on_rewrite", profile == "write-heavy" and burstable,
+                            "skip fsync while a rewrite saturates the small node's EBS burst"
+                            if profile == "write-heavy" and burstable else "fsync as usual during rewrites"))
+
+    if vcpus >= 8:
+        backlog = 4096
+    elif vcpus >= 4:
+        backlog = 1024
+    else:
+        backlog = 511
+    settings.append(Setting("redis_tcp_backlog", backlog,
+                            f"accept queue sized for {vcpus} vCPUs; the kernel caps it at net.core.somaxconn "
+                            "(4096 on Ubuntu 22.04)"))
+
+    defrag = profile != "read-heavy"
+    settings.append(Setting("redis_activedefrag", defrag,
+                            "keys are constantly replaced, so jemalloc fragmentation builds up" if defrag
+                            else "a read-mostly dataset fragments little; defrag would only cost CPU"))
+    settings.append(Setting("redis_active_defrag_cycle_max", 10 if burstable else 25,
+                            "limit defrag to 10% CPU on a burstable node" if burstable
+                            else "defrag may use up to 25% CPU when fragmentation is high"))
+    return settings
+
+
+def instance_type_from_state(path, prefix=NODE_PREFIX):
+    """Instance type of the Redis nodes in a Terraform state (the smallest if they differ)"""
+    from terraform_state import iter_resources
+
+    types = set()
+    for resource in iter_resources(path, types=("aws_instance",)):
+        name = (resource.values.get("tags") or {}).get("Name", "")
+        if name.startswith(prefix) and resource.values.get("instance_type"):
+            types.add(resource.values["instance_type"])
+    if not types:
+        raise ValueError(f"{path}: no {prefix}* instances")
+    return min(types, key=lambda name: INSTANCE_TYPES.get(name, (0,))[0])
+
+
+def format_value(value):
+    """YAML / redis.conf spelling of a setting: booleans as yes/no"""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return json.dumps(value)
+
+
+def render_vars(settings, sizing, profile):
+    """Role variables as YAML, each preceded by its reason"""
+    lines = ["---",
+             f"# Generated by redis_tuner.py for {sizing}, profile {profile}.",
+             "# Re-run the tuner instead of editing by hand.", ""]
+    for setting in settings:
+        lines.append(f"# {setting.reason}")
+        lines.append(f"{setting.var}: {format_value(setting.value)}")
+    return "\n".join(lines) + "\n"
+
+
+def render_conf(settings):
+    """The same settings as redis.conf directives, e.g. for the Docker image's redis.conf"""
+    values = {setting.var: setting.value for setting in settings}
+    lines = [f"maxmemory {values['redis_maxmemory']}",
+             f"maxmemory-policy {values['redis_maxmemory_policy']}",
+             f"hz {values['redis_hz']}",
+             f"tcp-backlog {values['redis_tcp_backlog']}"]
+    if values["redis_io_threads"] > 1:
+        lines.append(f"io-threads {values['redis_io_threads']}")
+        lines.append(f"io-threads-do-reads {format_value(values['redis_io_threads_do_reads'])}")
+    if values["redis_save"]:
+        lines.extend(f"save {rule}" for rule in values["redis_save"])
+    else:
+        lines.append('save ""')
+    lines.append(f"appendonly {format_value(values['redis_appendonly'])}")
+    if values["redis_appendonly"]:
+        lines.append(f"appendfsync {values['redis_appendfsync']}")
+        lines.append(f"no-appendfsync-on-rewrite {format_value(values['redis_no_appendfsync_on_rewrite'])}")
+    lines.append(f"activedefrag {format_value(values['redis_activedefrag'])}")
+    if values["redis_activedefrag"]:
+        lines.append(f"active-defrag-cycle-max {values['redis_active_defrag_cycle_max']}")
+    return "\n".join(lines) + "\n"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Derive redis role variables from instance size and workload")
+    parser.add_argument("-t", "--instance-type", help=f"EC2 instance type (default: {DEFAULT_INSTANCE_TYPE}, "
+                                                      "or the Redis nodes' type from --tfstate)")
+    parser.add_argument("--tfstate", metavar="FILE", help="read the Redis nodes' instance type from a Terraform state")
+    parser.add_argument("--memory-mb", type=int, help="RAM in MiB (overrides the instance type's)")
+    parser.add_argument("--vcpus", type=int, help="vCPU count (overrides the instance type's)")
+    parser.add_argument("--profile", choices=PROFILES, default="read-heavy", help="workload (default: read-heavy)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="role variables file to write (default: group_vars/redis_nodes.yml)")
+    parser.add_argument("--conf", action="store_true", help="print redis.conf directives instead of writing variables")
+    parser.add_argument("--dry-run", action="store_true", help="print the variables instead of writing them")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        instance_type = args.instance_type
+        if instance_type is None and args.tfstate:
+            instance_type = instance_type_from_state(args.tfstate)
+        if instance_type is None and (args.memory_mb is None or args.vcpus is None):
+            instance_type = DEFAULT_INSTANCE_TYPE
+        sizing = Sizing(instance_type, args.memory_mb, args.vcpus)
+        settings = tune(sizing, args.profile)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.conf:
+        print(render_conf(settings), end="")
+        return 0
+    if args.dry_run:
+        print(render_vars(settings, sizing, args.profile), end="")
+        return 0
+
+    print("=" * 50)
+    print(f"🔧 Redis tuning for {sizing}, profile {args.profile}")
+    print("=" * 50)
+    width = max(len(setting.var) for setting in settings)
+    for setting in settings:
+        print(f"  {setting.var:<{width}}  {format_value(setting.value):<20}  {setting.reason}")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        f.write(render_vars(settings, sizing, args.profile))
+    print(f"✅ Variables written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
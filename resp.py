@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+RESP2/RESP3 Codec
+Incremental reply parser over one reusable receive buffer and a pipeline encoder that writes
+a whole batch of commands into a single preallocated buffer
+"""
+
+
+class RedisError(Exception):
+    """An error reply from the server, e.g. MOVED 3999 10.0.2.192:6379"""
+
+    @property
+    def kind(self):
+        return str(self).split(" ", 1)[0]
+
+
+class ProtocolError(Exception):
+    """The server sent something that is not RESP"""
+
+
+class Push(list):
+    """RESP3 out-of-band push message (pub/sub, client tracking invalidations)"""
+
+
+class Verbatim(bytes):
+    """RESP3 verbatim string; format is e.g. 'txt' or 'mkd'"""
+
+    format = "txt"
+
+
+# Returned by Parser.gets() when the buffer does not hold a whole reply yet
+INCOMPLETE = object()
+
+_CRLF = b"\r\n"
+_SIMPLE, _ERROR, _INTEGER, _BULK, _ARRAY = b"+-:$*"
+_NULL, _DOUBLE, _BOOLEAN, _BLOB_ERROR, _VERBATIM, _BIG_NUMBER = b"_,#!=("
+_MAP, _SET, _ATTRIBUTE, _PUSH = b"%~|>"
+# Aggregates and how many elements each declared entry stands for
+_AGGREGATES = {_ARRAY: 1, _SET: 1, _PUSH: 1, _MAP: 2, _ATTRIBUTE: 2}
+
+
+def _finish(kind, items):
+    if kind == _MAP:
+        try:
+            return {items[index]: items[index + 1] for index in range(0, len(items), 2)}
+        except TypeError:
+            # Unhashable keys (nested aggregates) stay as a flat key/value list
+            return items
+    if kind == _PUSH:
+        return Push(items)
+    return items
+
+
+class Parser:
+    """Parses replies in place from a receive buffer the socket writes into directly
+
+    feed() copies data in; get_buffer()/buffer_updated() let a recv_into or an
+    asyncio.BufferedProtocol fill the buffer without that copy. Partially received
+    aggregates keep the elements parsed so far, so a large reply arriving in many
+    chunks is never re-parsed from its start.
+    """
+
+    __slots__ = ("buffer", "pos", "end", "_view", "_stack", "_initial")
+
+    def __init__(self, size=65536):
+        self._initial = size
+        self.buffer = bytearray(size)
+        self._view = memoryview(self.buffer)
+        self.pos = 0
+        self.end = 0
+        # Open aggregates: [kind, items, elements still missing]
+        self._stack = []
+
+    def _reserve(self, size):
+        """Make room for size more bytes after end, moving unparsed bytes to the front
+
+        The buffer is replaced rather than resized, so memoryviews handed out by
+        get_buffer() never pin it.
+        """
+        if len(self.buffer) - self.end >= size:
+            return
+        live = self.end - self.pos
+        capacity = len(self.buffer)
+        while capacity - live < size:
+            capacity *= 2
+        if capacity != len(self.buffer) or live or self.pos:
+            buffer = bytearray(capacity)
+            buffer[:live] = self._view[self.pos:self.end]
+            self.buffer = buffer
+            self._view = memoryview(buffer)
+        self.pos = 0
+        self.end = live
+
+    def get_buffer(self, sizehint=-1):
+        """Writable view of the free space after the received bytes"""
+        self._reserve(max(sizehint, self._initial // 4))
+        return self._view[self.end:]
+
+    def buffer_updated(self, nbytes):
+        self.end += nbytes
+
+    def feed(self, data):
+        size = len(data)
+        self._reserve(size)
+        self._view[self.end:self.end + size] = data
+        self.end += size
+
+    def reset(self):
+        self.pos = self.end = 0
+        self._stack = []
+
+    def gets(self):
+        """The next complete reply, or INCOMPLETE; error replies are returned as RedisError"""
+        replies = []
+        self._parse(replies, 1)
+        return replies[0] if replies else INCOMPLETE
+
+    def gets_all(self, limit=None):
+        """Every complete reply in the buffer (at most limit), in one pass over it"""
+        replies = []
+        self._parse(replies, limit or -1)
+        return replies
+
+    def _parse(self, replies, limit):
+        buffer = self.buffer
+        view = self._view
+        find = buffer.find
+        end = self.end
+        stack = self._stack
+        # pos only advances past whole elements, so INCOMPLETE can always resume from it
+        pos = self.pos
+        while True:
+            line_end = find(_CRLF, pos + 1, end)
+            if line_end == -1:
+                self.pos = pos
+                return
+            prefix = buffer[pos]
+
+            if prefix == _BULK:
+                length = int(buffer[pos + 1:line_end])
+                if length < 0:
+                    value = None
+                    pos = line_end + 2
+                else:
+                    stop = line_end + 2 + length
+                    if stop + 2 > end:
+                        self.pos = pos
+                        return
+                    value = view[line_end + 2:stop].tobytes()
+                    pos = stop + 2
+            elif prefix in _AGGREGATES:
+                count = int(buffer[pos + 1:line_end])
+                pos = line_end + 2
+                if count > 0:
+                    stack.append([prefix, [], count * _AGGREGATES[prefix]])
+                    continue
+                value = None if count < 0 else _finish(prefix, [])
+            elif prefix == _SIMPLE:
+                value = buffer[pos + 1:line_end].decode("utf-8", "replace")
+                pos = line_end + 2
+            elif prefix == _INTEGER or prefix == _BIG_NUMBER:
+                value = int(buffer[pos + 1:line_end])
+                pos = line_end + 2
+            elif prefix == _ERROR:
+                value = RedisError(buffer[pos + 1:line_end].decode("utf-8", "replace"))
+                pos = line_end + 2
+            elif prefix == _VERBATIM or prefix == _BLOB_ERROR:
+                length = int(buffer[pos + 1:line_end])
+                if line_end + 4 + length > end:
+                    self.pos = pos
+                    return
+                text = view[line_end + 2:line_end + 2 + length].tobytes()
+                pos = line_end + 4 + length
+                if prefix == _BLOB_ERROR:
+                    value = RedisError(text.decode("utf-8", "replace"))
+                else:
+                    value = Verbatim(text[4:])
+                    value.format = text[:3].decode("ascii", "replace")
+            elif prefix == _NULL:
+                value = None
+                pos = line_end + 2
+            elif prefix == _DOUBLE:
+                value = float(buffer[pos + 1:line_end])
+                pos = line_end + 2
+            elif prefix == _BOOLEAN:
+                value = buffer[pos + 1] == 0x74  # 't'
+                pos = line_end + 2
+            else:
+                raise ProtocolError(f"unexpected reply prefix {bytes((prefix,))!r} at offset {pos}")
+
+            # Hand the value to the innermost open aggregate, closing every one it completes
+            while stack:
+                frame = stack[-1]
+                frame[1].append(value)
+                frame[2] -= 1
+                if frame[2]:
+                    break
+                stack.pop()
+                if frame[0] == _ATTRIBUTE:
+                    # Attributes annotate the reply that follows; the tools have no use for them
+                    break
+                value = _finish(frame[0], frame[1])
+            else:
+                replies.append(value)
+                limit -= 1
+                if not limit:
+                    self.pos = pos
+                    return
+
+
+def to_bytes(arg):
+    """A command argument as bytes: ints in decimal, other objects as their UTF-8 text"""
+    if isinstance(arg, bytes):
+        return arg
+    if isinstance(arg, (bytearray, memoryview)):
+        return bytes(arg)
+    if type(arg) is int:
+        return b"%d" % arg
+    return str(arg).encode("utf-8")
+
+
+# Headers for the argument counts and lengths that almost every command uses
+_ARRAY_HEADERS = [b"*%d\r\n" % count for count in range(64)]
+_BULK_HEADERS = [b"$%d\r\n" % length for length in range(1024)]
+
+
+def encode_pipeline(commands):
+    """Every command of a batch as RESP arrays in one buffer
+
+    Headers come from lookup tables and arguments are referenced, not formatted into
+    intermediate strings, so each argument's bytes are copied exactly once: into the
+    output, which join() allocates at its final size up front.
+    """
+    parts = []
+    append = parts.append
+    array_headers = _ARRAY_HEADERS
+    bulk_headers = _BULK_HEADERS
+    for command in commands:
+        count = len(command)
+        append(array_headers[count] if count < 64 else b"*%d\r\n" % count)
+        for arg in command:
+            if type(arg) is not bytes:
+                arg = to_bytes(arg)
+            length = len(arg)
+            append(bulk_headers[length] if length < 1024 else b"$%d\r\n" % length)
+            append(arg)
+            append(_CRLF)
+    return b"".join(parts)
+
+
+def encode_command(*args):
+    return encode_pipeline((args,))
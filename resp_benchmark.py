@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+RESP Codec Micro-Benchmark
+Times resp.Parser and resp.encode_pipeline against the naive readline parser and per-command
+encoding the tools used before, on the reply and command shapes the cluster tools produce
+"""
+
+import argparse
+import asyncio
+import io
+import time
+
+import resp
+
+CHUNK_SIZE = 65536
+
+
+def naive_encode(commands):
+    """One bytes object per command, joined at the end"""
+    out = []
+    for command in commands:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        out.append(b"".join(parts))
+    return b"".join(out)
+
+
+def buffered_reply(f):
+    """Recursive readline parser over an in-memory file: a floor only reachable with the whole batch at hand"""
+    line = f.readline()
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode("utf-8", "replace")
+    if prefix == b"-":
+        return resp.RedisError(body.decode("utf-8", "replace"))
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        return None if length < 0 else f.read(length + 2)[:-2]
+    if prefix == b"*":
+        count = int(body)
+        return None if count < 0 else [buffered_reply(f) for _ in range(count)]
+    raise resp.ProtocolError(f"unexpected reply prefix {prefix!r}")
+
+
+async def naive_reply(reader):
+    """The naive parser the tools used before resp.py: one awaited readline per RESP line"""
+    line = await reader.readline()
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode("utf-8", "replace")
+    if prefix == b"-":
+        return resp.RedisError(body.decode("utf-8", "replace"))
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if prefix == b"*":
+        count = int(body)
+        return None if count < 0 else [await naive_reply(reader) for _ in range(count)]
+    raise resp.ProtocolError(f"unexpected reply prefix {prefix!r}")
+
+
+def workloads(count):
+    """{name: (encoded replies, number of replies)} shaped like the tools' traffic"""
+    value = b"v" * 100
+    keys = [b"user:%d:profile" % index for index in range(count)]
+    return {
+        f"{count} GET replies (100 B)": (b"".join(b"$100\r\n" + value + b"\r\n" for _ in range(count)), count),
+        f"{count} +OK replies": (b"+OK\r\n" * count, count),
+        f"SCAN page of {count} keys": (
+            b"*2\r\n$1\r\n0\r\n*%d\r\n" % count + b"".join(b"$%d\r\n%s\r\n" % (len(key), key) for key in keys), 1),
+        f"{count // 10} MGETs of 10": (
+            (b"*10\r\n" + b"".join(b"$100\r\n" + value + b"\r\n" for _ in range(10))) * (count // 10),
+            count // 10),
+        "INFO (64 KiB bulk)": (b"$65536\r\n" + b"x" * 65536 + b"\r\n", 1),
+    }
+
+
+def best_of(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def chunks(data):
+    return [data[offset:offset + CHUNK_SIZE] for offset in range(0, len(data), CHUNK_SIZE)]
+
+
+def parse_resp(data, count, parser):
+    parser.reset()
+    replies = []
+    for chunk in chunks(data):
+        parser.feed(chunk)
+        replies.extend(parser.gets_all())
+    assert len(replies) == count
+    return replies
+
+
+def parse_buffered(data, count):
+    f = io.BytesIO(data)
+    return [buffered_reply(f) for _ in range(count)]
+
+
+def parse_naive(data, count, loop):
+    async def run():
+        reader = asyncio.StreamReader(limit=2 ** 24)
+        for chunk in chunks(data):
+            reader.feed_data(chunk)
+        reader.feed_eof()
+        return [await naive_reply(reader) for _ in range(count)]
+
+    return loop.run_until_complete(run())
+
+
+def run(count=1000, repeat=20):
+    results = []
+    # One event loop and one parser for every run, as a connection keeps both
+    loop = asyncio.new_event_loop()
+    parser = resp.Parser()
+    for name, (data, replies) in workloads(count).items():
+        expected = parse_naive(data, replies, loop)
+        assert parse_resp(data, replies, parser) == expected and parse_buffered(data, replies) == expected
+        results.append(("parse", name, {
+            "naive (asyncio readline)": best_of(lambda: parse_naive(data, replies, loop), repeat),
+            "resp.Parser": best_of(lambda: parse_resp(data, replies, parser), repeat),
+            "BytesIO readline": best_of(lambda: parse_buffered(data, replies), repeat),
+        }))
+
+    loop.close()
+
+    value = b"v" * 100
+    batches = {
+        f"{count} SET commands": [(b"SET", b"user:%d:profile" % index, value) for index in range(count)],
+        f"{count // 10} MSETs of 100 keys": [(b"MSET", *(part for index in range(100) for part in
+                                                         (b"k%d" % index, value))) for _ in range(count // 10)],
+    }
+    for name, commands in batches.items():
+        assert bytes(resp.encode_pipeline(commands)) == naive_encode(commands)
+        results.append(("encode", name, {
+            "naive join": best_of(lambda: naive_encode(commands), repeat),
+            "resp.encode_pipeline": best_of(lambda: resp.encode_pipeline(commands), repeat),
+        }))
+    return results
+
+
+def print_results(results):
+    print("=" * 50)
+    for kind, name, timings in results:
+        baseline = next(iter(timings.values()))
+        print(f"\n{'🔍' if kind == 'parse' else '📤'} {kind} {name}")
+        for implementation, seconds in timings.items():
+            print(f"  {implementation:<24}  {seconds * 1e3:>8.2f}ms  {baseline / seconds:>5.1f}x")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compare resp.py with naive RESP parsing and encoding")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="replies / commands per batch (default: 1000)")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="runs per measurement; best is kept (default: 20)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    print("⏱️  RESP codec micro-benchmark")
+    print_results(run(args.count, args.repeat))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Online Slot Migration Engine
+Moves slots between masters with batched MIGRATE under a byte-rate limit, shrinking or
+growing the batch from the p99 latency observed on each source node, with progress and ETA
+"""
+
+import asyncio
+import time
+
+from latency_histogram import LatencyHistogram
+from redis_protocol import RedisError
+
+# Samples needed in a window before the controller trusts its p99
+MIN_SAMPLES = 20
+
+
+class RateLimiter:
+    """Token bucket in bytes per second, shared by every source; None or 0 disables it"""
+
+    __slots__ = ("rate", "tokens", "updated")
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate or 0
+        self.updated = time.monotonic()
+
+    async def consume(self, amount):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate) - amount
+        self.updated = now
+        if self.tokens < 0:
+            # Callers queue up as debt: each sleeps until its own share has been earned
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class AdaptiveBatch:
+    """Keys per MIGRATE, halved when the source's p99 exceeds the target and grown by a quarter
+    while it stays under half of it"""
+
+    __slots__ = ("size", "minimum", "maximum", "target_us", "interval", "window", "adjusted", "p99")
+
+    def __init__(self, size=100, minimum=10, maximum=1000, target_p99_ms=2.0, interval=0.5):
+        self.size = max(minimum, min(size, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_us = target_p99_ms * 1000.0
+        self.interval = interval
+        self.window = LatencyHistogram()
+        self.adjusted = time.monotonic()
+        self.p99 = None
+
+    def observe(self, micros):
+        self.window.record(micros)
+
+    def adjust(self):
+        now = time.monotonic()
+        if now - self.adjusted < self.interval or self.window.total < MIN_SAMPLES:
+            return
+        self.p99 = self.window.percentile(99)
+        if self.p99 > self.target_us:
+            self.size = max(self.minimum, self.size // 2)
+        elif self.p99 < self.target_us / 2:
+            self.size = min(self.maximum, self.size + max(1, self.size // 4))
+        self.window.reset()
+        self.adjusted = now
+
+
+class MigrationProgress:
+    """Counters for a running migration; keys_total is an estimate taken when it starts"""
+
+    def __init__(self, slots_total, keys_total):
+        self.slots_total = slots_total
+        self.keys_total = keys_total
+        self.slots_done = 0
+        self.keys_moved = 0
+        self.bytes_moved = 0
+        self.started = time.monotonic()
+        self.controllers = {}
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def keys_per_second(self):
+        return self.keys_moved / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self):
+        """Seconds left at the average rate so far, or None before anything has moved"""
+        rate = self.keys_per_second
+        if not rate:
+            return None
+        # Live writes can add keys to slots that are still waiting
+        return max(0, self.keys_total - self.keys_moved) / rate
+
+    def line(self):
+        percent = 100.0 * self.keys_moved / max(1, self.keys_total, self.keys_moved)
+        text = (f"📦 {self.slots_done}/{self.slots_total} slots, {self.keys_moved:,}/{self.keys_total:,} keys "
+                f"({percent:.0f}%), {self.keys_per_second:,.0f} keys/s")
+        if self.bytes_moved:
+            text += f", {self.bytes_moved / self.elapsed / 1e6:.2f} MB/s"
+        for (host, port), controller in sorted(self.controllers.items()):
+            p99 = f"{controller.p99 / 1000:.1f}ms" if controller.p99 is not None else "-"
+            text += f" | {host}:{port} batch {controller.size} p99 {p99}"
+        eta = self.eta
+        return text + (f", ETA {eta:.0f}s" if eta is not None else "")
+
+
+def print_progress(progress):
+    print(f"   {progress.line()}", flush=True)
+
+
+class SlotMigrator:
+    """Runs a rebalance plan of (slot, source, target) moves through a ClusterAdmin
+
+    Sources drain in parallel, one slot at a time each. A probe connection PINGs every
+    source throughout; while MIGRATE blocks the source those PINGs stall just like the
+    application's commands do, so their p99 drives the batch size.
+    """
+
+    def __init__(self, admin, batch=100, min_batch=10, max_batch=1000, pipeline=1,
+                 bytes_per_second=None, target_p99_ms=2.0, timeout_ms=5000,
+                 probe_interval=0.01, report_interval=1.0, on_progress=print_progress):
+        self.admin = admin
+        self.batch = batch
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.pipeline = pipeline
+        self.limiter = RateLimiter(bytes_per_second)
+        self.target_p99_ms = target_p99_ms
+        self.timeout_ms = timeout_ms
+        self.probe_interval = probe_interval
+        self.report_interval = report_interval
+        self.on_progress = on_progress
+        self.progress = None
+
+    async def count_keys(self, moves):
+        """Keys currently in the planned slots, one pipeline per source"""
+        by_source = {}
+        for slot, source, _target in moves:
+            by_source.setdefault(source.address, []).append(slot)
+
+        async def count(address, slots):
+            async with self.admin.client.pool(address).connection() as connection:
+                replies = await connection.pipeline([("CLUSTER", "COUNTKEYSINSLOT", slot) for slot in slots])
+            return sum(reply for reply in replies if isinstance(reply, int))
+
+        return sum(await asyncio.gather(*(count(address, slots) for address, slots in by_source.items())))
+
+    async def _probe(self, address, controller, stop):
+        async with self.admin.client.pool(address).connection() as connection:
+            while not stop.is_set():
+                start = time.perf_counter()
+                await connection.execute("PING")
+                controller.observe((time.perf_counter() - start) * 1e6)
+                try:
+                    await asyncio.wait_for(stop.wait(), self.probe_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _report(self, stop):
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.report_interval)
+            except asyncio.TimeoutError:
+                self.on_progress(self.progress)
+
+    async def _key_bytes(self, connection, keys):
+        if not self.limiter.rate:
+            return 0
+        replies = await connection.pipeline([("MEMORY", "USAGE", key, "SAMPLES", 0) for key in keys])
+        return sum(reply for reply in replies if isinstance(reply, int))
+
+    async def _abort_slot(self, slot, source, target, error):
+        """Undo IMPORTING/MIGRATING after a failed batch, or raise a RedisError naming the fix
+
+        Clearing the states is only safe while the target holds none of the slot's keys;
+        otherwise they would be stranded on a node that does not own the slot.
+        """
+        admin = self.admin
+        try:
+            on_target = await admin.run(target.address, "CLUSTER", "COUNTKEYSINSLOT", slot)
+            if not on_target:
+                await asyncio.gather(admin.run(target.address, "CLUSTER", "SETSLOT", slot, "STABLE"),
+                                     admin.run(source.address, "CLUSTER", "SETSLOT", slot, "STABLE"))
+                return
+            state = f"{on_target} of its keys are already on the target"
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            state = f"rolling back failed too: {e}"
+        raise RedisError(f"ERR slot {slot} left half-migrated (MIGRATING on {source.host}:{source.port}, "
+                         f"IMPORTING on {target.host}:{target.port}; {state}) after: {error}. "
+                         f"Finish it with: redis-cli --cluster fix {source.host}:{source.port}") from error
+
+    async def migrate_slot(self, slot, source, target, controller):
+        """Move one slot and its keys from source to target; returns the number of keys moved"""
+        admin = self.admin
+        await admin.run(target.address, "CLUSTER", "SETSLOT", slot, "IMPORTING", source.id)
+        await admin.run(source.address, "CLUSTER", "SETSLOT", slot, "MIGRATING", target.id)
+
+        moved = 0
+        try:
+            async with admin.client.pool(source.address).connection() as connection:
+                while True:
+                    controller.adjust()
+                    batch = controller.size
+                    keys = await connection.execute("CLUSTER", "GETKEYSINSLOT", slot, batch * self.pipeline)
+                    if not keys:
+                        break
+                    size = await self._key_bytes(connection, keys)
+                    await self.limiter.consume(size)
+                    replies = await connection.pipeline([
+                        ("MIGRATE", target.host, target.port, "", 0, self.timeout_ms, "REPLACE", "KEYS",
+                         *keys[offset:offset + batch])
+                        for offset in range(0, len(keys), batch)])
+                    for reply in replies:
+                        if isinstance(reply, RedisError):
+                            raise reply
+                    moved += len(keys)
+                    self.progress.keys_moved += len(keys)
+                    self.progress.bytes_moved += size
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            await self._abort_slot(slot, source, target, e)
+            raise
+
+        # Target first, so a redirect never points at a node that would refuse the slot
+        await admin.run(target.address, "CLUSTER", "SETSLOT", slot, "NODE", target.id)
+        await admin.run(source.address, "CLUSTER", "SETSLOT", slot, "NODE", target.id)
+        others = [address for address in admin.addresses if address not in (source.address, target.address)]
+        await asyncio.gather(*(admin.run(address, "CLUSTER", "SETSLOT", slot, "NODE", target.id)
+                               for address in others))
+        self.progress.slots_done += 1
+        return moved
+
+    async def migrate(self, moves):
+        """Run every move; returns [(source node, keys moved)] per source"""
+        by_source = {}
+        for move in moves:
+            by_source.setdefault(move[1].address, []).append(move)
+        self.progress = MigrationProgress(len(moves), await self.count_keys(moves))
+        controllers = self.progress.controllers
+        for address in by_source:
+            controllers[address] = AdaptiveBatch(self.batch, self.min_batch, self.max_batch, self.target_p99_ms)
+
+        async def drain(source_moves):
+            controller = controllers[source_moves[0][1].address]
+            keys = 0
+            for slot, source, target in source_moves:
+                keys += await self.migrate_slot(slot, source, target, controller)
+            return source_moves[0][1], keys
+
+        stop = asyncio.Event()
+        background = [asyncio.ensure_future(self._probe(address, controller, stop))
+                      for address, controller in controllers.items()]
+        if self.on_progress:
+            background.append(asyncio.ensure_future(self._report(stop)))
+        try:
+            return await asyncio.gather(*(drain(source_moves) for source_moves in by_source.values()))
+        finally:
+            stop.set()
+            await asyncio.gather(*background, return_exceptions=True)
+            if self.on_progress and moves:
+                self.on_progress(self.progress)
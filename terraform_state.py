@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Streaming Terraform State Reader
+Builds the diagram topology from `terraform show -json` output or a terraform.tfstate file
+"""
+
+import json
+import os
+import re
+import sys
+
+from topology import (IngressRule, Instance, SecurityGroup, Subnet, Topology,
+                      VpcPeering, load_topology)
+
+DIAGRAM_RESOURCE_TYPES = frozenset((
+    "aws_vpc",
+    "aws_instance",
+    "aws_subnet",
+    "aws_security_group",
+    "aws_vpc_peering_connection",
+))
+
+# Top-level keys whose "resources" arrays describe real (or planned) infrastructure.
+# "prior_state" and "configuration" in plan output are deliberately skipped.
+_STATE_ROOTS = ("resources", "values", "planned_values")
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",}]" + _WHITESPACE
+
+
+class StateResource:
+    """One managed resource instance from a state or plan file"""
+
+    __slots__ = ("address", "type", "name", "values")
+
+    def __init__(self, address, type, name, values):
+        self.address = address
+        self.type = type
+        self.name = name
+        self.values = values
+
+
+class _JsonStream:
+    """Incremental JSON walker that decodes only the elements of "resources" arrays
+
+    Everything else is skipped character by character, so memory stays bounded by
+    the largest single resource rather than the size of the file.
+    """
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        """Append more input, discarding everything before pos"""
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character without consuming it ("" at end of input)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Malformed JSON: expected {char!r} near offset {self.pos}")
+        self.pos += 1
+
+    def _string(self, keep):
+        """Consume a JSON string; return its value when keep is true"""
+        offset = 1
+        while True:
+            end = self.buf.find('"', self.pos + offset)
+            if end < 0:
+                if not keep and len(self.buf) - self.pos > self.chunk_size:
+                    # Skipping a huge value: drop what we have seen, keeping any trailing
+                    # backslashes since they decide whether the next quote is escaped
+                    stripped = self.buf.rstrip("\\")
+                    self.buf = '"' + "\\" * (len(self.buf) - len(stripped))
+                    self.pos = 0
+                offset = max(1, len(self.buf) - self.pos)
+                if not self._fill():
+                    raise ValueError("Malformed JSON: unterminated string")
+                continue
+            backslashes = 0
+            while self.buf[end - 1 - backslashes] == "\\":
+                backslashes += 1
+            if backslashes % 2:
+                offset = end - self.pos + 1
+                continue
+            raw = self.buf[self.pos:end + 1]
+            self.pos = end + 1
+            return json.loads(raw) if keep else None
+
+    def _skip_scalar(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] not in _SCALAR_END:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return
+
+    def _decode(self):
+        """Decode one complete value at pos, reading more input until it parses"""
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Grow geometrically so a large resource isn't re-parsed many times
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            self.pos = end
+            return value
+
+    def walk(self, path=()):
+        """Yield (path, element) for every element of an array keyed "resources" """
+        char = self._peek()
+        if char == "{":
+            self.pos += 1
+            while True:
+                char = self._peek()
+                if char == "}":
+                    self.pos += 1
+                    return
+                if char == ",":
+                    self.pos += 1
+                    continue
+                key = self._string(keep=True)
+                self._expect(":")
+                yield from self.walk(path + (key,))
+        elif char == "[":
+            self.pos += 1
+            collect = bool(path) and path[-1] == "resources"
+            while True:
+                char = self._peek()
+                if char == "]":
+                    self.pos += 1
+                    return
+                if char == ",":
+                    self.pos += 1
+                    continue
+                if collect:
+                    yield path, self._decode()
+                else:
+                    yield from self.walk(path)
+        elif char == '"':
+            self._string(keep=False)
+        elif char:
+            self._skip_scalar()
+
+
+def _resource_address(element, index_key=None):
+    address = f"{element['type']}.{element['name']}"
+    if element.get("module"):
+        address = f"{element['module']}.{address}"
+    if index_key is not None:
+        address += f"[{json.dumps(index_key)}]"
+    return address
+
+
+def iter_resources(path, types=DIAGRAM_RESOURCE_TYPES, chunk_size=1 << 16):
+    """Stream managed resources of the given types from a state or plan JSON file
+
+    Accepts a v4 terraform.tfstate (resources[].instances[].attributes) as well as
+    `terraform show -json` / plan output (values|planned_values.root_module, including
+    nested child_modules). Pass types=None to yield every managed resource.
+    """
+    with open(path, encoding="utf-8") as f:
+        for element_path, element in _JsonStream(f, chunk_size).walk():
+            if element_path[0] not in _STATE_ROOTS:
+                continue
+            if element.get("mode", "managed") != "managed":
+                continue
+            if types is not None and element.get("type") not in types:
+                continue
+
+            if "instances" in element:
+                # terraform.tfstate format
+                for instance in element["instances"]:
+                    yield StateResource(_resource_address(element, instance.get("index_key")),
+                                        element["type"], element["name"],
+                                        instance.get("attributes") or {})
+            else:
+                # terraform show -json format
+                yield StateResource(element.get("address") or _resource_address(element),
+                                    element["type"], element["name"],
+                                    element.get("values") or {})
+
+
+def _natural_key(name):
+    """Sort key that orders redis-private-2 before redis-private-10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def _tag_name(values, default):
+    return (values.get("tags") or {}).get("Name") or default
+
+
+_PORT_LABELS = {
+    (22, 22): "SSH",
+    (80, 80): "HTTP",
+    (443, 443): "HTTPS",
+}
+
+
+def _ingress_rules(values, vpc_cidr, redis_port, cluster_bus_ports):
+    labels = dict(_PORT_LABELS)
+    labels[(redis_port, redis_port)] = "Redis"
+    labels[tuple(cluster_bus_ports)] = "Cluster"
+
+    rules = []
+    for rule in values.get("ingress") or []:
+        low, high = rule.get("from_port"), rule.get("to_port")
+        if rule.get("protocol") in ("icmp", "1"):
+            label, ports = "ICMP", "All"
+        elif rule.get("protocol") == "-1":
+            label, ports = "All traffic", "All"
+        else:
+            label = labels.get((low, high), rule.get("description") or "TCP")
+            ports = str(low) if low == high else f"{low}-{high}"
+        cidrs = rule.get("cidr_blocks") or []
+        if "0.0.0.0/0" in cidrs:
+            source = "0.0.0.0/0"
+        elif cidrs == [vpc_cidr]:
+            source = "VPC CIDR"
+        else:
+            source = ", ".join(cidrs) or "security groups"
+        rules.append(IngressRule(label, ports, source))
+    return rules
+
+
+def topology_from_state(path, base=None):
+    """Build a Topology from the resources in a state/plan file
+
+    Values the state cannot provide (Redis ports, region when no subnet has an AZ)
+    come from base, which defaults to the topology.json model.
+    """
+    base = base or load_topology(state="")
+    vpcs, subnets, instances, groups, peerings = {}, [], [], [], []
+    for resource in iter_resources(path):
+        if resource.type == "aws_vpc":
+            vpcs[resource.values.get("id")] = resource.values
+        elif resource.type == "aws_subnet":
+            subnets.append(resource)
+        elif resource.type == "aws_instance":
+            instances.append(resource)
+        elif resource.type == "aws_security_group":
+            groups.append(resource)
+        elif resource.type == "aws_vpc_peering_connection":
+            peerings.append(resource)
+
+    if not instances:
+        raise ValueError(f"No aws_instance resources found in {path}")
+
+    # The diagrammed VPC is the one hosting the most subnets
+    vpc_ids = [subnet.values.get("vpc_id") for subnet in subnets]
+    vpc_id = max(set(vpc_ids), key=vpc_ids.count) if vpc_ids else None
+    vpc_cidr = (vpcs.get(vpc_id) or {}).get("cidr_block") or base.vpc_cidr
+
+    def is_public(instance):
+        values = instance.values
+        return bool(values.get("public_ip") or values.get("associate_public_ip_address"))
+
+    public_subnet_ids = {instance.values.get("subnet_id") for instance in instances if is_public(instance)}
+    subnet_by_id = {}
+    for resource in sorted(subnets, key=lambda item: item.values.get("cidr_block") or ""):
+        values = resource.values
+        if vpc_id and values.get("vpc_id") != vpc_id:
+            continue
+        name = _tag_name(values, resource.name)
+        public = values.get("id") in public_subnet_ids or bool(values.get("map_public_ip_on_launch"))
+        subnet_by_id[values.get("id")] = Subnet(name, values.get("cidr_block", "?"),
+                                                values.get("availability_zone") or "unknown", public)
+
+    def subnet_for(instance):
+        subnet_id = instance.values.get("subnet_id")
+        if subnet_id not in subnet_by_id:
+            # Instance in a subnet outside the state (or an unknown plan value)
+            subnet_by_id[subnet_id] = Subnet(subnet_id or "unknown-subnet", "?", "unknown",
+                                             is_public(instance))
+        return subnet_by_id[subnet_id]
+
+    public_instances = [instance for instance in instances if is_public(instance)]
+    private_instances = sorted((instance for instance in instances if not is_public(instance)),
+                               key=lambda item: _natural_key(_tag_name(item.values, item.name)))
+
+    if public_instances:
+        bastion_resource = public_instances[0]
+        bastion = Instance(_tag_name(bastion_resource.values, bastion_resource.name), "Bastion Host",
+                           subnet_for(bastion_resource),
+                           bastion_resource.values.get("instance_type", base.bastion.instance_type),
+                           bastion_resource.values.get("private_ip"))
+    else:
+        bastion = base.bastion
+
+    redis_nodes = [
+        Instance(_tag_name(resource.values, resource.name), f"Redis Node {index}",
+                 subnet_for(resource),
+                 resource.values.get("instance_type", base.bastion.instance_type),
+                 resource.values.get("private_ip"))
+        for index, resource in enumerate(private_instances, start=1)
+    ]
+
+    security_groups = dict(base.security_groups)
+    for resource in groups:
+        values = resource.values
+        if vpc_id and values.get("vpc_id") not in (vpc_id, None):
+            continue
+        name = _tag_name(values, values.get("name") or resource.name)
+        security_groups[name] = SecurityGroup(name, _ingress_rules(values, vpc_cidr, base.redis_port,
+                                                                   base.cluster_bus_ports))
+
+    vpc_peerings = []
+    for resource in peerings:
+        values = resource.values
+        # Show whichever side of the connection is not the diagrammed VPC
+        peer = values.get("peer_vpc_id")
+        if peer == vpc_id:
+            peer = values.get("vpc_id")
+        peer_cidr = (vpcs.get(peer) or {}).get("cidr_block")
+        vpc_peerings.append(VpcPeering(_tag_name(values, resource.name),
+                                       f"{peer} ({peer_cidr})" if peer_cidr else peer or "peer VPC",
+                                       values.get("accept_status") or ""))
+
+    all_subnets = list(subnet_by_id.values())
+    if not any(subnet.public for subnet in all_subnets):
+        all_subnets.insert(0, base.public_subnet)
+    azs = [subnet.az for subnet in all_subnets if subnet.az != "unknown"]
+    region = azs[0][:-1] if azs else base.region
+
+    return Topology(region, vpc_cidr, base.redis_port, base.cluster_bus_ports,
+                    all_subnets, bastion, redis_nodes, security_groups.values(), vpc_peerings)
+
+
+def main(argv=None):
+    """Summarise the diagram-relevant resources in a state or plan file"""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: python terraform_state.py <terraform.tfstate | show.json>")
+        return 2
+
+    path = argv[0]
+    if not os.path.exists(path):
+        print(f"❌ File not found: {path}")
+        return 1
+
+    topology = topology_from_state(path)
+    print(f"📦 {path}")
+    print(f"Region: {topology.region}   VPC: {topology.vpc_cidr}")
+    for subnet in topology.subnets:
+        kind = "public " if subnet.public else "private"
+        print(f"  {kind} subnet {subnet.name:<20} {subnet.cidr:<15} {subnet.az}")
+    print(f"  bastion  {topology.bastion.name} ({topology.bastion.instance_type}) {topology.bastion.address}")
+    for node in topology.redis_nodes:
+        print(f"  redis    {node.name} ({node.instance_type}) {node.address} in {node.subnet.name}")
+    for group in topology.security_groups.values():
+        print(f"  sg       {group.name}: {group.rules_label().replace(chr(10), '; ')}")
+    for peering in topology.vpc_peerings:
+        print(f"  peering  {peering.name} -> {peering.peer} {peering.status}".rstrip())
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Terraform State Reader Tests
+Runs iter_resources and topology_from_state on the checked-in fixtures, with the incremental
+JSON walker forced onto chunk sizes small enough that tokens straddle every read boundary
+"""
+
+import io
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from terraform_state import _JsonStream, iter_resources, topology_from_state
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "terraform", "fixtures")
+STATE = os.path.join(FIXTURES, "terraform.tfstate")
+SHOW = os.path.join(FIXTURES, "show-scaled.json")
+CHUNK_SIZES = (1, 7, 64, 1 << 16)
+
+# fixture: (resource counts, redis nodes, subnets, security groups, peerings)
+EXPECTED = {
+    STATE: ({"aws_instance": 4, "aws_subnet": 4, "aws_security_group": 3, "aws_vpc": 1,
+             "aws_vpc_peering_connection": 1}, 3, 4, 2, 1),
+    SHOW: ({"aws_instance": 7, "aws_subnet": 4, "aws_security_group": 2, "aws_vpc": 1,
+            "aws_vpc_peering_connection": 1}, 6, 4, 2, 1),
+}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("path", sorted(EXPECTED))
+def test_iter_resources_counts(path, chunk_size):
+    counts = Counter(resource.type for resource in iter_resources(path, chunk_size=chunk_size))
+    assert counts == EXPECTED[path][0]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("path", sorted(EXPECTED))
+def test_iter_resources_matches_json_load(path, chunk_size):
+    """Every resource decoded by the stream equals the one json.load sees, whatever the chunking"""
+    streamed = [(resource.address, resource.values) for resource in iter_resources(path, types=None,
+                                                                                    chunk_size=chunk_size)]
+    whole = [(resource.address, resource.values) for resource in iter_resources(path, types=None)]
+    assert streamed == whole
+    assert all(isinstance(values, dict) for _, values in streamed)
+
+
+def test_iter_resources_skips_data_sources():
+    with open(STATE, encoding="utf-8") as f:
+        state = json.load(f)
+    managed = sum(len(element["instances"]) for element in state["resources"]
+                  if element.get("mode") == "managed" and element["type"] == "aws_vpc")
+    assert managed == sum(1 for resource in iter_resources(STATE) if resource.type == "aws_vpc")
+
+
+@pytest.mark.parametrize("path", sorted(EXPECTED))
+def test_topology_from_state(path):
+    _, redis_nodes, subnets, groups, peerings = EXPECTED[path]
+    topology = topology_from_state(path)
+    assert topology.region == "ap-south-1"
+    assert topology.vpc_cidr == "10.0.0.0/16"
+    assert len(topology.redis_nodes) == redis_nodes
+    assert len(topology.subnets) == subnets
+    assert sum(subnet.public for subnet in topology.subnets) == 1
+    assert len(topology.security_groups) == groups
+    assert len(topology.vpc_peerings) == peerings
+    assert topology.bastion.name == "redis-public"
+
+
+# Strings whose escapes land on chunk boundaries: escaped quotes, runs of backslashes
+# right before a closing quote, unicode escapes and a long value the walker skips
+ESCAPED_STRINGS = [
+    'plain',
+    'say \\"hi\\"',
+    'C:\\\\path\\\\',
+    '\\\\\\\\',
+    '\\\\\\"',
+    'tab\\tnew\\nline \\u00e9\\u2603',
+    '}],{[\\"resources\\":',
+    'x' * 300 + '\\\\' * 5 + '\\"',
+]
+
+
+def escaped_document():
+    """A state-shaped document with the escaped strings both in skipped and in decoded values"""
+    skipped = ", ".join(f'"k{index}": "{text}"' for index, text in enumerate(ESCAPED_STRINGS))
+    resources = ", ".join(
+        '{"mode": "managed", "type": "aws_instance", "name": "n%d", "instances": '
+        '[{"attributes": {"id": "i-%d", "note": "%s", "tags": {"Name": "%s"}}}]}' % (index, index, text, text)
+        for index, text in enumerate(ESCAPED_STRINGS))
+    return '{"version": 4, "outputs": {%s, "list": ["%s", 1.5e3, true, null]}, "lineage": "%s", ' \
+           '"resources": [%s], "check_results": null}' % (skipped, ESCAPED_STRINGS[-1], ESCAPED_STRINGS[1],
+                                                          resources)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_json_stream_escaped_strings(chunk_size):
+    document = escaped_document()
+    expected = [(("resources",), element) for element in json.loads(document)["resources"]]
+    assert list(_JsonStream(io.StringIO(document), chunk_size).walk()) == expected
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_iter_resources_escaped_strings(tmp_path, chunk_size):
+    path = tmp_path / "escaped.tfstate"
+    path.write_text(escaped_document(), encoding="utf-8")
+    notes = [resource.values["note"] for resource in iter_resources(str(path), chunk_size=chunk_size)]
+    assert notes == [json.loads(f'"{text}"') for text in ESCAPED_STRINGS]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_json_stream_malformed(chunk_size):
+    with pytest.raises(ValueError):
+        list(_JsonStream(io.StringIO('{"resources": [{"type": "aws_vpc"'), chunk_size).walk())
+    with pytest.raises(ValueError):
+        list(_JsonStream(io.StringIO('{"outputs": "never closed'), chunk_size).walk())
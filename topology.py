@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Redis Infrastructure Topology Model
+Single in-memory description of the VPC, subnets, instances and ports shared by all diagram scripts
+"""
+
+import functools
+import json
+import os
+
+DEFAULT_TOPOLOGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topology.json")
+
+
+class Subnet:
+    """A VPC subnet"""
+
+    __slots__ = ("name", "cidr", "az", "public")
+
+    def __init__(self, name, cidr, az, public=False):
+        self.name = name
+        self.cidr = cidr
+        self.az = az
+        self.public = public
+
+    @property
+    def az_label(self):
+        """Short zone label, e.g. AZ-1a for ap-south-1a"""
+        return "AZ-" + self.az.rsplit("-", 1)[-1]
+
+    @property
+    def host_pattern(self):
+        """Address pattern for hosts in the subnet, e.g. 10.0.2.x"""
+        return self.cidr.split("/")[0].rsplit(".", 1)[0] + ".x"
+
+
+class Instance:
+    """An EC2 instance placed in a subnet"""
+
+    __slots__ = ("name", "title", "subnet", "instance_type", "private_ip")
+
+    def __init__(self, name, title, subnet, instance_type, private_ip=None):
+        self.name = name
+        self.title = title
+        self.subnet = subnet
+        self.instance_type = instance_type
+        self.private_ip = private_ip
+
+    @property
+    def address(self):
+        return self.private_ip or self.subnet.host_pattern
+
+
+class IngressRule:
+    """A security group ingress rule as shown on the diagrams"""
+
+    __slots__ = ("label", "ports", "source")
+
+    def __init__(self, label, ports, source):
+        self.label = label
+        self.ports = ports
+        self.source = source
+
+
+class SecurityGroup:
+    """A named security group and its ingress rules"""
+
+    __slots__ = ("name", "ingress")
+
+    def __init__(self, name, ingress):
+        self.name = name
+        self.ingress = tuple(ingress)
+
+    def rules_label(self, prefix="", separator=" - "):
+        """Multi-line rule summary, e.g. "SSH (22) - 0.0.0.0/0\\nHTTP (80) - 0.0.0.0/0" """
+        lines = []
+        for rule in self.ingress:
+            if rule.ports == "All":
+                line = rule.label
+            else:
+                line = f"{rule.label} ({rule.ports})"
+            lines.append(f"{prefix}{line}{separator}{rule.source}")
+        return "\n".join(lines)
+
+    def ports_label(self, separator=", "):
+        """Compact port summary, e.g. "SSH:22, HTTP:80" (rules without ports are skipped)"""
+        return separator.join(f"{rule.label}:{rule.ports}" for rule in self.ingress
+                              if rule.ports != "All")
+
+
+class VpcPeering:
+    """A VPC peering connection to another VPC"""
+
+    __slots__ = ("name", "peer", "status")
+
+    def __init__(self, name, peer, status=""):
+        self.name = name
+        self.peer = peer
+        self.status = status
+
+
+class Topology:
+    """The whole Redis deployment: region, VPC, subnets, bastion, Redis nodes and security groups"""
+
+    __slots__ = ("region", "vpc_cidr", "redis_port", "cluster_bus_ports",
+                 "subnets", "bastion", "redis_nodes", "security_groups", "vpc_peerings")
+
+    def __init__(self, region, vpc_cidr, redis_port, cluster_bus_ports,
+                 subnets, bastion, redis_nodes, security_groups, vpc_peerings=()):
+        self.region = region
+        self.vpc_cidr = vpc_cidr
+        self.redis_port = redis_port
+        self.cluster_bus_ports = tuple(cluster_bus_ports)
+        self.subnets = tuple(subnets)
+        self.bastion = bastion
+        self.redis_nodes = tuple(redis_nodes)
+        self.security_groups = {group.name: group for group in security_groups}
+        self.vpc_peerings = tuple(vpc_peerings)
+
+    @property
+    def public_subnet(self):
+        return next(subnet for subnet in self.subnets if subnet.public)
+
+    @property
+    def private_subnets(self):
+        return tuple(subnet for subnet in self.subnets if not subnet.public)
+
+    @property
+    def public_sg(self):
+        return self.security_groups["public-sg"]
+
+    @property
+    def private_sg(self):
+        return self.security_groups["private-sg"]
+
+    @property
+    def cluster_bus_label(self):
+        low, high = self.cluster_bus_ports
+        return f"{low}-{high}"
+
+    @property
+    def instance_count(self):
+        return len(self.redis_nodes) + 1
+
+    def nodes_in(self, subnet):
+        return tuple(node for node in self.redis_nodes if node.subnet is subnet)
+
+    def cluster_ring(self, items):
+        """Pairs (a, b) linking each item to the next, closing the ring"""
+        items = list(items)
+        if len(items) < 2:
+            return []
+        return list(zip(items, items[1:] + items[:1]))
+
+
+def topology_from_dict(data):
+    """Build a Topology from the topology.json structure"""
+    instance_type = data.get("instance_type", "t3.micro")
+    subnets = [Subnet(item["name"], item["cidr"], item["az"], item.get("public", False))
+               for item in data["subnets"]]
+    by_name = {subnet.name: subnet for subnet in subnets}
+
+    bastion_data = data["bastion"]
+    bastion = Instance(bastion_data["name"], bastion_data.get("title", "Bastion Host"),
+                       by_name[bastion_data["subnet"]],
+                       bastion_data.get("instance_type", instance_type),
+                       bastion_data.get("private_ip"))
+
+    redis_nodes = [
+        Instance(item["name"], item.get("title", f"Redis Node {index}"),
+                 by_name[item["subnet"]],
+                 item.get("instance_type", instance_type),
+                 item.get("private_ip"))
+        for index, item in enumerate(data["redis_nodes"], start=1)
+    ]
+
+    security_groups = [
+        SecurityGroup(group["name"], [IngressRule(rule["label"], rule["ports"], rule["source"])
+                                      for rule in group["ingress"]])
+        for group in data["security_groups"]
+    ]
+
+    vpc_peerings = [VpcPeering(item["name"], item["peer"], item.get("status", ""))
+                    for item in data.get("vpc_peerings", [])]
+
+    return Topology(data["region"], data["vpc_cidr"], data.get("redis_port", 6379),
+                    data.get("cluster_bus_ports", (16379, 16384)),
+                    subnets, bastion, redis_nodes, security_groups, vpc_peerings)
+
+
+def synthetic_topology_data(redis_nodes, data=None):
+    """topology.json structure scaled to the given number of Redis nodes
+
+    Nodes are spread round-robin over the private subnets of data (default:
+    topology.json) and get sequential private IPs; used to benchmark scaling.
+    """
+    if data is None:
+        with open(DEFAULT_TOPOLOGY_FILE) as f:
+            data = json.load(f)
+    data = dict(data)
+    private = [subnet for subnet in data["subnets"] if not subnet.get("public", False)]
+
+    nodes = []
+    for index in range(redis_nodes):
+        subnet = private[index % len(private)]
+        prefix = subnet["cidr"].split("/")[0].rsplit(".", 1)[0]
+        nodes.append({"name": f"redis-private-{index + 1}", "subnet": subnet["name"],
+                      "private_ip": f"{prefix}.{10 + index // len(private)}"})
+    data["redis_nodes"] = nodes
+    return data
+
+
+def load_topology(path=None, state=None):
+    """Return the shared Topology, parsed once per process
+
+    With a Terraform state/plan JSON (state, or $DIAGRAM_TFSTATE) the instances,
+    subnets, security groups and peerings come from real resources; topology.json
+    still supplies ports and defaults. Pass state="" to ignore $DIAGRAM_TFSTATE.
+    """
+    path = path or os.environ.get("DIAGRAM_TOPOLOGY", DEFAULT_TOPOLOGY_FILE)
+    if state is None:
+        state = os.environ.get("DIAGRAM_TFSTATE", "")
+    return _load_topology(path, state)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_topology(path, state):
+    if state:
+        # Imported here: terraform_state itself builds on this module
+        from terraform_state import topology_from_state
+        return topology_from_state(state, base=_load_topology(path, ""))
+    with open(path) as f:
+        return topology_from_dict(json.load(f))